@@ -0,0 +1,226 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config.config import get_settings
+from .email_filter import user_email_index
+from .models import User
+from .password_utils import hash_passwords_bulk
+from .schemas import BulkUserRow
+from .serialization import dumps_line
+
+# 사용자 일괄 가져오기/내보내기 (관리자 API, python -m app.cli import-users/export-users)
+# - 가져오기: NDJSON 또는 CSV(첫 줄 헤더)를 한 줄씩 읽어 BULK_IMPORT_BATCH_SIZE개씩 묶어 처리
+#   * 비밀번호는 프로세스 풀에서 병렬로 해시하고, 다음 묶음 해시 중에 이전 묶음을 DB에 기록
+#   * 다중 행 INSERT ... ON CONFLICT (user_email) DO NOTHING 으로 기록하고 묶음마다 커밋
+#   * 실패한 행마다 {"line", "user_email", "error"}를 반환하고 마지막에 {"summary": ...} 반환
+# - 내보내기: user_id 기준 keyset 페이지로 읽어 NDJSON/CSV로 스트리밍
+# CSV 값 안의 줄바꿈은 지원하지 않는다.
+
+FORMATS = ("ndjson", "csv")
+EXPORT_COLUMNS = ["user_id", "user_email", "phone_number", "created_at", "updated_at"]
+
+Line = Tuple[Optional[str], Optional[str]]  # (줄 내용, 디코딩 오류)
+Record = Tuple[int, Optional[dict], Optional[str]]  # (줄 번호, 값, 파싱 오류)
+
+
+# 파일 객체(바이너리)를 청크 단위로 읽기, 파일 읽기는 스레드에서 실행
+async def iter_file_chunks(f, size: int = 1 << 20) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await asyncio.to_thread(f.read, size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def _decode_line(line: bytes) -> Line:
+    try:
+        return line.decode("utf-8").rstrip("\r"), None
+    except UnicodeDecodeError as e:
+        return None, f"invalid UTF-8 at byte {e.start}"
+
+
+# 바이트 청크 스트림을 줄 단위 문자열로 변환, UTF-8이 아닌 줄은 가져오기를 멈추지 않고 그 줄의 오류로 반환
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Line]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode_line(line)
+    if buffer:
+        yield _decode_line(buffer)
+
+
+async def iter_records(lines: AsyncIterator[Line], fmt: str) -> AsyncIterator[Record]:
+    header = None
+    line_no = 0
+    async for line, error in lines:
+        line_no += 1
+        if error is not None:
+            yield line_no, None, error
+            continue
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                yield line_no, None, "column count does not match header"
+                continue
+            # 빈 칸은 값 없음으로 처리
+            yield line_no, {key: value for key, value in zip(header, values) if value != ""}, None
+        else:
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, "expected a JSON object"
+                continue
+            yield line_no, record, None
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()
+    )
+
+
+async def _hash_batch(batch: List[Tuple[int, BulkUserRow]]) -> List[str]:
+    plain = [row.password for _, row in batch if row.password is not None]
+    hashed = iter(await hash_passwords_bulk(plain))
+    return [row.password_hash if row.password is None else next(hashed) for _, row in batch]
+
+
+# 한 묶음 기록, 실패한 행 목록과 추가된 행 수 반환
+async def _write_batch(session_factory, batch, hash_task) -> Tuple[List[dict], int]:
+    hashed = await hash_task
+    now = datetime.now(timezone.utc)
+    errors = []
+    line_by_email = {}
+    values = []
+    for (line_no, row), password in zip(batch, hashed):
+        if row.user_email in line_by_email:
+            errors.append({"line": line_no, "user_email": row.user_email, "error": "duplicate user_email in input"})
+            continue
+        line_by_email[row.user_email] = line_no
+        created_at = row.created_at or now
+        values.append({
+            "user_email": row.user_email,
+            "password": password,
+            "phone_number": row.phone_number,
+            "created_at": created_at,
+            # 다른 워커의 가입 이메일 filter가 updated_at 증가분으로 반영하므로 기록 시각으로 설정
+            "updated_at": now,
+        })
+
+    stmt = (
+        pg_insert(User)
+        .values(values)
+        .on_conflict_do_nothing(index_elements=[User.user_email])
+        .returning(User.user_email)
+    )
+    async with session_factory() as db:
+        inserted = set((await db.execute(stmt)).scalars())
+        await db.commit()
+
+    for email in inserted:
+        user_email_index.add(email)
+    for email, line_no in line_by_email.items():
+        if email not in inserted:
+            errors.append({"line": line_no, "user_email": email, "error": "user_email already exists"})
+    errors.sort(key=lambda item: item["line"])
+    return errors, len(inserted)
+
+
+async def import_users(
+    records: AsyncIterator[Record], session_factory, batch_size: int = None
+) -> AsyncIterator[dict]:
+    batch_size = batch_size or get_settings().BULK_IMPORT_BATCH_SIZE
+    summary = {"received": 0, "inserted": 0, "failed": 0}
+    batch = []
+    pending = None  # 해시 중인 이전 묶음 (batch, hash_task)
+
+    async def flush(batch):
+        nonlocal pending
+        previous, pending = pending, None
+        if batch:
+            pending = (batch, asyncio.ensure_future(_hash_batch(batch)))
+        if previous is None:
+            return []
+        errors, inserted = await _write_batch(session_factory, *previous)
+        summary["inserted"] += inserted
+        summary["failed"] += len(errors)
+        return errors
+
+    try:
+        async for line_no, record, error in records:
+            summary["received"] += 1
+            if error is None:
+                try:
+                    row = BulkUserRow.model_validate(record)
+                except ValidationError as e:
+                    error = _validation_message(e)
+            if error is not None:
+                summary["failed"] += 1
+                yield {"line": line_no, "user_email": (record or {}).get("user_email"), "error": error}
+                continue
+            batch.append((line_no, row))
+            if len(batch) >= batch_size:
+                for item in await flush(batch):
+                    yield item
+                batch = []
+        for item in await flush(batch):
+            yield item
+        for item in await flush([]):
+            yield item
+    finally:
+        if pending is not None:
+            pending[1].cancel()
+    yield {"summary": summary}
+
+
+def _format_rows(rows, columns, fmt: str) -> str:
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        for row in rows:
+            writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+        return out.getvalue()
+    return b"".join(dumps_line(dict(zip(columns, row))) for row in rows).decode("utf-8")
+
+
+# 사용자 목록 내보내기, 묶음마다 세션을 새로 열어 느린 클라이언트가 커넥션을 오래 잡지 않도록 함
+async def export_users(
+    session_factory, fmt: str = "ndjson", include_password_hash: bool = False,
+    batch_size: int = None,
+) -> AsyncIterator[str]:
+    batch_size = batch_size or get_settings().BULK_EXPORT_BATCH_SIZE
+    columns = EXPORT_COLUMNS + (["password_hash"] if include_password_hash else [])
+    selected = [getattr(User, name) for name in EXPORT_COLUMNS]
+    if include_password_hash:
+        selected.append(User.password)
+    if fmt == "csv":
+        yield ",".join(columns) + "\n"
+
+    last_id = 0
+    while True:
+        async with session_factory() as db:
+            rows = (await db.execute(
+                select(*selected).where(User.user_id > last_id).order_by(User.user_id).limit(batch_size)
+            )).all()
+        if not rows:
+            break
+        yield _format_rows(rows, columns, fmt)
+        last_id = rows[-1].user_id
@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set
+
+from config.config import get_settings
+
+
+# 크기 제한(LRU) + 항목별 만료 시간(TTL)을 가진 프로세스 내부 캐시
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (만료 시각, 값)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return default
+            self._data.move_to_end(key)  # 최근 사용 항목으로 이동
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + ttl, value)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))  # 가장 오래 사용되지 않은 항목 제거
+
+    def pop(self, key: Hashable, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._data):
+                self._remove(key)
+
+    def __len__(self):
+        return len(self._data)
+
+    # 하위 클래스에서 제거 시 부가 정리를 할 수 있도록 한 곳에서만 삭제
+    def _remove(self, key: Hashable):
+        _, value = self._data.pop(key)
+        return value
+
+
+# 인증 토큰 문자열 -> (디코딩된 claims, User) 캐시
+# 로그아웃/회원 정보 변경/탈퇴 시 사용자 단위로 무효화할 수 있도록 user_id -> 토큰 목록 인덱스를 함께 관리
+class TokenUserCache(TTLCache):
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+
+    def set_user(self, token: str, claims: dict, user, ttl: Optional[float] = None):
+        self.set(token, (claims, user), ttl)
+        with self._lock:
+            if token in self._data:
+                self._tokens_by_user.setdefault(user.user_id, set()).add(token)
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                if token in self._data:
+                    self._remove(token)
+            self._tokens_by_user.pop(user_id, None)
+
+    def _remove(self, key: Hashable):
+        value = super()._remove(key)
+        tokens = self._tokens_by_user.get(value[1].user_id)
+        if tokens is not None:
+            tokens.discard(key)
+            if not tokens:
+                del self._tokens_by_user[value[1].user_id]
+        return value
+
+
+token_user_cache = TokenUserCache(maxsize=get_settings().AUTH_CACHE_SIZE, ttl=get_settings().AUTH_CACHE_TTL)
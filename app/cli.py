@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+
+from sqlalchemy import exists, select, text
+
+from app.database import get_engine
+from app.models import EmailVerificationCode, Referral, Token, User, UserDevice
+from app import bulk_users, reaper
+from app.dependencies import session_scope
+from app.password_utils import shutdown_password_executor
+
+# 운영/CI용 관리 명령
+# 사용법: python -m app.cli <명령> (python -m app.cli -h 로 목록 확인)
+
+
+# 인덱스를 타야 하는 주요 조회 쿼리 (이름, 쿼리)
+def hot_queries():
+    now = datetime.now(timezone.utc)
+    return [
+        ("active_token_by_user", select(Token.token_id).where(Token.user_id == 1, Token.expires_at > now)),
+        ("login_credentials", select(User.user_id, exists().where(
+            Token.user_id == User.user_id, Token.expires_at > now,
+        )).where(User.user_email == "user@example.com")),
+        ("devices_by_user", select(UserDevice.device_id).where(UserDevice.user_id == 1)),
+        ("referral_pair", select(Referral.id).where(Referral.referrer_id == 1, Referral.referred_id == 2)),
+        ("verification_code_by_email_and_code", select(EmailVerificationCode.id).where(
+            EmailVerificationCode.user_email == "user@example.com", EmailVerificationCode.code == "123456",
+        )),
+    ]
+
+
+# 실행 계획(JSON)의 최상위 Plan
+def explain_plan(conn, query) -> dict:
+    compiled = query.compile(conn.engine, compile_kwargs={"literal_binds": True})
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+# 실행 계획에서 순차 스캔하는 테이블 이름
+def seq_scans(plan: dict):
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan.get("Relation Name")
+    for child in plan.get("Plans", ()):
+        yield from seq_scans(child)
+
+
+# EXPLAIN으로 주요 쿼리가 순차 스캔(Seq Scan)으로 바뀌지 않았는지 확인
+# 테이블이 작으면 플래너가 순차 스캔을 고르므로 enable_seqscan=off로 "인덱스를 쓸 수 있는지"만 검사한다.
+# 인덱스가 없으면 off여도 Seq Scan이 남으므로 실패 처리 (종료 코드 1)
+def explain_hot_queries(args) -> int:
+    failed = 0
+    with get_engine().connect() as conn:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, query in hot_queries():
+            plan = explain_plan(conn, query)
+            scans = list(seq_scans(plan))
+            status = "FAIL" if scans else "ok"
+            failed += bool(scans)
+            print(f"{status:4} {name}" + (f"  (Seq Scan on {', '.join(scans)})" if scans else ""))
+            if args.verbose:
+                print(json.dumps(plan, indent=2))
+        conn.rollback()
+    return 1 if failed else 0
+
+
+# 만료 데이터 정리 1회 실행 (파티션 관리 포함)
+def reap(args) -> int:
+    print(json.dumps(reaper.reap_once(maintain_partitions=True)))
+    return 0
+
+
+# tokens 파티션 생성/삭제만 1회 실행 (REAPER_MAINTAIN_PARTITIONS=false일 때 cron 등으로 실행)
+def maintain_partitions(args) -> int:
+    created, dropped = reaper.maintain_token_partitions()
+    print(json.dumps({"partitions_created": created, "partitions_dropped": dropped}))
+    return 0
+
+
+# tokens 테이블을 일별 파티션 테이블로 전환
+def partition_tokens(args) -> int:
+    moved = reaper.convert_tokens_to_partitioned()
+    print(f"tokens converted to daily partitions, {moved} unexpired tokens kept")
+    return 0
+
+
+# 사용자 일괄 가져오기 (파일 또는 표준 입력), 실패한 행과 요약을 NDJSON으로 출력
+def import_users(args) -> int:
+    async def run():
+        summary = {}
+        source = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+        try:
+            records = bulk_users.iter_records(bulk_users.iter_lines(bulk_users.iter_file_chunks(source)), args.format)
+            async for item in bulk_users.import_users(records, session_scope, args.batch_size):
+                print(json.dumps(item), flush=True)
+                summary = item.get("summary", summary)
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+        return summary
+
+    try:
+        summary = asyncio.run(run())
+    finally:
+        shutdown_password_executor()
+    return 1 if summary.get("failed") else 0
+
+
+# 사용자 일괄 내보내기 (파일 또는 표준 출력)
+def export_users(args) -> int:
+    async def run(out):
+        async for chunk in bulk_users.export_users(session_scope, args.format, args.include_password_hash):
+            out.write(chunk)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        asyncio.run(run(out))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+# main.py import 시간 측정 (워커 기동 시간 점검, CI에서 예산 초과 시 종료 코드 1)
+# 새 인터프리터에서 python -X importtime으로 import하고, import만으로 DB 엔진이 생성되거나
+# DB 드라이버가 로드되지 않았는지도 확인한다. 여러 번 실행해 가장 빠른 결과를 사용.
+IMPORT_CHECK = (
+    "import sys, main\n"
+    "from app import database\n"
+    "assert not database.created_engines(), 'DB engine created at import time'\n"
+    "loaded = [name for name in ('psycopg2', 'asyncpg') if name in sys.modules]\n"
+    "assert not loaded, f'DB driver imported at import time: {loaded}'\n"
+)
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def _measure_import(module: str):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_CHECK.replace("main", module, 1)],
+        cwd=root, capture_output=True, text=True,
+    )
+    modules = []  # (이름, 자체 시간, 누적 시간, 깊이), 하위 모듈이 먼저 나옴
+    other = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+        else:
+            other.append(line)
+    if result.returncode != 0:
+        raise RuntimeError("\n".join(other[-20:]) or f"exit code {result.returncode}")
+    return modules
+
+
+def _cumulative(modules, name: str) -> int:
+    return next(cumulative for module, _, cumulative, depth in modules if module == name and depth == 0)
+
+
+def import_time(args) -> int:
+    try:
+        runs = [_measure_import(args.module) for _ in range(args.repeat)]
+    except RuntimeError as e:
+        print(f"FAIL  import {args.module}: {e}")
+        return 1
+    best = min(runs, key=lambda modules: _cumulative(modules, args.module))
+    total_ms = _cumulative(best, args.module) / 1000
+
+    # 대상 모듈이 (간접적으로라도) import한 모듈의 자체 시간을 최상위 패키지별로 합산
+    # 대상 모듈의 하위 모듈은 대상 모듈 줄 바로 앞에 깊이 1 이상으로 나온다.
+    index = next(i for i, item in enumerate(best) if item[0] == args.module and item[3] == 0)
+    packages = Counter()
+    for name, self_us, _, depth in reversed(best[:index]):
+        if depth == 0:
+            break
+        packages[name.split(".")[0]] += self_us
+    for package, self_us in packages.most_common(args.top):
+        print(f"{self_us / 1000:9.1f} ms  {package}")
+    status = "FAIL" if args.budget_ms and total_ms > args.budget_ms else "ok"
+    budget = f" (budget {args.budget_ms:.0f} ms)" if args.budget_ms else ""
+    print(f"{status:4}  import {args.module}: {total_ms:.1f} ms{budget}")
+    return 1 if status == "FAIL" else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    explain = commands.add_parser("explain-hot-queries", help="주요 조회 쿼리의 인덱스 사용 여부 확인")
+    explain.add_argument("-v", "--verbose", action="store_true", help="실행 계획 전체 출력")
+    explain.set_defaults(func=explain_hot_queries)
+
+    commands.add_parser("reap", help="만료된 토큰/인증 코드 정리 1회 실행").set_defaults(func=reap)
+    commands.add_parser(
+        "partition-tokens", help="tokens 테이블을 expires_at 기준 일별 파티션 테이블로 전환"
+    ).set_defaults(func=partition_tokens)
+    commands.add_parser(
+        "maintain-partitions", help="tokens 파티션 미리 생성 및 만료 파티션 삭제 1회 실행"
+    ).set_defaults(func=maintain_partitions)
+
+    importer = commands.add_parser("import-users", help="NDJSON/CSV 파일에서 사용자 일괄 가져오기")
+    importer.add_argument("path", help="입력 파일 경로 (- 이면 표준 입력)")
+    importer.add_argument("--format", choices=bulk_users.FORMATS, default="ndjson")
+    importer.add_argument("--batch-size", type=int, default=None, help="기본: BULK_IMPORT_BATCH_SIZE")
+    importer.set_defaults(func=import_users)
+
+    exporter = commands.add_parser("export-users", help="사용자 목록을 NDJSON/CSV로 내보내기")
+    exporter.add_argument("-o", "--output", default="-", help="출력 파일 경로 (기본: 표준 출력)")
+    exporter.add_argument("--format", choices=bulk_users.FORMATS, default="ndjson")
+    exporter.add_argument("--include-password-hash", action="store_true", help="bcrypt 해시 포함")
+    exporter.set_defaults(func=export_users)
+
+    timing = commands.add_parser("import-time", help="main.py import 시간 측정 및 예산 확인")
+    timing.add_argument("--budget-ms", type=float, default=0, help="허용할 최대 import 시간(ms), 0이면 확인하지 않음")
+    timing.add_argument("--repeat", type=int, default=3, help="측정 횟수 (가장 빠른 값 사용)")
+    timing.add_argument("--top", type=int, default=15, help="출력할 패키지 수")
+    timing.add_argument("--module", default="main")
+    timing.set_defaults(func=import_time)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,22 +2,29 @@ import uuid
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 from fastapi import HTTPException
-from sqlalchemy import func
+from sqlalchemy import case, delete, exists, insert, literal, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, session
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import models, schemas
-from app.models import Token, TokenRateLimit, User, EmailVerificationCode
-from .password_utils import get_password_hash
-from .token_utils import create_jwt_token
-from app.token_rate_limit import TokenRateLimit as TokenRateLimitChecker
-import logging
+from app.models import Token, User, EmailOutbox, EmailVerificationCode
+from .password_utils import get_password_hash_async, verify_password_async
+from .cache import token_user_cache
+from .device_touch import device_touches
+from .email_filter import user_email_index
+from .token_utils import create_jwt_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from config.config import get_settings
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+VERIFICATION_CODE_TTL = timedelta(minutes=5)
+
+# 이메일 인증 코드 조회/저장 시 사용하는 정규화 (앞뒤 공백 제거, 소문자)
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
 
 # 사용자 생성
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    # bcrypt 해시는 전용 작업자 풀에서 실행 (이벤트 루프 차단 방지)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = models.User(
         # name=user.name,
         user_email=user.user_email,
@@ -25,126 +32,124 @@ def create_user(db: Session, user: schemas.UserCreate):
         phone_number=user.phone_number,
     )
     db.add(db_user)
-    db.commit()
+    await db.commit()
+    user_email_index.add(db_user.user_email)
     return db_user
 
 #사용자 조회 (email로 조회)
-def get_user_by_user_email(db: Session, user_email: str):
-    return db.query(models.User).filter(models.User.user_email == user_email).first()
-
-# 토큰 생성
-def create_token(db: Session, user_id: int) -> Token:
-    # Rate limit 설정 및 체크
-    rate_limit_checker = TokenRateLimitChecker(db=db, max_tokens=30, period=10)
-    rate_limit_checker.check(user_id)  # Rate limit 체크
-
-    now = datetime.now(timezone.utc)  # 현재 시간
-    expiration = now + timedelta(minutes=30)  # 새 토큰의 만료 시간을 30분 후로 설정
-
-    # 현재 사용자의 활성 토큰을 확인하여 이미 로그인 중인지 확인
-    existing_tokens = db.query(Token).filter(
-        Token.user_id == user_id,
-        Token.expires_at > now
-    ).all()
-
-    if existing_tokens:
-        print("Warning: User is already logged in.")
-
-    # JWT 토큰 생성 (구현 필요)
-    token_str = create_jwt_token(user_id)
-
-    # 새 토큰 객체 생성
-    token = Token(
-        user_id=user_id,
-        token=token_str,
-        issued_at=now,
-        expires_at=expiration,
+async def get_user_by_user_email(db: AsyncSession, user_email: str):
+    result = await db.execute(select(models.User).where(models.User.user_email == user_email))
+    return result.scalars().first()
+
+# 사용자 ID만 조회 (email로 조회), 없으면 None
+async def get_user_id_by_email(db: AsyncSession, user_email: str):
+    return await db.scalar(select(models.User.user_id).where(models.User.user_email == user_email).limit(1))
+
+# 가입 여부만 확인 (SELECT EXISTS), 행을 읽어 User 객체로 만들지 않음
+async def user_email_registered(db: AsyncSession, user_email: str) -> bool:
+    return await db.scalar(select(exists().where(models.User.user_email == user_email)))
+
+# 이메일 사용 여부 확인 (/check_user_email)
+# Bloom filter에 없으면 DB 조회 없이 False, 최근 확인된 이메일은 캐시에서 True
+async def user_email_exists(db: AsyncSession, user_email: str) -> bool:
+    if user_email_index.definitely_absent(user_email):
+        return False
+    if user_email_index.cached_exists(user_email):
+        return True
+    found = await user_email_registered(db, user_email)
+    user_email_index.record_lookup(user_email, found)
+    return found
+
+# 로그인용 사용자 조회: (user_id, password, 활성 토큰 존재 여부)를 한 번의 SELECT로 가져온다
+async def get_login_credentials(db: AsyncSession, user_email: str, now: datetime):
+    # 무상태 JWT 모드에서는 tokens 테이블을 사용하지 않으므로 중복 로그인 여부를 알 수 없다
+    if get_settings().JWT_STATELESS:
+        logged_in = literal(False)
+    else:
+        logged_in = exists().where(Token.user_id == User.user_id, Token.expires_at > now)
+    result = await db.execute(
+        select(User.user_id, User.password, logged_in.label("logged_in")).where(User.user_email == user_email)
     )
+    return result.first()
+
+# 기기 last_used 갱신 (커밋은 호출한 쪽에서), 새로 등록했으면 True
+# - 버퍼 사용 시: 이 워커에서 기기가 있는 것으로 확인된 사용자는 DB에 쓰지 않고 device_touches에 기록,
+#   처음 보는 사용자는 INSERT ... ON CONFLICT DO NOTHING 한 문장으로 등록 (이미 있으면 버퍼에 기록)
+# - 버퍼 미사용 시: INSERT ... ON CONFLICT DO UPDATE 한 문장으로 등록 또는 갱신
+async def touch_device(db: AsyncSession, user_id: int, ip_address: str, now: datetime) -> bool:
+    if get_settings().DEVICE_TOUCH_BUFFER_ENABLED and device_touches.is_known(user_id):
+        device_touches.touch(user_id, ip_address, now)
+        return False
+
+    stmt = pg_insert(models.UserDevice).values(user_id=user_id, ip_address=ip_address, last_used=now)
+    if get_settings().DEVICE_TOUCH_BUFFER_ENABLED:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[models.UserDevice.user_id])
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.UserDevice.user_id], set_={"last_used": stmt.excluded.last_used}
+        )
+    # xmax = 0이면 새로 INSERT된 행 (ON CONFLICT DO UPDATE로 갱신된 행은 0이 아님)
+    inserted = await db.scalar(stmt.returning(literal_column("xmax") == 0))
+    if get_settings().DEVICE_TOUCH_BUFFER_ENABLED:
+        if inserted:
+            device_touches.mark_known(user_id, now)
+        else:
+            device_touches.touch(user_id, ip_address, now)
+    return bool(inserted)
+
+# 로그인 토큰 발급
+# 기기 갱신과 토큰 저장을 하나의 트랜잭션(쓰기 최대 2회 + 커밋 1회)으로 처리한다.
+# 요청 제한은 /login 라우트의 RateLimit 의존성(메모리/Redis)에서 DB 조회 없이 처리한다.
+# 무상태 JWT 모드에서는 토큰을 저장하지 않는다.
+async def issue_login_token(db: AsyncSession, user_id: int, ip_address: str) -> Token:
+    now = datetime.now(timezone.utc)
 
     try:
-        # 새 토큰을 데이터베이스에 추가
-        db.add(token)
+        # 1) 기기: 처음 보는 기기만 바로 등록, 나머지 last_used 갱신은 버퍼에 모아서 기록
+        await touch_device(db, user_id, ip_address, now)
 
-        # 레이트 리미트 기록 추가 또는 업데이트
-        upsert_token_rate_limit(db, user_id)
-
-        db.commit()
-        db.refresh(token)
-    except IntegrityError as e:
-        db.rollback()
-        raise e
+        # 2) 토큰 저장
+        expiration = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        token = Token(
+            user_id=user_id,
+            token=create_jwt_token(user_id, issued_at=now, expires_at=expiration),
+            issued_at=now,
+            expires_at=expiration,
+        )
+        if not get_settings().JWT_STATELESS:
+            await db.execute(insert(Token).values(
+                user_id=token.user_id,
+                token=token.token,
+                issued_at=token.issued_at,
+                expires_at=token.expires_at,
+            ))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
 
     return token
 
 
+# 현재 로그인 중(만료되지 않은 토큰 보유)인 사용자 조회
+# tokens를 IN 목록으로 옮기지 않고 EXISTS 한 번으로 처리하며, user_id 기준 keyset 페이지네이션
+async def get_active_session_users(db: AsyncSession, now: datetime, after_user_id: int = None, limit: int = 100):
+    active = exists().where(Token.user_id == User.user_id, Token.expires_at > now)
+    stmt = select(User.user_id, User.user_email, User.phone_number, User.created_at, User.updated_at).where(active)
+    if after_user_id is not None:
+        stmt = stmt.where(User.user_id > after_user_id)
+    stmt = stmt.order_by(User.user_id).limit(limit)
+    return (await db.execute(stmt)).all()
+
+
 # token 삭제
-def delete_token(db: Session, user_id: int):
-    # 사용자 ID로 활성 토큰 조회
-    tokens = db.query(models.Token).filter(
+async def delete_token(db: AsyncSession, user_id: int):
+    # 사용자 ID의 활성 토큰을 한 번의 DELETE로 삭제
+    await db.execute(delete(models.Token).where(
         models.Token.user_id == user_id,
         models.Token.expires_at > datetime.now(timezone.utc)
-    ).all()
-    # 활성 토큰이 있으면 삭제
-    for token in tokens:
-        db.delete(token)
-    db.commit()
-
-# token 생성 제한 관리
-def upsert_token_rate_limit(db: Session, user_id: int):
-    # 현재 시간
-    now = datetime.now(timezone.utc)
-
-    try:
-        # 레이트 리미트 레코드를 삽입하거나 업데이트
-        rate_limit = db.query(TokenRateLimit).filter_by(user_id=user_id).first()
-
-        if rate_limit:
-            # 레코드가 이미 존재하면 업데이트
-            rate_limit.attempts += 1
-            rate_limit.last_attempt = now
-        else:
-            # 레코드가 존재하지 않으면 새로 삽입
-            new_rate_limit = TokenRateLimit(
-                user_id=user_id,
-                created_at=now,
-                attempts=1,
-                last_attempt=now
-            )
-            db.add(new_rate_limit)
-
-        db.commit()
-        db.refresh(rate_limit)  # 변경 사항 반영
-        return rate_limit
-    except IntegrityError as e:
-        db.rollback()
-        # 레코드가 이미 존재하는 경우 다시 시도
-        rate_limit = db.query(TokenRateLimit).filter_by(user_id=user_id).first()
-        if rate_limit:
-            rate_limit.attempts += 1
-            rate_limit.last_attempt = now
-            db.commit()
-            db.refresh(rate_limit)
-        else:
-            raise e
-
-
-
-# 기기 CRUD
-def register_device(db: Session, user_id: int, device_type: str, device_name: str, ip_address: str):
-    device = db.query(models.UserDevice).filter(
-        models.UserDevice.user_id == user_id,
-        models.UserDevice.device_type == device_type,
-        models.UserDevice.device_name == device_name
-    ).first()
-
-    if not device:
-        device = models.UserDevice(user_id=user_id, device_type=device_type, device_name=device_name,
-                                   ip_address=ip_address)
-        db.add(device)
-    device.last_used = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(device)
-    return device
+    ))
+    await db.commit()
 
 # 등록된 기기에서만 로그인을 허용하도록 설정
 # def is_device_registered(db: Session, user_id: int, device_type: str, device_name: str) -> bool:
@@ -157,121 +162,139 @@ def register_device(db: Session, user_id: int, device_type: str, device_name: st
 #     return device is not None
 
 # 기기 정보 업데이트
-def register_or_update_device(db: Session, user_id: int, device_info: schemas.Device):
-    # 기기 정보를 확인합니다.
-    device = db.query(models.UserDevice).filter(
-        models.UserDevice.user_id == user_id,
-        # python으로 수집
-        # models.UserDevice.device_type == device_info.device_type,
-        # models.UserDevice.device_name == device_info.device_name
-    ).first()
-
-    if device:
-        # 기기 정보가 이미 등록되어 있는 경우, `last_used`를 현재 시각으로 업데이트합니다.
-        device.last_used = datetime.now(timezone.utc)
-    else:
-        # 기기 정보가 등록되어 있지 않은 경우, 새 기기를 등록합니다.
-        device = models.UserDevice(
-            user_id=user_id,
-            # device_type=device_info.device_type,#python으로 수집
-            # device_name=device_info.device_name,#python으로 수집
-            ip_address=device_info.ip_address,
-            last_used= datetime.now(timezone.utc)
-        )
-        db.add(device)
-    db.commit()
-    db.refresh(device)
-    return device
+# 처음 보는 기기는 한 문장(INSERT ... ON CONFLICT)으로 등록하고, 이미 있는 기기의 last_used 갱신은 버퍼에 모아서 기록
+# 새로 등록했으면 True 반환
+async def register_or_update_device(db: AsyncSession, user_id: int, device_info: schemas.Device):
+    # python으로 수집
+    # device_type=device_info.device_type, device_name=device_info.device_name
+    registered = await touch_device(db, user_id, device_info.ip_address, datetime.now(timezone.utc))
+    await db.commit()
+    return registered
 
 
+# 이메일로 사용자 ID 조회 (SELECT 한 번), {이메일: user_id}
+async def _user_ids_by_email(db: AsyncSession, *user_emails: str) -> dict:
+    rows = await db.execute(select(User.user_email, User.user_id).where(User.user_email.in_(user_emails)))
+    return dict(rows.all())
+
 # 추천인 저장
-def create_referral(db: Session, referrer_username: str, referred_username: str):
-    # username을 저장
-    referrer = db.query(models.User).filter(models.User.username == referrer_username).first()
-    referred = db.query(models.User).filter(models.User.username == referred_username).first()
+async def create_referral(db: AsyncSession, referrer_email: str, referred_email: str):
+    # 이메일로 두 사용자의 user_id를 조회
+    user_ids = await _user_ids_by_email(db, referrer_email, referred_email)
 
-    if not referrer:
+    if referrer_email not in user_ids:
         raise HTTPException(status_code=404, detail="Referrer not found")
-    if not referred:
+    if referred_email not in user_ids:
         raise HTTPException(status_code=404, detail="Referred user not found")
 
-    # username의 id를 저장
+    # 두 사용자의 user_id를 저장
     new_referral = models.Referral(
-        referrer_id=referrer.id,
-        referred_id=referred.id
+        referrer_id=user_ids[referrer_email],
+        referred_id=user_ids[referred_email]
     )
     db.add(new_referral)
-    db.commit()
-    db.refresh(new_referral)
+    await db.commit()
+    await db.refresh(new_referral)
 
     return new_referral
 
-# 추천인 조회
-def get_referral_by_usernames(db: Session, referrer_username: str, referred_username: str):
-    # model에 있는 username을 조회
-    referrer = db.query(models.User).filter(models.User.username == referrer_username).first()
-    referred = db.query(models.User).filter(models.User.username == referred_username).first()
+# 추천인 조회 (조회 전용이므로 dependencies.ReadDB 세션으로 호출 가능), 추천 관계가 없으면 None
+async def get_referral_by_emails(db: AsyncSession, referrer_email: str, referred_email: str):
+    user_ids = await _user_ids_by_email(db, referrer_email, referred_email)
 
-    if not referrer or not referred:
+    if referrer_email not in user_ids or referred_email not in user_ids:
         raise HTTPException(status_code=404, detail="One or both users not found")
 
-    # 추천인이 있으면 referrals table의 id와 일치하는지 확인
-    return db.query(models.Referral).filter(
-        models.Referral.referrer_id == referrer.id,
-        models.Referral.referred_id == referred.id
-    ).first()
+    # 추천인-피추천인 쌍 조회 (ix_referrals_referrer_id_referred_id)
+    result = await db.execute(select(models.Referral).where(
+        models.Referral.referrer_id == user_ids[referrer_email],
+        models.Referral.referred_id == user_ids[referred_email]
+    ))
+    return result.scalars().first()
 
 # 모든 추천인 관계를 조회, 데이터분석 및 관리자모드에서 일괄처리시 필요
-def get_all_referrals(db: Session):
-    return db.query(models.Referral).all()
+# 테이블 전체를 한 번에 메모리에 올리지 않도록 서버 측 커서에서 batch_size행씩 받아 묶음(list)으로 반환
+# 예: async for rows in crud.get_all_referrals(db): ... (관리자 내보내기는 복제 서버 세션 사용)
+async def get_all_referrals(db: AsyncSession, batch_size: int = 1000):
+    stmt = (
+        select(models.Referral.id, models.Referral.referrer_id, models.Referral.referred_id, models.Referral.created_at)
+        .order_by(models.Referral.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(stmt)
+    try:
+        async for rows in result.partitions(batch_size):
+            yield rows
+    finally:
+        await result.close()
+
+# 사용자가 추천한 사용자들을 max_depth 단계까지 재귀 CTE 한 번으로 조회
+# (referrer_id, referred_id, depth, user_email) 행을 depth 순으로 반환, 순환 관계가 있어도 max_depth에서 멈춤
+async def get_referral_tree(db: AsyncSession, user_id: int, max_depth: int, limit: int):
+    Referral = models.Referral
+    tree = (
+        select(Referral.referrer_id, Referral.referred_id, literal(1).label("depth"))
+        .where(Referral.referrer_id == user_id)
+        .cte("referral_tree", recursive=True)
+    )
+    tree = tree.union_all(
+        select(Referral.referrer_id, Referral.referred_id, tree.c.depth + 1)
+        .join(tree, Referral.referrer_id == tree.c.referred_id)
+        .where(tree.c.depth < max_depth)
+    )
+    stmt = (
+        select(tree.c.referrer_id, tree.c.referred_id, tree.c.depth, User.user_email)
+        .join(User, User.user_id == tree.c.referred_id)
+        .order_by(tree.c.depth, tree.c.referred_id)
+        .limit(limit)
+    )
+    return (await db.execute(stmt)).all()
 
 
 # 이메일 인증 코드 저장
-async def create_verification_code(db: Session, user_email: str, verification_code: str):
-    # 이메일 소문자로 변환
-    user_email = user_email.lower()
-
-    # 현재 시간 가져오기
+# 이메일은 소문자로 정규화하여 저장하고, INSERT ... ON CONFLICT (user_email) DO UPDATE 한 번으로 생성/갱신
+# queue_email=True면 인증 메일을 email_outbox에 같은 트랜잭션으로 추가 (EMAIL_DELIVERY_MODE=outbox, app/mail_worker.py가 발송)
+async def create_verification_code(db: AsyncSession, user_email: str, verification_code: str, queue_email: bool = False):
     now = datetime.now(timezone.utc)
-
-    # 대소문자 구분하여 사용자 조회(email_verification_codes table에서 조회)
-    existing_user = db.query(EmailVerificationCode).filter(EmailVerificationCode.user_email == user_email).first()
-
-    # 인증 코드 조회 시 이메일을 소문자로 변환하여 비교
-    existing_code_entry = db.query(EmailVerificationCode).filter(func.lower(EmailVerificationCode.user_email) == user_email).first()
-
-    logger.info(f"Querying for user_email: {user_email}")
-    logger.info(f"Existing user: {existing_user}")
-    logger.info(f"Existing code entry: {existing_code_entry}")
-
-    if existing_user:
-        # 사용자가 존재하는 경우, 인증 코드가 이미 존재하는지 확인
-        if existing_code_entry:
-            # 인증 코드가 이미 존재하는 경우, 업데이트
-            existing_code_entry.code = verification_code  # 코드 업데이트
-            existing_code_entry.expires_at = now + timedelta(minutes=5)  # 유효 시간 업데이트
-            existing_code_entry.created_at = now  # created_at 필드도 업데이트
-            db.commit()
-        else:
-            # 새로운 인증 코드 생성
-            new_code_entry = EmailVerificationCode(
-                user_email=user_email,
-                code=verification_code,
-                created_at=now,  # created_at 필드 추가
-                expires_at=now + timedelta(minutes=5)  # 코드 유효시간 5분
-            )
-            db.add(new_code_entry)
-            db.commit()
-    else:
-        # 사용자가 존재하지 않을 경우, 새로운 인증 코드 생성
-        new_code_entry = EmailVerificationCode(
-            user_email=user_email,
-            code=verification_code,
-            created_at=now,  # created_at 필드 추가
-            expires_at=now + timedelta(minutes=5)  # 코드 유효시간 5분
-        )
-        db.add(new_code_entry)
-        db.commit()
+    stmt = pg_insert(EmailVerificationCode).values(
+        user_email=normalize_email(user_email),
+        code=verification_code,
+        created_at=now,
+        expires_at=now + VERIFICATION_CODE_TTL,  # 코드 유효시간 5분
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EmailVerificationCode.user_email],
+        set_={
+            "code": stmt.excluded.code,
+            "created_at": stmt.excluded.created_at,
+            "expires_at": stmt.excluded.expires_at,
+        },
+    )
+    await db.execute(stmt)
+    if queue_email:
+        await db.execute(insert(EmailOutbox).values(
+            recipient_email=user_email, verification_code=verification_code, created_at=now, next_attempt_at=now,
+        ))
+    await db.commit()
+
+# 이메일 인증 코드 확인
+# 코드가 맞고 만료 전이면 email_verified를 True로 바꾸는 UPDATE 한 번으로 처리하고 expires_at 반환
+# 일치하는 코드가 없으면 None, 만료된 코드면 email_verified는 그대로 두고 expires_at만 반환
+async def verify_verification_code(db: AsyncSession, user_email: str, code: str):
+    now = datetime.now(timezone.utc)
+    stmt = (
+        update(EmailVerificationCode)
+        .where(EmailVerificationCode.user_email == normalize_email(user_email), EmailVerificationCode.code == code)
+        .values(email_verified=case(
+            (EmailVerificationCode.expires_at > now, True),
+            else_=EmailVerificationCode.email_verified,
+        ))
+        .returning(EmailVerificationCode.expires_at)
+    )
+    expires_at = (await db.execute(stmt)).scalar()
+    await db.commit()
+    # timestamp 컬럼은 UTC 기준 naive 값으로 저장됨
+    return expires_at.replace(tzinfo=timezone.utc) if expires_at is not None else None
 
 
 # 이메일 인증 토큰 저장
@@ -298,32 +321,80 @@ async def create_verification_code(db: Session, user_email: str, verification_co
 # # 모든 사용자 조회
 # def get_users(db: Session, skip: int = 0, limit: int = 100):
 #     return db.query(models.User).offset(skip).limit(limit).all()
-# # 사용자 업데이트
-# def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
-#     db_user = get_user_by_id(db, user_id)
-#     if not db_user:
-#         raise HTTPException(status_code=404, detail="User not found")
-#
-#     for key, value in user_update.dict(exclude_unset=True).items():
-#         setattr(db_user, key, value)
-#
-#     db.commit()
-#     db.refresh(db_user)
-#     return db_user
-
 
-# 사용자 조회 (ID로 조회)
-def get_user_by_id(db: Session, user_id: int):
-    return db.query(models.User).filter(models.User.user_id == user_id).first()
+# IntegrityError가 지정한 제약 조건 위반인지 확인 (psycopg2는 diag, asyncpg는 원래 예외에 제약 조건 이름이 있음)
+def _violated_constraint(error: IntegrityError, constraint: str) -> bool:
+    orig = error.orig
+    name = getattr(getattr(orig, "diag", None), "constraint_name", None) or getattr(orig.__cause__, "constraint_name", None)
+    return name == constraint
 
-# 사용자 삭제(탈퇴 시)
-def delete_user(db: Session, user_id: int):
-    db_user = get_user_by_id(db, user_id)
+# 사용자 업데이트
+async def update_user(db: AsyncSession, user_id: int, user_update: schemas.UserUpdate):
+    db_user = await get_user_by_id(db, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    db.delete(db_user)
-    db.commit()
+    old_email = db_user.user_email
+    for key, value in user_update.model_dump(exclude_unset=True).items():
+        setattr(db_user, key, value)
+
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if _violated_constraint(e, "users_user_email_key"):
+            raise HTTPException(status_code=400, detail="Email already registered")
+        raise HTTPException(status_code=422, detail="Invalid user data")
+    await db.refresh(db_user)
+    # 캐시된 사용자 정보가 오래된 값이 되지 않도록 무효화
+    token_user_cache.invalidate_user(user_id)
+    if db_user.user_email != old_email:
+        user_email_index.discard(old_email)
+        user_email_index.add(db_user.user_email)
+    return db_user
+
+
+# 사용자 조회 (ID로 조회)
+# 관계 데이터가 필요하면 로딩 옵션 전달, 예: get_user_by_id(db, user_id, selectinload(models.User.devices))
+async def get_user_by_id(db: AsyncSession, user_id: int, *options):
+    return await db.get(models.User, user_id, options=options or None)
+
+# 사용자 삭제(탈퇴 시)
+# 관계를 ORM으로 불러오지 않고 토큰/기기/추천 관계를 DELETE로 먼저 지운 뒤 사용자 삭제 (한 트랜잭션)
+# 구독/결제 내역이 있으면 외래 키 제약으로 실패하므로 409 반환
+async def delete_user(db: AsyncSession, user_id: int):
+    try:
+        for table, condition in (
+            (models.Token, models.Token.user_id == user_id),
+            (models.UserDevice, models.UserDevice.user_id == user_id),
+            (models.TokenRateLimit, models.TokenRateLimit.user_id == user_id),
+            (models.Referral, (models.Referral.referrer_id == user_id) | (models.Referral.referred_id == user_id)),
+        ):
+            await db.execute(delete(table).where(condition))
+        user_email = await db.scalar(
+            delete(models.User).where(models.User.user_id == user_id).returning(models.User.user_email)
+        )
+        if user_email is None:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="User not found")
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="User has subscription or payment history")
+    token_user_cache.invalidate_user(user_id)
+    user_email_index.discard(user_email)
+    device_touches.forget(user_id)
     return {"detail": "User deleted successfully"}
 
 # 사용자 비밀번호 변경
+async def change_user_password(db: AsyncSession, user_id: int, password_update: schemas.PasswordUpdate):
+    db_user = await get_user_by_id(db, user_id)
+    if not db_user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not await verify_password_async(password_update.current_password, db_user.password):
+        raise HTTPException(status_code=400, detail="Current password is incorrect")
+
+    db_user.password = await get_password_hash_async(password_update.new_password)
+    await db.commit()
+    token_user_cache.invalidate_user(user_id)
+    return {"detail": "Password changed successfully"}
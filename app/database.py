@@ -1,34 +1,406 @@
-import os
+import asyncio
+from contextlib import AsyncExitStack
+from functools import lru_cache
 
 from sqlalchemy import create_engine, text
-from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 import logging
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-from config.config import DB_USER,DB_PASSWORD,DB_PORT,DB_NAME,DB_HOST
+from config.config import get_settings
+from .pool_metrics import MeteredAsyncAdaptedQueuePool, MeteredQueuePool
+from .sql_metrics import instrument_engine
+
+Base = declarative_base()
+
+# 엔진/세션 팩토리는 import 시점이 아니라 처음 사용할 때 생성 (DB 드라이버 import와 풀 생성도 그때 일어남)
+# 서버는 lifespan에서 init_engines()로 미리 만들고 커넥션을 채워 둔다. (CLI/마이그레이션은 필요할 때 생성)
+
+
+# URL 설정 (replica=True면 읽기 전용 복제 서버)
+def get_database_url(async_driver: bool = False, replica: bool = False) -> str:
+    settings = get_settings()
+    driver = "postgresql+asyncpg" if async_driver else "postgresql"
+    host = settings.DB_REPLICA_HOST if replica else settings.DB_HOST
+    port = (settings.DB_REPLICA_PORT or settings.DB_PORT) if replica else settings.DB_PORT
+    return f"{driver}://{settings.DB_USER}:{settings.DB_PASSWORD}@{host}:{port}/{settings.DB_NAME}"
+
+
+# 커넥션 풀 옵션 (config에서 조정)
+def _pool_options() -> dict:
+    settings = get_settings()
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,  # checkout 시 끊어진 커넥션 감지
+    }
+
+
+# 요청별 SQL 계측 연결 (SQL_METRICS_ENABLED), 엔진을 만들 때 연결하므로 서버 시작 뒤 처음 사용할 때
+# 만들어지는 엔진(DB_ASYNC=true에서 리퍼가 쓰는 동기 엔진 등)도 느린 쿼리 로그/지표에 포함된다.
+def _instrumented(db_engine):
+    if get_settings().SQL_METRICS_ENABLED:
+        instrument_engine(db_engine)
+    return db_engine
 
-# URL 설정
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-# print(f"DATABASE_URL: {DATABASE_URL}")
 
 # 데이터베이스 엔진과 세션 설정
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+@lru_cache
+def get_engine():
+    return _instrumented(create_engine(get_database_url(), poolclass=MeteredQueuePool, **_pool_options()))
+
+
+@lru_cache
+def get_sessionmaker():
+    return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=get_engine())
+
+
+# 비동기 엔진과 세션 설정 (DB_ASYNC=true 일 때만 생성, 아니면 None)
+# expire_on_commit=False: 커밋 후 속성 접근 시 암묵적인 I/O(lazy refresh)가 일어나지 않도록 함
+@lru_cache
+def get_async_engine():
+    if not get_settings().DB_ASYNC:
+        return None
+    return _instrumented(create_async_engine(
+        get_database_url(async_driver=True), poolclass=MeteredAsyncAdaptedQueuePool, **_pool_options()
+    ))
+
+
+@lru_cache
+def get_async_sessionmaker():
+    async_engine = get_async_engine()
+    if async_engine is None:
+        return None
+    return async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+# 읽기 전용 복제 서버 엔진 (DB_REPLICA_HOST 미설정 시 None), 세션 방식(DB_ASYNC)에 맞는 엔진 하나만 생성
+@lru_cache
+def get_replica_engine():
+    settings = get_settings()
+    if not settings.DB_REPLICA_HOST:
+        return None
+    if settings.DB_ASYNC:
+        return _instrumented(create_async_engine(
+            get_database_url(async_driver=True, replica=True), poolclass=MeteredAsyncAdaptedQueuePool, **_pool_options()
+        ))
+    return _instrumented(create_engine(get_database_url(replica=True), poolclass=MeteredQueuePool, **_pool_options()))
+
+
+@lru_cache
+def get_replica_sessionmaker():
+    replica_engine = get_replica_engine()
+    if replica_engine is None:
+        return None
+    if get_settings().DB_ASYNC:
+        return async_sessionmaker(bind=replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=replica_engine)
+
+
+# 새 세션 (DB_ASYNC에 따라 AsyncSession 또는 ThreadedSession), 사용 후 close() 필요
+def new_session(replica: bool = False):
+    if get_settings().DB_ASYNC:
+        factory = get_replica_sessionmaker() if replica else get_async_sessionmaker()
+        return factory()
+    factory = get_replica_sessionmaker() if replica else get_sessionmaker()
+    return ThreadedSession(factory())
+
+
+_ENGINE_GETTERS = (get_engine, get_async_engine, get_replica_engine)
+_FACTORIES = (get_replica_sessionmaker, get_async_sessionmaker, get_sessionmaker) + _ENGINE_GETTERS
+
+
+# 이미 생성된 엔진 목록 (계측/지표용, 엔진을 새로 만들지 않음)
+def created_engines() -> list:
+    return [
+        getter() for getter in _ENGINE_GETTERS
+        if getter.cache_info().currsize and getter() is not None
+    ]
+
+
+# 서버 시작 시 엔진을 만들고 요청이 사용할 풀에 커넥션 warmup개를 미리 연결
+# DB_ASYNC=true이면 동기 엔진은 만들지 않는다. (리퍼 등 동기 엔진을 쓰는 곳에서 처음 사용할 때 생성)
+async def init_engines(warmup: int = 0):
+    if get_settings().DB_ASYNC:
+        primary_engine = get_async_engine()
+    else:
+        primary_engine = await asyncio.to_thread(get_engine)
+    replica_engine = get_replica_engine()
+    warmup = min(warmup, get_settings().DB_POOL_SIZE)
+    if warmup <= 0:
+        return
+    await _prefill(primary_engine, warmup)
+    if replica_engine is not None:
+        try:
+            await _prefill(replica_engine, warmup)
+        except Exception:
+            # 복제 서버에 연결할 수 없어도 주 서버로 처리할 수 있으므로 시작은 계속
+            logger.warning("Replica pool warm-up failed", exc_info=True)
+    logger.info("Database pool warmed up with %d connections", warmup)
+
+
+async def _prefill(db_engine, count: int):
+    if isinstance(db_engine, AsyncEngine):
+        async with AsyncExitStack() as stack:
+            await asyncio.gather(*(stack.enter_async_context(db_engine.connect()) for _ in range(count)))
+    else:
+        await asyncio.to_thread(_prefill_pool, db_engine, count)
+
+
+def _prefill_pool(sync_engine, count: int):
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(sync_engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+# 서버 종료 시 커넥션 정리, 이후 다시 사용하면 새로 생성
+async def dispose_engines():
+    for db_engine in created_engines():
+        if isinstance(db_engine, AsyncEngine):
+            await db_engine.dispose()
+        else:
+            await asyncio.to_thread(db_engine.dispose)
+    for factory in _FACTORIES:
+        factory.cache_clear()
+
+
+# 동기 Session을 AsyncSession과 같은 방식(await)으로 사용할 수 있게 감싸는 클래스
+# DB_ASYNC=false 일 때 사용되며, 블로킹 I/O는 모두 스레드풀에서 실행되어 이벤트 루프를 막지 않는다.
+class ThreadedSession:
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    def expunge(self, instance):
+        self.sync_session.expunge(instance)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, params, **kwargs)
+
+    # 서버 측 커서로 결과를 나눠 받기 (AsyncSession.stream과 같은 사용법)
+    async def stream(self, statement, params=None, **kwargs):
+        statement = statement.execution_options(stream_results=True)
+        result = await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+        return ThreadedStreamResult(result)
+
+    async def stream_scalars(self, statement, params=None, **kwargs):
+        return (await self.stream(statement, params, **kwargs)).scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self, objects=None):
+        await run_in_threadpool(self.sync_session.flush, objects)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+# 동기 Result를 AsyncResult처럼 `async for`/partitions()로 읽을 수 있게 감싸는 클래스
+# 다음 묶음을 가져오는 fetch는 스레드풀에서 실행
+class ThreadedStreamResult:
+    def __init__(self, result):
+        self._result = result
+
+    def scalars(self):
+        return ThreadedStreamResult(self._result.scalars())
+
+    async def partitions(self, size=None):
+        while True:
+            partition = await run_in_threadpool(self._result.fetchmany, size)
+            if not partition:
+                break
+            yield partition
+
+    async def __aiter__(self):
+        async for partition in self.partitions():
+            for row in partition:
+                yield row
+
+    async def close(self):
+        await run_in_threadpool(self._result.close)
+
+# 복제 지연(초) 확인 SQL (복제 서버에서 실행)
+# 받은 WAL을 모두 반영했으면 0, 아니면 마지막으로 반영한 트랜잭션 이후 경과 시간
+# (쓰기가 없어 반영할 WAL이 없는 동안에는 지연이 늘어나지 않도록 LSN을 먼저 비교)
+REPLICA_LAG_SQL = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+# 복제 서버 연결 문제로 보고 주 서버로 다시 실행할 예외
+# (asyncpg는 연결 실패를 OSError로 그대로 올림)
+REPLICA_FALLBACK_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError, OSError)
+
+
+# 복제 서버 상태 (워커마다 별도)
+# run_monitor_loop()가 주기적으로 복제 지연을 확인하며, 확인에 실패했거나 복제 서버 쿼리가 연결 오류로
+# 실패하면 다음 확인에 성공할 때까지 lag=None(사용 불가)으로 두어 모든 조회를 주 서버에서 처리한다.
+class ReplicaMonitor:
+    def __init__(self):
+        self.lag = None  # 초, None이면 사용 불가(미설정/미확인/오류)
+        # 통계
+        self.checks = 0
+        self.check_errors = 0
+        self.replica_reads = 0
+        self.primary_reads = 0  # 지연 초과/사용 불가로 처음부터 주 서버에서 처리
+        self.fallbacks = 0  # 복제 서버 쿼리 실패 후 주 서버에서 다시 실행
+
+    def usable(self, max_lag: float) -> bool:
+        return self.lag is not None and self.lag <= max_lag
+
+    def mark_failed(self):
+        self.lag = None
+
+    async def check(self) -> float:
+        replica_engine = get_replica_engine()
+        if isinstance(replica_engine, AsyncEngine):
+            async with replica_engine.connect() as conn:
+                lag = (await conn.execute(REPLICA_LAG_SQL)).scalar()
+        else:
+            lag = await asyncio.to_thread(_query_lag, replica_engine)
+        self.checks += 1
+        self.lag = float(lag)
+        return self.lag
+
+    async def run_monitor_loop(self, interval: float):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                if self.lag is not None or self.check_errors == 0:
+                    logger.warning("Replica lag check failed, reading from primary: %s", e)
+                self.check_errors += 1
+                self.mark_failed()
+            await asyncio.sleep(interval)
+
+    def metrics(self) -> dict:
+        return {
+            "configured": get_settings().DB_REPLICA_HOST is not None,
+            "available": self.lag is not None,
+            "lag_seconds": self.lag,
+            "checks": self.checks,
+            "check_errors": self.check_errors,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+        }
+
+
+def _query_lag(db_engine):
+    with db_engine.connect() as conn:
+        return conn.execute(REPLICA_LAG_SQL).scalar()
+
+
+replica_monitor = ReplicaMonitor()
+
+
+# 조회 전용 세션: 복제 지연이 max_lag초 이하이면 복제 서버, 아니면 주 서버에서 실행
+# 복제 서버 쿼리가 연결 오류로 실패하면 주 서버 세션으로 바꿔 같은 쿼리를 다시 실행한다.
+# 읽기만 지원 (쓰기/flush는 get_db 세션을 사용할 것)
+class ReadSession:
+    def __init__(self, max_lag: float):
+        self.on_replica = get_replica_engine() is not None and replica_monitor.usable(max_lag)
+        if self.on_replica:
+            replica_monitor.replica_reads += 1
+        elif get_replica_engine() is not None:
+            replica_monitor.primary_reads += 1
+        self._session = new_session(replica=self.on_replica)
+
+    async def _run(self, method: str, *args, **kwargs):
+        try:
+            return await getattr(self._session, method)(*args, **kwargs)
+        except Exception as e:
+            if not self.on_replica or not (
+                isinstance(e, REPLICA_FALLBACK_ERRORS)
+                or (isinstance(e, DBAPIError) and e.connection_invalidated)
+            ):
+                raise
+            logger.warning("Replica query failed, retrying on primary: %s", e)
+            replica_monitor.mark_failed()
+            replica_monitor.fallbacks += 1
+            await self._switch_to_primary()
+            return await getattr(self._session, method)(*args, **kwargs)
+
+    async def _switch_to_primary(self):
+        try:
+            await self._session.close()
+        except Exception:
+            logger.debug("Closing failed replica session raised", exc_info=True)
+        self._session = new_session()
+        self.on_replica = False
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await self._run("execute", statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await self._run("scalar", statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return await self._run("scalars", statement, params, **kwargs)
+
+    async def stream(self, statement, params=None, **kwargs):
+        return await self._run("stream", statement, params, **kwargs)
+
+    async def stream_scalars(self, statement, params=None, **kwargs):
+        return await self._run("stream_scalars", statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await self._run("get", entity, ident, **kwargs)
+
+    async def rollback(self):
+        await self._session.rollback()
+
+    async def close(self):
+        await self._session.close()
 
 # 데이터베이스 테이블 생성 (개발 또는 초기화 시에만 사용)
+# 스키마는 Alembic 마이그레이션으로 관리: `alembic upgrade head` (migrations/ 참고)
 # def init_db():
-#     Base.metadata.create_all(bind=engine)
+#     Base.metadata.create_all(bind=get_engine())
 #     logger.info("Tables created successfully.")
 
 # 데이터베이스 연결 테스트 함수
 # def test_connection():
 #     try:
-#         with engine.connect() as connection:
+#         with get_engine().connect() as connection:
 #             result = connection.execute(text("SELECT 1"))  # SQL쿼리를 문자열로 작성할 때 사용
 #             print("Database connection successful:", result.fetchone())
 #     except Exception as e:
@@ -36,4 +408,3 @@ Base = declarative_base()
 #
 # # 함수 호출
 # test_connection()
-
@@ -1,12 +1,110 @@
-from sqlalchemy.orm import Session
-from .database import SessionLocal
+import hmac
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from fastapi import Depends, HTTPException
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
+from sqlalchemy import exists, select
+
+from config.config import get_settings
+from . import models
+from .cache import token_user_cache
+from .database import ReadSession, ThreadedSession, get_async_sessionmaker, get_sessionmaker
+from .token_revocation import revocation_list, verify_stateless_token
+from .token_utils import decode_jwt_token
 
 # astAPI에서 데이터베이스 세션 생성과 닫기 위해 설정.
 # FastAPI의 Depends 통해 엔드포인트에 주입됨.
+# DB_ASYNC 설정에 따라 AsyncSession 또는 스레드풀로 감싼 동기 Session을 주입하며,
+# 두 경우 모두 `await db.execute(...)` 형태로 동일하게 사용한다.
+
+async def get_db():
+    async with session_scope() as db:
+        yield db
+
+# 요청 밖(스트리밍 응답 생성기, CLI, 백그라운드 작업)에서 사용하는 세션
+@asynccontextmanager
+async def session_scope():
+    if get_settings().DB_ASYNC:
+        async with get_async_sessionmaker()() as db:
+            yield db
+        return
+
+    db = ThreadedSession(get_sessionmaker()())
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+# 조회 전용 엔드포인트 세션 (복제 서버 우선, database.ReadSession 참고)
+# max_lag: 이 엔드포인트가 허용하는 복제 지연(초), 없으면 DB_REPLICA_MAX_LAG
+# 사용: db=Depends(ReadDB(max_lag=1))
+class ReadDB:
+    def __init__(self, max_lag: float = None):
+        self.max_lag = max_lag
+
+    async def __call__(self):
+        async with read_session_scope(self.max_lag) as db:
+            yield db
 
-def get_db():
-    db = SessionLocal()
+@asynccontextmanager
+async def read_session_scope(max_lag: float = None):
+    db = ReadSession(get_settings().DB_REPLICA_MAX_LAG if max_lag is None else max_lag)
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+
+# 이미 있는 사용자 인증, 세션 관리, 토큰 발급 등 보안
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+
+def _credentials_exception(detail: str) -> HTTPException:
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+# 인증된 사용자 조회
+# 토큰 검증 결과와 User를 토큰 문자열 기준 LRU 캐시에 보관하여 HMAC 검증과 사용자 SELECT를 반복하지 않는다.
+# 캐시 TTL(AUTH_CACHE_TTL)이 다른 워커에서 발생한 로그아웃이 반영되기까지의 최대 지연 시간이다.
+async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)) -> models.User:
+    cached = token_user_cache.get(token)
+    if cached is not None:
+        claims, user = cached
+        # 무상태 모드의 폐기 목록은 메모리 조회이므로 캐시 적중 시에도 매번 확인
+        if get_settings().JWT_STATELESS and revocation_list.is_revoked(claims):
+            token_user_cache.pop(token)
+            raise _credentials_exception("Token has been revoked")
+        return user
+
+    try:
+        claims = verify_stateless_token(token) if get_settings().JWT_STATELESS else decode_jwt_token(token)
+    except ValueError as e:
+        raise _credentials_exception(str(e))
+
+    user_id = int(claims["sub"])
+    query = select(models.User).where(models.User.user_id == user_id)
+    if not get_settings().JWT_STATELESS:
+        # DB 모드: 로그아웃되지 않은(tokens 테이블에 남아 있는) 토큰인지 같은 쿼리에서 확인
+        query = query.where(exists().where(
+            models.Token.token == token,
+            models.Token.user_id == user_id,
+            models.Token.expires_at > datetime.now(timezone.utc),
+        ))
+    user = (await db.execute(query)).scalars().first()
+    if user is None:
+        raise _credentials_exception("Could not validate credentials")
+
+    # 요청 세션과 분리하여 다른 요청에서도 안전하게 재사용
+    db.expunge(user)
+    token_user_cache.set_user(token, claims, user, ttl=claims["exp"] - time.time())
+    return user
+
+
+# 관리자 API 인증 (X-Admin-Token 헤더와 ADMIN_TOKEN 비교)
+admin_token_header = APIKeyHeader(name="X-Admin-Token", auto_error=False)
+
+async def require_admin(token: str = Depends(admin_token_header)):
+    admin_token = get_settings().ADMIN_TOKEN
+    if not admin_token or not token or not hmac.compare_digest(token, admin_token):
+        raise HTTPException(status_code=403, detail="Admin access required")
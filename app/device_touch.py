@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from sqlalchemy import Integer, String, column, select, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config.config import get_settings
+from .cache import TTLCache
+from .models import User, UserDevice, UTCDateTime
+
+logger = logging.getLogger(__name__)
+
+
+# 로그인 시 기기 last_used 갱신 모아서 쓰기 (워커마다 별도)
+# - touch()는 메모리에만 기록하고, run_flush_loop()가 주기적으로(또는 max_pending개가 쌓이면)
+#   다중 행 INSERT ... ON CONFLICT (user_id) DO UPDATE 한 문장으로 기록
+# - last_used는 resolution(초) 단위 정확도면 충분하므로, 그 안에 다시 로그인하면 갱신하지 않음
+# - 이 워커에서 기기가 있는 것으로 확인된 사용자를 known에 보관 (처음 보는 기기는 crud.touch_device가 바로 등록)
+# - 기록 전에 탈퇴한 사용자는 users와 조인하여 제외
+# 종료 시 lifespan에서 남은 갱신을 flush()한다. 비정상 종료 시에는 최대 flush 주기만큼의 last_used가 유실될 수 있다.
+class DeviceTouchBuffer:
+    def __init__(self, max_pending: int, resolution: float, known_size: int, known_ttl: float):
+        self.max_pending = max_pending
+        self.resolution = resolution
+        self._pending = {}  # user_id -> (ip_address, last_used)
+        self._known = TTLCache(maxsize=known_size, ttl=known_ttl)  # user_id -> 마지막으로 기록한 last_used
+        self._full = asyncio.Event()
+        # 통계
+        self.touches = 0
+        self.skipped = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.errors = 0
+
+    def is_known(self, user_id: int) -> bool:
+        return self._known.get(user_id) is not None
+
+    # 기기가 등록된 것을 확인 (새로 등록했거나 이미 있었음)
+    def mark_known(self, user_id: int, last_used: datetime):
+        self._known.set(user_id, last_used)
+
+    def touch(self, user_id: int, ip_address: str, now: datetime):
+        self.touches += 1
+        last_used = self._known.get(user_id)
+        if last_used is not None and (now - last_used).total_seconds() < self.resolution:
+            self.skipped += 1
+            return
+        self._pending[user_id] = (ip_address, now)
+        if len(self._pending) >= self.max_pending:
+            self._full.set()
+
+    # 탈퇴 등으로 기기가 삭제된 사용자
+    def forget(self, user_id: int):
+        self._pending.pop(user_id, None)
+        self._known.pop(user_id)
+
+    async def flush(self, session_factory) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        touches = values(
+            column("user_id", Integer), column("ip_address", String), column("last_used", UTCDateTime()),
+            name="touches",
+        ).data([(user_id, ip_address, last_used) for user_id, (ip_address, last_used) in sorted(batch.items())])
+        stmt = pg_insert(UserDevice).from_select(
+            ["user_id", "ip_address", "last_used"],
+            # user_id 순으로 기록하여 워커끼리 행 잠금 순서를 맞춤
+            select(touches.c.user_id, touches.c.ip_address, touches.c.last_used)
+            .join(User, User.user_id == touches.c.user_id)
+            .order_by(touches.c.user_id),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserDevice.user_id],
+            set_={"last_used": stmt.excluded.last_used},
+            where=UserDevice.last_used.is_(None) | (UserDevice.last_used < stmt.excluded.last_used),
+        )
+        try:
+            async with session_factory() as db:
+                written = (await db.execute(stmt)).rowcount
+                await db.commit()
+        except Exception:
+            # 기록하지 못한 갱신은 다음 주기에 다시 시도 (그 사이 새로 들어온 값이 우선)
+            for user_id, item in batch.items():
+                self._pending.setdefault(user_id, item)
+            raise
+        for user_id, (_, last_used) in batch.items():
+            self._known.set(user_id, last_used)
+        self.flushes += 1
+        self.rows_written += written
+        return written
+
+    async def run_flush_loop(self, session_factory, interval: float):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                await self.flush(session_factory)
+            except Exception:
+                self.errors += 1
+                logger.exception("Device touch flush failed")
+
+    def metrics(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "known": len(self._known),
+            "touches": self.touches,
+            "skipped": self.skipped,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "errors": self.errors,
+        }
+
+
+device_touches = DeviceTouchBuffer(
+    max_pending=get_settings().DEVICE_TOUCH_MAX_PENDING,
+    resolution=get_settings().DEVICE_TOUCH_RESOLUTION,
+    known_size=get_settings().DEVICE_TOUCH_KNOWN_SIZE,
+    known_ttl=get_settings().DEVICE_TOUCH_KNOWN_TTL,
+)
@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+from typing import Iterable
+
+from sqlalchemy import func, select, tuple_
+
+from config.config import get_settings
+from .cache import TTLCache
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+
+# 비트 배열 기반 Bloom filter
+# might_contain()이 False면 추가된 적이 없는 값이 확실하고, True면 error_rate 확률로 오탐일 수 있다.
+# 삭제는 지원하지 않으므로 탈퇴한 이메일은 (DB 조회로 확인되는) 오탐으로 남는다.
+# add()는 이벤트 루프(가입)와 스레드(add_many)에서 함께 호출되므로 비트 쓰기를 lock으로 직렬화한다.
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))  # 비트 수
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0  # 추가된 서로 다른 값의 수 (이미 있던 값은 세지 않음)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value: str):
+        positions = list(self._positions(value))
+        with self._lock:
+            added = False
+            for position in positions:
+                mask = 1 << (position & 7)
+                if not self._bits[position >> 3] & mask:
+                    self._bits[position >> 3] |= mask
+                    added = True
+            if added:
+                self.count += 1
+
+    # 값마다 lock을 잡으므로 스레드에서 실행하는 동안에도 이벤트 루프의 add()가 오래 기다리지 않음
+    def add_many(self, values: Iterable[str]):
+        for value in values:
+            self.add(value)
+
+    def might_contain(self, value: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+# 가입된 이메일 조회용 인덱스 (/check_user_email)
+# - Bloom filter에 없으면 DB 조회 없이 "없음"으로 응답
+# - DB에서 존재가 확인된 이메일은 EMAIL_EXISTS_CACHE_TTL 동안 캐시
+# - 다른 워커/일괄 가져오기로 가입하거나 이메일을 바꾼 사용자는 refresh()가 users.updated_at 증가분을 읽어 반영
+#   늦게 커밋된 트랜잭션도 놓치지 않도록 마지막으로 본 updated_at보다 refresh_overlap초 앞부터 다시 읽고,
+#   그래도 놓친 행은 rebuild_interval마다 전체를 다시 읽어 반영한다.
+#   (반영 전까지는 "없음"으로 잘못 응답할 수 있으나 회원가입 시에는 DB에서 다시 확인한다)
+# - 마지막 반영 후 max_staleness초가 지나면(DB 오류 등) filter를 쓰지 않고 DB 조회
+class UserEmailIndex:
+    BATCH_SIZE = 10000
+
+    def __init__(self, capacity: int, error_rate: float, cache_size: int, cache_ttl: float,
+                 refresh_overlap: float, rebuild_interval: float, max_staleness: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_overlap = timedelta(seconds=refresh_overlap)
+        self.rebuild_interval = rebuild_interval
+        self.max_staleness = max_staleness
+        self._filter = None  # 준비되기 전에는 항상 DB 조회
+        self._watermark = None  # 반영한 행의 최대 updated_at
+        self._built_at = 0.0  # 마지막 전체 생성 시각 (monotonic)
+        self._refreshed_at = 0.0  # 마지막 반영 성공 시각 (monotonic)
+        self._known = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        # 통계
+        self.filter_negatives = 0
+        self.cache_hits = 0
+        self.db_lookups = 0
+        self.false_positives = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() - self._refreshed_at > self.max_staleness
+
+    # 확실히 없는 이메일이면 True
+    def definitely_absent(self, email: str) -> bool:
+        if self._filter is None or self.stale or self._filter.might_contain(email):
+            return False
+        self.filter_negatives += 1
+        return True
+
+    def cached_exists(self, email: str) -> bool:
+        if self._known.get(email):
+            self.cache_hits += 1
+            return True
+        return False
+
+    # DB 조회 결과 반영
+    def record_lookup(self, email: str, exists: bool):
+        self.db_lookups += 1
+        if exists:
+            self._known.set(email, True)
+        elif self._filter is not None:
+            self.false_positives += 1
+
+    def add(self, email: str):
+        if self._filter is not None:
+            self._filter.add(email)
+
+    def discard(self, email: str):
+        self._known.pop(email)
+
+    # users 테이블 전체를 읽어 새 filter를 만든 뒤 교체
+    # 읽는 동안 이 워커에서 add()된 이메일은 교체 후 다음 refresh()가 updated_at 구간을 다시 읽어 반영
+    async def warm(self, session_factory):
+        async with session_factory() as db:
+            total = await db.scalar(select(func.count()).select_from(User))
+        bloom = BloomFilter(max(self.capacity, total * 2), self.error_rate)
+        watermark = None
+        after_user_id = 0
+        while True:
+            async with session_factory() as db:
+                rows = (await db.execute(
+                    select(User.user_id, User.user_email, User.updated_at)
+                    .where(User.user_id > after_user_id)
+                    .order_by(User.user_id)
+                    .limit(self.BATCH_SIZE)
+                )).all()
+            if not rows:
+                break
+            watermark = self._max_updated_at(rows, watermark)
+            # 해시 계산은 CPU 작업이므로 스레드에서 실행
+            await asyncio.to_thread(bloom.add_many, [row.user_email for row in rows])
+            after_user_id = rows[-1].user_id
+        self._filter, self._watermark = bloom, watermark
+        self._built_at = self._refreshed_at = time.monotonic()
+        logger.info("User email filter warmed with %d emails (%d bits)", bloom.count, bloom.size)
+
+    # updated_at이 (마지막으로 본 값 - refresh_overlap) 이후인 사용자 추가
+    # filter가 가득 찼거나 rebuild_interval이 지났으면 전체를 다시 생성
+    async def refresh(self, session_factory):
+        if (
+            self._filter is None
+            or self._filter.count > self._filter.capacity
+            or time.monotonic() - self._built_at > self.rebuild_interval
+        ):
+            await self.warm(session_factory)
+            return
+        watermark = self._watermark
+        # (updated_at, user_id) 순서로 나눠 읽기
+        cursor = None if watermark is None else (watermark - self.refresh_overlap, 0)
+        while True:
+            query = select(User.user_id, User.user_email, User.updated_at).where(User.updated_at.is_not(None))
+            if cursor is not None:
+                query = query.where(tuple_(User.updated_at, User.user_id) > cursor)
+            async with session_factory() as db:
+                rows = (await db.execute(
+                    query.order_by(User.updated_at, User.user_id).limit(self.BATCH_SIZE)
+                )).all()
+            if not rows:
+                break
+            watermark = self._max_updated_at(rows, watermark)
+            await asyncio.to_thread(self._filter.add_many, [row.user_email for row in rows])
+            cursor = (rows[-1].updated_at, rows[-1].user_id)
+        self._watermark = watermark
+        self._refreshed_at = time.monotonic()
+
+    @staticmethod
+    def _max_updated_at(rows, watermark):
+        for row in rows:
+            if row.updated_at is not None and (watermark is None or row.updated_at > watermark):
+                watermark = row.updated_at
+        return watermark
+
+    async def run_refresh_loop(self, session_factory, interval: float):
+        while True:
+            try:
+                await self.refresh(session_factory)
+            except Exception:
+                logger.exception("User email filter refresh failed")
+            await asyncio.sleep(interval)
+
+    def metrics(self) -> dict:
+        return {
+            "ready": self.ready,
+            "emails": self._filter.count if self._filter else 0,
+            "capacity": self._filter.capacity if self._filter else 0,
+            "bits": self._filter.size if self._filter else 0,
+            "hash_count": self._filter.hash_count if self._filter else 0,
+            "stale": self.stale,
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+            "filter_negatives": self.filter_negatives,
+            "cache_hits": self.cache_hits,
+            "db_lookups": self.db_lookups,
+            "false_positives": self.false_positives,
+        }
+
+
+user_email_index = UserEmailIndex(
+    capacity=get_settings().EMAIL_FILTER_CAPACITY,
+    error_rate=get_settings().EMAIL_FILTER_ERROR_RATE,
+    cache_size=get_settings().EMAIL_EXISTS_CACHE_SIZE,
+    cache_ttl=get_settings().EMAIL_EXISTS_CACHE_TTL,
+    refresh_overlap=get_settings().EMAIL_FILTER_REFRESH_OVERLAP,
+    rebuild_interval=get_settings().EMAIL_FILTER_REBUILD_INTERVAL,
+    max_staleness=get_settings().EMAIL_FILTER_MAX_STALENESS,
+)
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+
+import aiosmtplib
+
+from config.config import get_settings
+from app.email_utils import build_verification_message, is_permanent_smtp_error, smtp_pool
+
+logger = logging.getLogger(__name__)
+
+# 프로세스 내부 메일 발송 큐
+# - 크기가 제한된 asyncio 큐 + N개의 작업자 코루틴
+# - 작업자는 큐에 쌓인 메일을 최대 EMAIL_BATCH_SIZE개씩 모아 하나의 SMTP 연결(세션)로 발송
+# - 실패한 메일은 지수 백오프로 재시도하고, 최대 재시도 횟수를 넘기면 dead letter 목록에 보관
+#   (5xx 응답처럼 다시 보내도 실패할 메일은 재시도하지 않고 바로 dead letter)
+# 로컬 테스트: `python -m aiosmtpd -n -l 127.0.0.1:1025` 실행 후 MAIL_SERVER=127.0.0.1 MAIL_PORT=1025
+#            MAIL_SSL_TLS=false USE_CREDENTIALS=false 로 서버 실행
+
+
+class EmailJob:
+    __slots__ = ("recipient_email", "verification_code", "attempts", "enqueued_at", "last_error")
+
+    def __init__(self, recipient_email: str, verification_code: str):
+        self.recipient_email = recipient_email
+        self.verification_code = verification_code
+        self.attempts = 0
+        self.enqueued_at = time.monotonic()
+        self.last_error = None
+
+
+class EmailDispatcher:
+    def __init__(self, pool, workers: int, queue_size: int, batch_size: int, max_retries: int,
+                 retry_base_delay: float, dead_letter_size: int):
+        self._pool = pool
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks = []
+        self._retry_handles = {}  # 재시도 대기 중인 EmailJob -> TimerHandle
+        self.dead_letters = deque(maxlen=dead_letter_size)
+        # 통계
+        self.enqueued = 0
+        self.rejected = 0  # 큐가 가득 차서 거절된 수
+        self.sent = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.batches = 0
+        self.send_seconds_total = 0.0
+        self.send_seconds_max = 0.0
+        self.queue_wait_seconds_total = 0.0
+
+    # 발송 요청 추가, 큐가 가득 차면 asyncio.QueueFull 발생 (호출 측에서 503 응답)
+    def enqueue(self, recipient_email: str, verification_code: str):
+        try:
+            self._queue.put_nowait(EmailJob(recipient_email, verification_code))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        self.enqueued += 1
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    # 종료: 큐에 남은 메일을 최대 timeout 동안 발송한 뒤 작업자 종료
+    async def stop(self, timeout: float = 10.0):
+        # 재시도 대기 중인 메일은 종료 시 dead letter로 보관
+        for job, handle in list(self._retry_handles.items()):
+            handle.cancel()
+            job.last_error = "shutdown before retry"
+            self.dead_letters.append(job)
+        self._retry_handles.clear()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Email queue not drained on shutdown, %d messages left", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._send_batch(batch)
+            except Exception:
+                logger.exception("Unexpected error in email worker")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    # 한 SMTP 세션으로 여러 메일 발송
+    async def _send_batch(self, batch):
+        self.batches += 1
+        now = time.monotonic()
+        for job in batch:
+            self.queue_wait_seconds_total += now - job.enqueued_at
+        sent_count = 0
+        try:
+            async with self._pool.connection() as client:
+                for job in batch:
+                    start = time.perf_counter()
+                    try:
+                        await client.send_message(
+                            build_verification_message(job.recipient_email, job.verification_code)
+                        )
+                    except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused) as e:
+                        # 해당 메일만 실패 (연결은 계속 사용), 5xx 거부는 재시도하지 않음
+                        self._retry_or_dead_letter(job, e, permanent=is_permanent_smtp_error(e))
+                    else:
+                        elapsed = time.perf_counter() - start
+                        self.sent += 1
+                        self.send_seconds_total += elapsed
+                        self.send_seconds_max = max(self.send_seconds_max, elapsed)
+                    sent_count += 1
+        except Exception as e:
+            # 연결 실패/끊김: 아직 처리하지 못한 메일 전체를 재시도
+            for job in batch[sent_count:]:
+                self._retry_or_dead_letter(job, e)
+
+    def _retry_or_dead_letter(self, job: EmailJob, error: Exception, permanent: bool = False):
+        job.attempts += 1
+        job.last_error = repr(error)
+        if permanent or job.attempts > self.max_retries:
+            self.dead_lettered += 1
+            self.dead_letters.append(job)
+            logger.error("Email to %s moved to dead letters: %s", job.recipient_email, job.last_error)
+            return
+        self.retried += 1
+        delay = self.retry_base_delay * (2 ** (job.attempts - 1)) * random.uniform(0.8, 1.2)
+        self._retry_handles[job] = asyncio.get_running_loop().call_later(delay, self._requeue, job)
+
+    def _requeue(self, job: EmailJob):
+        self._retry_handles.pop(job, None)
+        try:
+            job.enqueued_at = time.monotonic()
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.dead_lettered += 1
+            job.last_error = "queue full on retry"
+            self.dead_letters.append(job)
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "workers": len(self._tasks),
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "sent": self.sent,
+            "retried": self.retried,
+            "pending_retries": len(self._retry_handles),
+            "dead_lettered": self.dead_lettered,
+            "dead_letters": len(self.dead_letters),
+            "batches": self.batches,
+            "send_seconds_avg": round(self.send_seconds_total / self.sent, 6) if self.sent else 0.0,
+            "send_seconds_max": round(self.send_seconds_max, 6),
+            "queue_wait_seconds_total": round(self.queue_wait_seconds_total, 6),
+        }
+
+
+email_dispatcher = EmailDispatcher(
+    smtp_pool,
+    workers=get_settings().EMAIL_WORKERS,
+    queue_size=get_settings().EMAIL_QUEUE_SIZE,
+    batch_size=get_settings().EMAIL_BATCH_SIZE,
+    max_retries=get_settings().EMAIL_MAX_RETRIES,
+    retry_base_delay=get_settings().EMAIL_RETRY_BASE_DELAY,
+    dead_letter_size=get_settings().EMAIL_DEAD_LETTER_SIZE,
+)
@@ -1,38 +1,127 @@
+import asyncio
 import os
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+import time
+from contextlib import asynccontextmanager
+from email.message import EmailMessage
+from functools import lru_cache
+from typing import List, Tuple
+
+import aiosmtplib
 from jinja2 import Environment, FileSystemLoader
 
-def get_env_variable(name: str, default=None):
-    return os.getenv(name, default)
+from config.config import get_settings
 
-# 이메일 발송 함수
-async def send_email(recipient_email: str, verification_code: str):
-    conf = ConnectionConfig(
-        MAIL_USERNAME=get_env_variable("MAIL_USERNAME"),
-        MAIL_PASSWORD=get_env_variable("MAIL_PASSWORD"),
-        MAIL_FROM=get_env_variable("MAIL_FROM"),
-        MAIL_PORT=int(get_env_variable("MAIL_PORT", 465)),
-        MAIL_SERVER=get_env_variable("MAIL_SERVER"),
-        MAIL_SSL_TLS=bool(get_env_variable("MAIL_SSL_TLS", True)),
-        MAIL_STARTTLS=bool(get_env_variable("MAIL_STARTTLS", False)),
-        USE_CREDENTIALS=bool(get_env_variable("USE_CREDENTIALS", True)),
-        VALIDATE_CERTS=bool(get_env_variable("VALIDATE_CERTS", True)),
-    )
-
-    # Jinja2 환경 설정
-    env = Environment(loader=FileSystemLoader('./templates'))  # 템플릿 폴더 경로 설정
-    template = env.get_template('verification_email.html')  # 템플릿 파일 로드
+# 템플릿 폴더 경로 (실행 위치와 무관하게 프로젝트 루트의 templates 사용)
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
 
+# Jinja2 환경은 프로세스당 한 번만 생성하고, 컴파일된 템플릿을 재사용
+@lru_cache(maxsize=None)
+def get_template_env() -> Environment:
+    return Environment(loader=FileSystemLoader(TEMPLATE_DIR), auto_reload=False)
+
+@lru_cache(maxsize=None)
+def get_verification_template():
+    return get_template_env().get_template('verification_email.html')
+
+# 인증 메일 메시지 생성
+def build_verification_message(recipient_email: str, verification_code: str) -> EmailMessage:
     # 템플릿 렌더링
-    html_content = template.render(verification_code=verification_code)
-
-    # 이메일 발송
-    message = MessageSchema(
-        subject="이메일 인증해주세요.",
-        recipients=[recipient_email],
-        body=html_content,  # 렌더링된 HTML 본문 사용
-        subtype="html"  # HTML 형식으로 전송
-    )
-
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    html_content = get_verification_template().render(verification_code=verification_code)
+
+    message = EmailMessage()
+    message["Subject"] = "이메일 인증해주세요."
+    message["From"] = get_settings().MAIL_FROM
+    message["To"] = recipient_email
+    message.set_content(html_content, subtype="html")  # HTML 형식으로 전송
+    return message
+
+
+# 다시 보내도 성공할 수 없는 오류인지 (5xx 응답, 예: 550 없는 메일함), 4xx와 연결 오류는 재시도 대상
+def is_permanent_smtp_error(error: Exception) -> bool:
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return bool(error.recipients) and all(refused.code >= 500 for refused in error.recipients)
+    return isinstance(error, aiosmtplib.SMTPResponseException) and error.code >= 500
+
+
+# 인증까지 마친 SMTP 연결을 재사용하는 풀
+# 메일마다 TCP/TLS 연결과 로그인을 새로 하지 않고, 오래 쉬었던 연결은 NOOP으로 상태를 확인한 뒤 사용한다.
+class SMTPConnectionPool:
+    def __init__(self, size: int, max_idle: float):
+        self.size = size
+        self.max_idle = max_idle
+        self._idle: List[Tuple[aiosmtplib.SMTP, float]] = []  # (연결, 마지막 사용 시각)
+        self._semaphore = asyncio.Semaphore(size)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        settings = get_settings()
+        client = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            use_tls=settings.MAIL_SSL_TLS,
+            start_tls=settings.MAIL_STARTTLS and not settings.MAIL_SSL_TLS,
+            validate_certs=settings.VALIDATE_CERTS,
+            timeout=settings.MAIL_TIMEOUT,
+        )
+        await client.connect()
+        if settings.USE_CREDENTIALS:
+            await client.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+        return client
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            client, last_used = self._idle.pop()  # 가장 최근에 쓴 연결부터 사용
+            if not client.is_connected:
+                continue
+            if time.monotonic() - last_used > self.max_idle:
+                try:
+                    await client.noop()
+                except (aiosmtplib.SMTPException, OSError):
+                    await self._discard(client)
+                    continue
+            return client
+        return await self._connect()
+
+    async def _discard(self, client: aiosmtplib.SMTP):
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def connection(self):
+        async with self._semaphore:
+            client = await self._acquire()
+            try:
+                yield client
+            except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+                # 수신 거부 등 서버 응답 오류는 연결 자체에는 문제가 없으므로 반환
+                self._release(client)
+                raise
+            except BaseException:
+                await self._discard(client)
+                raise
+            else:
+                self._release(client)
+
+    def _release(self, client: aiosmtplib.SMTP):
+        if client.is_connected:
+            self._idle.append((client, time.monotonic()))
+
+    # 서버 종료 시 유휴 연결 정리
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            try:
+                await client.quit()
+            except (aiosmtplib.SMTPException, OSError):
+                await self._discard(client)
+
+
+smtp_pool = SMTPConnectionPool(size=get_settings().MAIL_POOL_SIZE, max_idle=get_settings().MAIL_POOL_MAX_IDLE)
+
+
+# 이메일 발송 함수
+async def send_email(recipient_email: str, verification_code: str):
+    message = build_verification_message(recipient_email, verification_code)
+    async with smtp_pool.connection() as client:
+        await client.send_message(message)
@@ -0,0 +1,227 @@
+import argparse
+import asyncio
+import logging
+import random
+import signal
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import aiosmtplib
+from sqlalchemy import delete, func, select, update
+
+from config.config import get_settings
+from .database import dispose_engines, init_engines
+from .dependencies import session_scope
+from .email_utils import build_verification_message, get_verification_template, is_permanent_smtp_error, smtp_pool
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# 메일 작업자 프로세스 (EMAIL_DELIVERY_MODE=outbox)
+# 사용법: python -m app.mail_worker [--once]
+# API 워커는 인증 코드와 같은 트랜잭션으로 email_outbox에 행을 넣기만 하고(crud.create_verification_code),
+# 이 프로세스가 SMTP 발송을 맡는다. 느린 SMTP 서버가 API 워커의 이벤트 루프/DB 커넥션을 붙잡지 않는다.
+# - EMAIL_WORKERS개의 코루틴이 각각 최대 EMAIL_BATCH_SIZE행을 FOR UPDATE SKIP LOCKED로 가져가
+#   하나의 SMTP 연결(smtp_pool)로 발송 (여러 프로세스를 띄워도 같은 행을 동시에 발송하지 않음)
+# - 가져간 행은 next_attempt_at을 EMAIL_OUTBOX_LEASE초 뒤로 미루고 커밋한 뒤 발송하므로 SMTP 대기 중에
+#   트랜잭션을 열어 두지 않는다. 작업자가 비정상 종료되면 임대가 끝난 뒤 다시 발송된다. (최소 한 번 발송)
+# - 성공한 행은 삭제, 실패한 행은 지수 백오프로 next_attempt_at을 미루고, EMAIL_MAX_RETRIES를 넘기면 dead로 남김
+#   (5xx 응답처럼 다시 보내도 실패할 메일은 바로 dead)
+# 로컬 테스트: `python -m aiosmtpd -n -l 127.0.0.1:1025` 실행 후 MAIL_SERVER=127.0.0.1 MAIL_PORT=1025
+#            MAIL_SSL_TLS=false USE_CREDENTIALS=false EMAIL_DELIVERY_MODE=outbox 로 서버와 이 작업자 실행
+
+
+class OutboxStats:
+    def __init__(self):
+        self.claimed = 0
+        self.sent = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.batches = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class OutboxMailWorker:
+    def __init__(self, pool, workers: int, batch_size: int, max_retries: int, retry_base_delay: float,
+                 poll_interval: float, lease: float):
+        self._pool = pool
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._stopping = asyncio.Event()
+        self.stats = OutboxStats()
+
+    # 발송할 행을 가져가고 임대 (다른 작업자가 잠근 행은 건너뜀)
+    async def claim(self, db) -> list:
+        now = datetime.now(timezone.utc)
+        claimable = (
+            select(EmailOutbox.id)
+            .where(EmailOutbox.dead.is_(False), EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(claimable.scalar_subquery()))
+            .values(next_attempt_at=now + timedelta(seconds=self.lease), attempts=EmailOutbox.attempts + 1)
+            .returning(EmailOutbox.id, EmailOutbox.recipient_email, EmailOutbox.verification_code, EmailOutbox.attempts)
+            .execution_options(synchronize_session=False)
+        )
+        rows = (await db.execute(stmt)).all()
+        await db.commit()
+        self.stats.claimed += len(rows)
+        return rows
+
+    # 한 SMTP 세션으로 발송, (성공한 id 목록, 실패한 (행, 오류, 영구 실패 여부) 목록) 반환
+    async def send(self, rows) -> tuple:
+        sent, failed = [], []
+        done = 0
+        try:
+            async with self._pool.connection() as client:
+                for row in rows:
+                    try:
+                        await client.send_message(build_verification_message(row.recipient_email, row.verification_code))
+                    except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused) as e:
+                        # 해당 메일만 실패 (연결은 계속 사용)
+                        failed.append((row, e, is_permanent_smtp_error(e)))
+                    else:
+                        sent.append(row.id)
+                    done += 1
+        except Exception as e:
+            # 연결 실패/끊김: 아직 처리하지 못한 메일 전체를 재시도
+            failed.extend((row, e, False) for row in rows[done:])
+        return sent, failed
+
+    # 발송 결과 기록
+    async def complete(self, db, sent: list, failed: list):
+        if sent:
+            await db.execute(delete(EmailOutbox).where(EmailOutbox.id.in_(sent)))
+        if failed:
+            now = datetime.now(timezone.utc)
+            updates = []
+            for row, error, permanent in failed:
+                dead = permanent or row.attempts > self.max_retries
+                delay = self.retry_base_delay * (2 ** (row.attempts - 1)) * random.uniform(0.8, 1.2)
+                updates.append({
+                    "id": row.id,
+                    "next_attempt_at": now + timedelta(seconds=delay),
+                    "last_error": repr(error),
+                    "dead": dead,
+                })
+                if dead:
+                    self.stats.dead_lettered += 1
+                    logger.error("Email to %s moved to dead letters: %r", row.recipient_email, error)
+                else:
+                    self.stats.retried += 1
+            await db.execute(update(EmailOutbox), updates)
+        await db.commit()
+        self.stats.sent += len(sent)
+
+    # 한 묶음 처리, 처리한 행 수 반환
+    async def run_once(self) -> int:
+        async with session_scope() as db:
+            rows = await self.claim(db)
+        if not rows:
+            return 0
+        self.stats.batches += 1
+        sent, failed = await self.send(rows)
+        async with session_scope() as db:
+            await self.complete(db, sent, failed)
+        return len(rows)
+
+    async def _worker(self):
+        while not self._stopping.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception:
+                self.stats.errors += 1
+                logger.exception("Outbox mail worker failed")
+                processed = 0
+            # 묶음이 가득 찼으면 바로 다음 묶음, 아니면 poll_interval 동안 대기 (종료 신호 시 즉시 깨어남)
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    # 종료 신호를 받으면 진행 중인 묶음까지 처리하고 끝남
+    async def run(self):
+        await asyncio.gather(*(self._worker() for _ in range(self.workers)))
+
+    def stop(self):
+        self._stopping.set()
+
+
+# 발송 대기/실패 메일 수 (API의 /internal/metrics/email_outbox)
+async def outbox_backlog(db) -> dict:
+    now = datetime.now(timezone.utc)
+    row = (await db.execute(select(
+        func.count().filter(EmailOutbox.dead.is_(False)).label("pending"),
+        func.count().filter(EmailOutbox.dead.is_(False), EmailOutbox.next_attempt_at <= now).label("due"),
+        func.count().filter(EmailOutbox.dead.is_(True)).label("dead"),
+        func.min(EmailOutbox.created_at).filter(EmailOutbox.dead.is_(False)).label("oldest_created_at"),
+    ))).one()
+    oldest = row.oldest_created_at
+    return {
+        "pending": row.pending,
+        "due": row.due,
+        "dead": row.dead,
+        "oldest_pending_seconds": (
+            round((now.replace(tzinfo=None) - oldest).total_seconds(), 3) if oldest is not None else 0.0
+        ),
+    }
+
+
+async def _run(args) -> int:
+    settings = get_settings()
+    worker = OutboxMailWorker(
+        smtp_pool,
+        workers=args.workers,
+        batch_size=settings.EMAIL_BATCH_SIZE,
+        max_retries=settings.EMAIL_MAX_RETRIES,
+        retry_base_delay=settings.EMAIL_RETRY_BASE_DELAY,
+        poll_interval=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+        lease=settings.EMAIL_OUTBOX_LEASE,
+    )
+    await init_engines(warmup=min(args.workers, settings.DB_POOL_WARMUP))
+    get_verification_template()
+    try:
+        if args.once:
+            while await worker.run_once() >= worker.batch_size:
+                pass
+        else:
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, worker.stop)
+            logger.info("Outbox mail worker started with %d workers", args.workers)
+            started = time.monotonic()
+            await worker.run()
+            logger.info("Outbox mail worker stopped after %.0fs", time.monotonic() - started)
+    finally:
+        await smtp_pool.close()
+        await dispose_engines()
+    logger.info("Outbox mail worker stats: %s", worker.stats.as_dict())
+    return 0
+
+
+def main(argv=None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="python -m app.mail_worker")
+    parser.add_argument("-w", "--workers", type=int, default=settings.EMAIL_WORKERS, help="동시에 발송할 묶음 수")
+    parser.add_argument("--once", action="store_true", help="지금 발송할 메일을 모두 처리하고 종료")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
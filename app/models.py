@@ -1,9 +1,25 @@
 # app/models.py
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Boolean, func
+from datetime import datetime, timezone
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, DateTime, Float, Boolean, Index, text
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 from .database import Base  # Base를 database.py에서 가져옵니다.
 
+# timestamp(without time zone) 컬럼에는 UTC 기준 naive datetime으로 저장
+# asyncpg는 offset-aware datetime을 timestamp 컬럼에 바인딩하지 못하므로 여기서 변환한다.
+class UTCDateTime(TypeDecorator):
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+# 관계(relationship)는 모두 lazy="raise": 속성 접근으로 암묵적인 SELECT가 실행되지 않도록 하고,
+# 관계 데이터가 필요한 쿼리에서는 selectinload()/joinedload()를 명시한다.
+# 예: crud.get_user_by_id(db, user_id, selectinload(User.devices))
+
 # 사용자 관리 테이블
 class User(Base):
     __tablename__ = "users"
@@ -13,25 +29,30 @@ class User(Base):
     user_email = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=False)
     phone_number = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(UTCDateTime, default=datetime.utcnow)
+    updated_at = Column(UTCDateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # 유저가 추천한 사용자 목록
-    referrals = relationship("Referral", back_populates="referrer", foreign_keys="[Referral.referrer_id]")
+    referrals = relationship("Referral", back_populates="referrer", foreign_keys="[Referral.referrer_id]", lazy="raise")
     # 유저가 추천받은 사용자 목록
-    referred_by = relationship("Referral", back_populates="referred_user", foreign_keys="[Referral.referred_id]")
+    referred_by = relationship("Referral", back_populates="referred_user", foreign_keys="[Referral.referred_id]", lazy="raise")
 
     # 토큰
-    tokens = relationship("Token", back_populates="user")
+    tokens = relationship("Token", back_populates="user", lazy="raise")
     # 토큰 생성 빈도 관리
-    rate_limits = relationship("TokenRateLimit", back_populates="user")
+    rate_limits = relationship("TokenRateLimit", back_populates="user", lazy="raise")
 
      # 기기
-    devices = relationship("UserDevice", back_populates="user")
+    devices = relationship("UserDevice", back_populates="user", lazy="raise")
     # 유저의 구독 내역
-    subscriptions = relationship("Subscription", back_populates="user")
+    subscriptions = relationship("Subscription", back_populates="user", lazy="raise")
     # 유저의 결제 내역
-    payments = relationship("Payment", back_populates="user")
+    payments = relationship("Payment", back_populates="user", lazy="raise")
+
+    # 가입 이메일 filter 증분 반영 (app/email_filter.py)
+    __table_args__ = (
+        Index("ix_users_updated_at", "updated_at", "user_id"),
+    )
 
 # login token
 class Token(Base):
@@ -39,28 +60,35 @@ class Token(Base):
     token_id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     token = Column(String, nullable=False)
-    issued_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime, nullable=False)
+    issued_at = Column(UTCDateTime, default=datetime.utcnow)
+    expires_at = Column(UTCDateTime, nullable=False)
 
-    user = relationship("User", back_populates="tokens")
+    user = relationship("User", back_populates="tokens", lazy="raise")
+
+    # 사용자별 활성 토큰 조회(user_id = ? AND expires_at > now)
+    # 일별 파티션으로 전환한 경우(python -m app.cli partition-tokens) DB의 PK는 (token_id, expires_at)
+    __table_args__ = (
+        Index("ix_tokens_user_id_expires_at", "user_id", "expires_at"),
+        Index("ix_tokens_expires_at", "expires_at"),  # 만료 토큰 정리
+    )
 
 # login token 생성 빈도 관리
 class TokenRateLimit(Base):
     __tablename__ = "token_rate_limits"
     user_id = Column(Integer, ForeignKey("users.user_id"), primary_key=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(UTCDateTime, default=datetime.utcnow)
     attempts = Column(Integer, default=0)
-    last_attempt = Column(DateTime, default=datetime.utcnow)
+    last_attempt = Column(UTCDateTime, default=datetime.utcnow)
 
-    user = relationship("User", back_populates="rate_limits")
+    user = relationship("User", back_populates="rate_limits", lazy="raise")
 
 # 이메일 인증 토큰 테이블
 # class EmailVerificationToken(Base):
 #     __tablename__ = "email_verification_tokens"
 #     token_id = Column(Integer, primary_key=True, autoincrement=True)
 #     token = Column(String, nullable=False)
-#     issued_at = Column(DateTime, default=datetime.utcnow)
-#     expires_at = Column(DateTime, nullable=False)
+#     issued_at = Column(UTCDateTime, default=datetime.utcnow)
+#     expires_at = Column(UTCDateTime, nullable=False)
 
 # 이메일 인증 코드 테이블
 class EmailVerificationCode(Base):
@@ -68,10 +96,16 @@ class EmailVerificationCode(Base):
     id = Column(Integer, primary_key=True, index=True)
     code = Column(String(10), nullable=False)  # Keep the code length manageable
     user_email = Column(String, nullable=False, unique=True)  # 사용자 이메일, 고유 제약 조건 추가
-    created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(UTCDateTime, default=datetime.utcnow)
+    expires_at = Column(UTCDateTime, nullable=False)
     email_verified = Column(Boolean, default=False)  # 이메일 인증 여부
 
+    # (이메일, 코드) 확인 (이메일은 소문자로 정규화하여 저장하므로 lower() 인덱스는 두지 않음)
+    __table_args__ = (
+        Index("ix_email_verification_codes_user_email_code", "user_email", "code"),
+        Index("ix_email_verification_codes_expires_at", "expires_at"),  # 만료 코드 정리
+    )
+
 
 # 사용자 기기 관리
 class UserDevice(Base):
@@ -82,9 +116,14 @@ class UserDevice(Base):
     # device_type = Column(String)
     # device_name = Column(String)
     ip_address = Column(String)
-    last_used = Column(DateTime, default=datetime.utcnow)
+    last_used = Column(UTCDateTime, default=datetime.utcnow)
+
+    user = relationship("User", back_populates="devices", lazy="raise")
 
-    user = relationship("User", back_populates="devices")
+    __table_args__ = (
+        # 사용자당 기기 1개 (ON CONFLICT (user_id) 대상)
+        Index("uq_user_devices_user_id", "user_id", unique=True),
+    )
 
 # 구독
 class Subscription(Base):
@@ -93,13 +132,13 @@ class Subscription(Base):
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     plan_name = Column(String, nullable=False)  # 예: Basic, Premium 등
     status = Column(String, nullable=False)  # 예: active, canceled 등
-    start_date = Column(DateTime, nullable=False)
-    end_date = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    start_date = Column(UTCDateTime, nullable=False)
+    end_date = Column(UTCDateTime)
+    created_at = Column(UTCDateTime, default=datetime.utcnow)
+    updated_at = Column(UTCDateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # 관계 설정
-    user = relationship("User", back_populates="subscriptions")
+    user = relationship("User", back_populates="subscriptions", lazy="raise")
 
 # 결제
 class Payment(Base):
@@ -108,10 +147,10 @@ class Payment(Base):
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     amount = Column(Float, nullable=False)
     payment_method = Column(String, nullable=False)  # 예: credit card, paypal 등
-    payment_date = Column(DateTime, default=datetime.utcnow)
+    payment_date = Column(UTCDateTime, default=datetime.utcnow)
 
     # 관계 설정
-    user = relationship("User", back_populates="payments")
+    user = relationship("User", back_populates="payments", lazy="raise")
 
 # 추천인 관리
 class Referral(Base):
@@ -120,6 +159,30 @@ class Referral(Base):
     id = Column(Integer, primary_key=True, index=True)
     referrer_id = Column(Integer, ForeignKey('users.user_id'))
     referred_id = Column(Integer, ForeignKey('users.user_id'))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    referrer = relationship("User", back_populates="referrals", foreign_keys=[referrer_id])
-    referred_user = relationship("User", back_populates="referred_by", foreign_keys=[referred_id])
\ No newline at end of file
+    created_at = Column(UTCDateTime, default=datetime.utcnow)
+    referrer = relationship("User", back_populates="referrals", foreign_keys=[referrer_id], lazy="raise")
+    referred_user = relationship("User", back_populates="referred_by", foreign_keys=[referred_id], lazy="raise")
+
+    # 추천인-피추천인 쌍 조회
+    __table_args__ = (
+        Index("ix_referrals_referrer_id_referred_id", "referrer_id", "referred_id"),
+    )
+
+# 메일 발송 대기열 (EMAIL_DELIVERY_MODE=outbox, app/mail_worker.py가 발송)
+# 인증 코드와 같은 트랜잭션으로 추가되며, 발송에 성공한 행은 삭제하고 최대 재시도를 넘긴 행은 dead로 남긴다.
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    recipient_email = Column(String, nullable=False)
+    verification_code = Column(String(10), nullable=False)
+    created_at = Column(UTCDateTime, nullable=False, default=datetime.utcnow)
+    next_attempt_at = Column(UTCDateTime, nullable=False, default=datetime.utcnow)  # 이 시각 이후에 발송 (재시도/처리 중 임대)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    dead = Column(Boolean, nullable=False, default=False)
+
+    # 발송할 메일 찾기 (dead 행 제외)
+    __table_args__ = (
+        Index("ix_email_outbox_next_attempt_at", "next_attempt_at", postgresql_where=text("NOT dead")),
+    )
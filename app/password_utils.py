@@ -1,5 +1,14 @@
+import asyncio
+import math
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
+from config.config import get_settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # 회원가입 비밀번호 해쉬화
@@ -9,3 +18,86 @@ def get_password_hash(password: str) -> str:
 # 사용자 로그인 시 비밀번호를 검증
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+# bcrypt 연산 전용 작업자 풀
+# bcrypt는 한 번에 수백 ms가 걸리므로 이벤트 루프에서 직접 호출하지 않고 이 풀에서 실행한다.
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_pending = 0  # 대기 중 + 실행 중인 작업 수 (이벤트 루프 스레드에서만 변경)
+
+def get_password_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                settings = get_settings()
+                if settings.PASSWORD_HASH_EXECUTOR == "process":
+                    _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+                else:
+                    _executor = ThreadPoolExecutor(
+                        max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+                    )
+    return _executor
+
+# 서버 종료 시 작업자 풀 정리
+def shutdown_password_executor():
+    global _executor, _bulk_executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+        if _bulk_executor is not None:
+            _bulk_executor.shutdown(wait=True)
+            _bulk_executor = None
+
+async def _run_in_password_pool(func, *args):
+    global _pending
+    # 대기열이 가득 차면 요청을 쌓아두지 않고 바로 503으로 거절
+    if _pending >= get_settings().PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, try again later.",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_password_executor(), func, *args)
+    finally:
+        _pending -= 1
+
+# 비동기 핸들러용 비밀번호 해쉬화
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_password_pool(get_password_hash, password)
+
+# 비동기 핸들러용 비밀번호 검증
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_password_pool(verify_password, plain_password, hashed_password)
+
+
+# 사용자 일괄 가져오기용 해시 풀 (프로세스 풀)
+# 로그인/회원가입 요청이 쓰는 풀과 분리하여 대량 작업 중에도 요청 처리가 밀리지 않도록 한다.
+_bulk_executor: Optional[Executor] = None
+
+def get_bulk_hash_executor() -> Executor:
+    global _bulk_executor
+    if _bulk_executor is None:
+        with _executor_lock:
+            if _bulk_executor is None:
+                _bulk_executor = ProcessPoolExecutor(max_workers=get_settings().BULK_HASH_WORKERS)
+    return _bulk_executor
+
+def _hash_many(passwords: List[str]) -> List[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+# 여러 비밀번호를 프로세스 풀에 나눠서 해시 (입력 순서대로 반환)
+async def hash_passwords_bulk(passwords: List[str]) -> List[str]:
+    if not passwords:
+        return []
+    loop = asyncio.get_running_loop()
+    executor = get_bulk_hash_executor()
+    size = math.ceil(len(passwords) / get_settings().BULK_HASH_WORKERS)
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    results = await asyncio.gather(*(loop.run_in_executor(executor, _hash_many, chunk) for chunk in chunks))
+    return [hashed for chunk in results for hashed in chunk]
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+# 커넥션 풀 checkout 통계
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_checkouts = 0  # pool_size를 넘어 overflow 커넥션이 사용된 checkout 수
+        self.timeouts = 0  # pool_timeout 초과로 실패한 checkout 수
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_checkout(self, waited: float, overflow: bool):
+        with self._lock:
+            self.checkouts += 1
+            if overflow:
+                self.overflow_checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+# QueuePool의 커넥션 획득(_do_get)을 감싸 대기 시간과 timeout을 기록
+class _MeteredPoolMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(time.perf_counter() - start, overflow=self.checkedout() > self.size())
+        return conn
+
+    # dispose()/invalidate 등으로 풀이 다시 만들어져도 누적 통계는 유지
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncAdaptedQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# 엔진의 현재 풀 상태와 누적 통계
+def pool_snapshot(engine) -> dict:
+    pool = engine.pool
+    snapshot = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        snapshot.update(stats.as_dict())
+    return snapshot
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, text
+
+from config.config import get_settings
+from .database import get_engine
+from .models import EmailVerificationCode, Token
+
+logger = logging.getLogger(__name__)
+
+# 만료 데이터 정리 (lifespan에서 주기적으로 실행)
+# - tokens: expires_at이 지난 토큰, email_verification_codes: 만료 후 VERIFICATION_CODE_RETENTION이 지난 코드
+# - 한 번의 DELETE는 최대 REAPER_BATCH_SIZE행, 배치마다 커밋하여 잠금을 짧게 유지
+# - 여러 워커가 동시에 실행해도 FOR UPDATE SKIP LOCKED로 서로 기다리지 않음
+# - tokens가 일별 파티션 테이블이면 파티션을 미리 만들고, 전부 만료된 파티션은 DETACH 후 DROP으로 한 번에 삭제
+#   (advisory lock을 얻은 워커 하나만 실행, REAPER_MAINTAIN_PARTITIONS=false면 CLI maintain-partitions로만 실행)
+# 동기 엔진으로 실행하므로 이벤트 루프에서는 asyncio.to_thread로 호출한다.
+
+PARTITION_NAME = re.compile(r"^tokens_p(\d{8})$")
+PARTITION_LOCK_ID = 0x746F6B656E73  # pg_try_advisory_lock 키 ("tokens")
+
+
+class ReaperStats:
+    def __init__(self):
+        self.runs = 0
+        self.tokens_deleted = 0
+        self.codes_deleted = 0
+        self.partitions_created = 0
+        self.partitions_dropped = 0
+        self.errors = 0
+        self.last_run_at = None
+        self.last_run_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+stats = ReaperStats()
+
+
+# cutoff 이전에 만료된 행을 batch_size씩 삭제, 삭제한 행 수 반환
+def _delete_expired(model, pk_column, cutoff: datetime, batch_size: int, max_batches: int) -> int:
+    total = 0
+    for _ in range(max_batches):
+        batch = (
+            select(pk_column)
+            .where(model.expires_at < cutoff)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        with get_engine().begin() as conn:
+            # expires_at 조건을 바깥에도 두어 파티션 테이블에서는 해당 파티션만 조회
+            deleted = conn.execute(
+                delete(model).where(pk_column.in_(batch), model.expires_at < cutoff)
+            ).rowcount
+        total += deleted
+        if deleted < batch_size:
+            break
+    return total
+
+
+def is_tokens_partitioned(conn) -> bool:
+    return conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('tokens'))"
+    )).scalar()
+
+
+def _partition_name(day) -> str:
+    return f"tokens_p{day:%Y%m%d}"
+
+
+# CREATE TABLE ... PARTITION OF는 tokens에 ACCESS EXCLUSIVE 잠금을 걸므로,
+# 따로 만든 테이블을 ATTACH PARTITION(SHARE UPDATE EXCLUSIVE, 로그인 INSERT/SELECT와 충돌하지 않음)으로 붙인다.
+def _create_partition(conn, day) -> bool:
+    name = _partition_name(day)
+    if conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar():
+        return False
+    conn.execute(text(f"CREATE TABLE {name} (LIKE tokens INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(
+        f"ALTER TABLE tokens ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{day:%Y-%m-%d}') TO ('{day + timedelta(days=1):%Y-%m-%d}')"
+    ))
+    return True
+
+
+# 오늘부터 premake_days일 뒤까지의 파티션을 만들고, 마지막 날이 지난(전부 만료된) 파티션은 떼어 낸 뒤 삭제
+# - 한 번에 한 워커만 실행 (세션 advisory lock), 다른 워커가 실행 중이면 건너뜀
+# - DETACH PARTITION ... CONCURRENTLY는 tokens에 ACCESS EXCLUSIVE를 걸지 않으므로 로그인이 멈추지 않는다.
+#   CONCURRENTLY는 트랜잭션 밖에서만 실행되므로 autocommit 연결을 사용하고, 중간에 실패하여
+#   detach 대기 상태로 남은 파티션은 다음 실행에서 FINALIZE로 마무리한다.
+# - 기본 파티션이 있으면 CONCURRENTLY를 쓸 수 없으므로, 비어 있는 기본 파티션은 먼저 떼어 내 삭제한다.
+#   (기본 파티션이 없으면 미리 만든 범위를 벗어난 토큰은 INSERT가 실패하므로 premake_days를 넉넉히 둘 것)
+# - DDL은 TOKEN_PARTITION_LOCK_TIMEOUT 이상 잠금을 기다리지 않음 (기다리는 동안 뒤따르는 로그인까지 막히지 않도록)
+def maintain_token_partitions(premake_days: int = None):
+    settings = get_settings()
+    if premake_days is None:
+        premake_days = settings.TOKEN_PARTITION_PREMAKE_DAYS
+    created = dropped = 0
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if not is_tokens_partitioned(conn):
+            return 0, 0
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": PARTITION_LOCK_ID}).scalar():
+            return 0, 0
+        try:
+            conn.execute(text(f"SET lock_timeout = '{int(settings.TOKEN_PARTITION_LOCK_TIMEOUT * 1000)}ms'"))
+            today = datetime.now(timezone.utc).date()
+            for offset in range(premake_days + 1):
+                created += _create_partition(conn, today + timedelta(days=offset))
+
+            partitions = conn.execute(text(
+                "SELECT c.relname, i.inhdetachpending FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'tokens'::regclass"
+            )).all()
+            default = conn.execute(text(
+                "SELECT NULLIF(partdefid, 0)::regclass::text FROM pg_partitioned_table WHERE partrelid = 'tokens'::regclass"
+            )).scalar()
+            if default and not conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {default})")).scalar():
+                conn.execute(text(f"ALTER TABLE tokens DETACH PARTITION {default}"))
+                conn.execute(text(f"DROP TABLE {default}"))
+                logger.info("Dropped empty default partition %s", default)
+                default = None
+            concurrently = "" if default else " CONCURRENTLY"
+            for name, detach_pending in partitions:
+                match = PARTITION_NAME.match(name)
+                if not match or datetime.strptime(match.group(1), "%Y%m%d").date() >= today:
+                    continue
+                if detach_pending:
+                    conn.execute(text(f"ALTER TABLE tokens DETACH PARTITION {name} FINALIZE"))
+                else:
+                    conn.execute(text(f"ALTER TABLE tokens DETACH PARTITION {name}{concurrently}"))
+                conn.execute(text(f"DROP TABLE {name}"))
+                dropped += 1
+        finally:
+            conn.execute(text("RESET lock_timeout"))
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": PARTITION_LOCK_ID})
+    return created, dropped
+
+
+# 정리 작업 1회 실행
+def reap_once(maintain_partitions: bool = None) -> dict:
+    settings = get_settings()
+    if maintain_partitions is None:
+        maintain_partitions = settings.REAPER_MAINTAIN_PARTITIONS
+    start = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    created, dropped = maintain_token_partitions() if maintain_partitions else (0, 0)
+    batch_size, max_batches = settings.REAPER_BATCH_SIZE, settings.REAPER_MAX_BATCHES
+    tokens = _delete_expired(Token, Token.token_id, now, batch_size, max_batches)
+    codes = _delete_expired(
+        EmailVerificationCode, EmailVerificationCode.id,
+        now - timedelta(seconds=settings.VERIFICATION_CODE_RETENTION), batch_size, max_batches,
+    )
+
+    stats.runs += 1
+    stats.tokens_deleted += tokens
+    stats.codes_deleted += codes
+    stats.partitions_created += created
+    stats.partitions_dropped += dropped
+    stats.last_run_at = now.isoformat()
+    stats.last_run_seconds = round(time.perf_counter() - start, 6)
+    result = {"tokens": tokens, "codes": codes, "partitions_created": created, "partitions_dropped": dropped}
+    if any(result.values()):
+        logger.info("Reaper removed expired rows: %s", result)
+    return result
+
+
+async def run_reaper_loop(interval: float):
+    while True:
+        try:
+            await asyncio.to_thread(reap_once)
+        except Exception:
+            stats.errors += 1
+            logger.exception("Expired row reaper failed")
+        await asyncio.sleep(interval)
+
+
+# tokens 테이블을 expires_at 기준 일별 RANGE 파티션 테이블로 전환 (1회성 작업, python -m app.cli partition-tokens)
+# 아직 만료되지 않은 토큰만 옮기고 기존 테이블은 삭제한다. 전환 중에는 tokens에 ACCESS EXCLUSIVE 잠금이 걸린다.
+def convert_tokens_to_partitioned(premake_days: int = None) -> int:
+    if premake_days is None:
+        premake_days = get_settings().TOKEN_PARTITION_PREMAKE_DAYS
+    with get_engine().begin() as conn:
+        if is_tokens_partitioned(conn):
+            raise RuntimeError("tokens is already partitioned")
+        conn.execute(text("LOCK TABLE tokens IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text("ALTER TABLE tokens RENAME TO tokens_unpartitioned"))
+        conn.execute(text("ALTER TABLE tokens_unpartitioned RENAME CONSTRAINT tokens_pkey TO tokens_unpartitioned_pkey"))
+        conn.execute(text("ALTER TABLE tokens_unpartitioned DROP CONSTRAINT IF EXISTS tokens_user_id_fkey"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_tokens_user_id_expires_at, ix_tokens_expires_at"))
+        # 파티션 키(expires_at)는 PK에 포함되어야 함
+        conn.execute(text(
+            "CREATE TABLE tokens ("
+            " token_id integer NOT NULL DEFAULT nextval('tokens_token_id_seq'),"
+            " user_id integer NOT NULL CONSTRAINT tokens_user_id_fkey REFERENCES users (user_id),"
+            " token varchar NOT NULL,"
+            " issued_at timestamp without time zone,"
+            " expires_at timestamp without time zone NOT NULL,"
+            " PRIMARY KEY (token_id, expires_at)"
+            ") PARTITION BY RANGE (expires_at)"
+        ))
+        conn.execute(text("ALTER SEQUENCE tokens_token_id_seq OWNED BY tokens.token_id"))
+        conn.execute(text("CREATE INDEX ix_tokens_user_id_expires_at ON tokens (user_id, expires_at)"))
+        conn.execute(text("CREATE INDEX ix_tokens_expires_at ON tokens (expires_at)"))
+        today = datetime.now(timezone.utc).date()
+        for offset in range(premake_days + 1):
+            _create_partition(conn, today + timedelta(days=offset))
+        moved = conn.execute(text(
+            "INSERT INTO tokens (token_id, user_id, token, issued_at, expires_at) "
+            "SELECT token_id, user_id, token, issued_at, expires_at FROM tokens_unpartitioned "
+            "WHERE expires_at > timezone('utc', now())"
+        )).rowcount
+        conn.execute(text("DROP TABLE tokens_unpartitioned"))
+    return moved
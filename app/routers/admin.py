@@ -0,0 +1,103 @@
+import asyncio
+import tempfile
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app import bulk_users, crud, schemas
+from app.dependencies import ReadDB, read_session_scope, require_admin, session_scope
+from app.serialization import AppJSONResponse, dumps_line
+
+# 관리자 API (X-Admin-Token 헤더 필요, ADMIN_TOKEN 미설정 시 비활성화)
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+FORMAT_PATTERN = "^(ndjson|csv)$"
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+SPOOL_MAX_MEMORY = 16 * 1024 * 1024  # 가져오기 요청 본문을 메모리에 둘 최대 크기
+REFERRAL_TREE_MAX_DEPTH = 10
+REFERRAL_TREE_MAX_NODES = 10000
+REFERRALS_EXPORT_MAX_REPLICA_LAG = 30  # 추천인 내보내기 허용 복제 지연(초)
+REFERRAL_MAX_REPLICA_LAG = 5  # 추천 관계/추천 트리 조회 허용 복제 지연(초)
+
+
+# 사용자 일괄 가져오기
+# 요청 본문(NDJSON 또는 헤더가 있는 CSV)을 묶음 단위로 처리하며, 실패한 행과 마지막 요약을 NDJSON으로 스트리밍
+# 예: curl -H "X-Admin-Token: ..." --data-binary @users.ndjson "http://localhost:8000/admin/users/import"
+@router.post("/users/import")
+async def import_users(request: Request, format: str = Query("ndjson", pattern=FORMAT_PATTERN)):
+    # 응답 스트리밍 중에는 요청 본문을 읽을 수 없으므로(연결 종료 감지와 충돌) 먼저 임시 파일에 받아 둔다.
+    # 일정 크기까지는 메모리, 넘으면 디스크에 저장
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    async for chunk in request.stream():
+        await asyncio.to_thread(body.write, chunk)
+    body.seek(0)
+    records = bulk_users.iter_records(bulk_users.iter_lines(bulk_users.iter_file_chunks(body)), format)
+
+    async def report():
+        try:
+            async for item in bulk_users.import_users(records, session_scope):
+                yield dumps_line(item)
+        finally:
+            body.close()
+
+    return StreamingResponse(report(), media_type=MEDIA_TYPES["ndjson"])
+
+
+# 사용자 일괄 내보내기 (user_id 순)
+@router.get("/users/export")
+async def export_users(
+    format: str = Query("ndjson", pattern=FORMAT_PATTERN),
+    include_password_hash: bool = False,
+):
+    return StreamingResponse(
+        bulk_users.export_users(session_scope, format, include_password_hash),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+# 전체 추천인 관계 내보내기 (id 순 NDJSON 스트리밍, 서버 측 커서 사용, 복제 서버 우선)
+@router.get("/referrals")
+async def export_referrals(batch_size: int = Query(1000, ge=1, le=10000)):
+    async def rows():
+        async with read_session_scope(REFERRALS_EXPORT_MAX_REPLICA_LAG) as db:
+            async for batch in crud.get_all_referrals(db, batch_size):
+                yield b"".join(dumps_line(row._asdict()) for row in batch)
+
+    return StreamingResponse(rows(), media_type=MEDIA_TYPES["ndjson"])
+
+
+# 두 사용자의 추천 관계 조회 (복제 서버 우선)
+@router.get("/referrals/lookup", response_model=schemas.Referral)
+async def lookup_referral(
+    referrer_email: str,
+    referred_email: str,
+    db=Depends(ReadDB(max_lag=REFERRAL_MAX_REPLICA_LAG)),
+):
+    referral = await crud.get_referral_by_emails(db, referrer_email, referred_email)
+    if referral is None:
+        raise HTTPException(status_code=404, detail="Referral not found")
+    return referral
+
+
+# 사용자의 추천 트리 (max_depth 단계까지, 쿼리 1번, 복제 서버 우선)
+@router.get("/users/{user_id}/referral_tree")
+async def referral_tree(
+    user_id: int,
+    max_depth: int = Query(3, ge=1, le=REFERRAL_TREE_MAX_DEPTH),
+    db=Depends(ReadDB(max_lag=REFERRAL_MAX_REPLICA_LAG)),
+):
+    rows = await crud.get_referral_tree(db, user_id, max_depth, REFERRAL_TREE_MAX_NODES)
+    root = {"user_id": user_id, "children": []}
+    nodes = {user_id: root}
+    for row in rows:
+        parent = nodes.get(row.referrer_id)
+        # 순환 관계 등으로 이미 추가된 사용자는 한 번만 표시
+        if parent is None or row.referred_id in nodes:
+            continue
+        node = {"user_id": row.referred_id, "user_email": row.user_email, "depth": row.depth, "children": []}
+        parent["children"].append(node)
+        nodes[row.referred_id] = node
+    root["truncated"] = len(rows) >= REFERRAL_TREE_MAX_NODES
+    # 노드가 많을 수 있으므로 jsonable_encoder 변환 없이 바로 직렬화
+    return AppJSONResponse(root)
@@ -1,93 +1,116 @@
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
-from bcrypt import checkpw
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import schemas, crud, models
-from fastapi.security import OAuth2PasswordBearer
-from app.database import SessionLocal
-from app.dependencies import  get_db
+from app.cache import token_user_cache
+from app.dependencies import  ReadDB, get_db
 from app.models import User
 from app.token_utils import decode_jwt_token
-from app.password_utils import verify_password
-from typing import List
+from app.token_revocation import revocation_list
+from app.token_rate_limit import RateLimit
+from config.config import get_settings
+from starlette.concurrency import run_in_threadpool
+from app.password_utils import verify_password_async
+from app.serialization import stream_json_array
+from typing import List, Optional
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# 이미 있는 사용자 인증, 세션 관리, 토큰 발급 등 보안
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
-@router.post("/login", response_model=schemas.TokenResponse)
-def login(user: schemas.UserLogin, request: Request, db: Session = Depends(get_db), device_info=schemas.Device):
+# /current_sessions 페이지 크기
+SESSIONS_PAGE_DEFAULT = 100
+SESSIONS_PAGE_MAX = 1000
+SESSIONS_MAX_REPLICA_LAG = 5  # 허용 복제 지연(초), 방금 로그인/로그아웃한 세션은 이만큼 늦게 반영될 수 있음
+
+# 이미 있는 사용자 인증, 세션 관리, 토큰 발급 등 보안 (oauth2_scheme, get_current_user는 dependencies.py)
+@router.post(
+    "/login",
+    response_model=schemas.TokenResponse,
+    dependencies=[Depends(RateLimit("login", setting="LOGIN_RATE_LIMIT"))],
+)
+async def login(user: schemas.UserLogin, request: Request, db: AsyncSession = Depends(get_db)):
 
     # 현재 시간을 UTC로 변환하여 offset-aware로 설정
     now = datetime.now(timezone.utc)  # 이 부분에서 변수를 정의
 
-    # 사용자 정보 조회
-    db_user = db.query(models.User).filter(models.User.user_email == user.user_email).first()
+    # 사용자 정보와 기존 활성 토큰 여부를 한 번에 조회
+    credentials = await crud.get_login_credentials(db, user.user_email, now)
+    # bcrypt 검증 동안 커넥션을 붙잡지 않도록 읽기 트랜잭션을 종료하고 풀에 반환
+    await db.rollback()
 
-    # 사용자 존재 여부 및 비밀번호 검증
-    if not db_user or not checkpw(user.password.encode('utf-8'), db_user.password.encode('utf-8')):
+    # 사용자 존재 여부 및 비밀번호 검증 (bcrypt는 전용 작업자 풀에서 실행)
+    if not credentials or not await verify_password_async(user.password, credentials.password):
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
     # 기존 활성 토큰 확인 (이미 로그인된 경우 처리)
-    existing_token = db.query(models.Token).filter(
-        models.Token.user_id == db_user.user_id,
-        models.Token.expires_at > now  # 현재 시간과 비교
-    ).first()
-
-    if existing_token:
+    if credentials.logged_in:
         raise HTTPException(status_code=403, detail="User is already logged in")
 
     # 기기 정보에서 IP 주소 수집
     client_ip = request.client.host
     logger.info(f"Client IP: {client_ip}")  # IP 주소 로그 출력
-    device_info.ip_address = client_ip
 
     # 기기 정보 유효성 검증
     # if not device_info.device_type or not device_info.device_name:
     #     raise HTTPException(status_code=400, detail="Device information is incomplete")
 
-    # 기기 정보 등록 또는 업데이트
-    crud.register_or_update_device(db, db_user.user_id, device_info)
-
     # # 기기 정보 제한 기능 활성화
     # if not crud.is_device_registered(db, db_user.user_id, device_info):
     #     raise HTTPException(status_code=403, detail="Unauthorized device")
 
-    # 새로운 토큰 생성
-    new_token = crud.create_token(db, db_user.user_id)
+    # 기기 정보 갱신, 새로운 토큰 생성을 하나의 트랜잭션으로 처리
+    new_token = await crud.issue_login_token(db, credentials.user_id, client_ip)
     return schemas.TokenResponse(token=new_token.token, expires_at=new_token.expires_at)
 
 # 로그아웃(온라인 사용만)
 @router.post("/logout")
-def logout(request: schemas.LogoutRequest, db: Session = Depends(get_db)):
+async def logout(request: schemas.LogoutRequest, db: AsyncSession = Depends(get_db)):
     # Extract the email from the request
     user_email = request.user_email
 
-    db_user = db.query(models.User).filter(models.User.user_email == user_email).first()
+    # user_id만 조회 (User 전체를 불러오지 않음)
+    user_id = await crud.get_user_id_by_email(db, user_email)
 
-    if not db_user:
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Invalidate the user's tokens
-    db.query(models.Token).filter(models.Token.user_id == db_user.user_id).delete()
-    db.commit()
+    if get_settings().JWT_STATELESS:
+        # 무상태 모드: 지금까지 발급된 사용자 토큰을 폐기 목록에 추가 (공유 저장소 기록은 스레드풀에서)
+        await run_in_threadpool(revocation_list.revoke_user, user_id)
+    else:
+        await db.execute(delete(models.Token).where(models.Token.user_id == user_id))
+        await db.commit()
+    # 이 워커의 인증 캐시에서도 제거
+    token_user_cache.invalidate_user(user_id)
 
     return {"detail": "Logged out successfully"}
 
 
 # 현재 로그인 중인 사용자 확인 API
 
-@router.get("/current_sessions", response_model=List[schemas.User])
-def current_sessions(db: Session = Depends(get_db)):
-    # 현재 시간 기준으로 만료되지 않은 토큰 조회
+@router.get("/current_sessions", response_model=List[schemas.UserResponse])
+async def current_sessions(
+    cursor: Optional[int] = Query(None, description="이전 페이지 응답의 X-Next-Cursor 값"),
+    limit: int = Query(SESSIONS_PAGE_DEFAULT, ge=1, le=SESSIONS_PAGE_MAX),
+    db=Depends(ReadDB(max_lag=SESSIONS_MAX_REPLICA_LAG)),
+):
+    # 무상태 모드에서는 발급된 토큰을 서버에 저장하지 않으므로 세션 목록을 알 수 없음
+    if get_settings().JWT_STATELESS:
+        raise HTTPException(status_code=501, detail="Session listing is not available in stateless token mode")
+
+    # 현재 시간 기준으로 만료되지 않은 토큰을 가진 사용자를 한 페이지(limit)만 조회
     now_kst = datetime.now(timezone.utc)
-    active_tokens = db.query(models.Token.user_id).filter(models.Token.expires_at > now_kst).all()
-
-    user_ids = [token.user_id for token in active_tokens]
-    users = db.query(models.User).filter(models.User.user_id.in_(user_ids)).all()
-
-    return users
\ No newline at end of file
+    users = await crud.get_active_session_users(db, now_kst, after_user_id=cursor, limit=limit)
+
+    # 다음 페이지가 있을 수 있으면 마지막 user_id를 커서로 전달 (응답 본문은 기존과 같은 사용자 배열)
+    headers = {}
+    if len(users) == limit:
+        headers["X-Next-Cursor"] = str(users[-1].user_id)
+    # 조회한 행은 response_model과 같은 필드이므로 재검증 없이 orjson으로 바로 직렬화
+    return StreamingResponse(stream_json_array(users), media_type="application/json", headers=headers)
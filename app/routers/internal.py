@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.database import get_async_engine, get_engine, get_replica_engine, replica_monitor
+from app.dependencies import get_db, require_admin, session_scope
+from app.device_touch import device_touches
+from app.email_filter import user_email_index
+from app.email_queue import email_dispatcher
+from app.mail_worker import outbox_backlog
+from app.pool_metrics import pool_snapshot
+from app.reaper import stats as reaper_stats
+from app.sql_metrics import render_prometheus
+from config.config import get_settings
+
+# 운영/모니터링용 내부 API (X-Admin-Token 헤더 필요, 메일 주소 등 개인정보가 포함되므로 프록시에서도 차단할 것)
+# Prometheus 수집 설정에서도 X-Admin-Token 헤더를 보내야 한다.
+router = APIRouter(prefix="/internal", include_in_schema=False, dependencies=[Depends(require_admin)])
+
+# 이미 생성된 엔진의 풀 상태 (지표 조회만으로 엔진을 새로 만들지 않음)
+def _pool_snapshots() -> dict:
+    getters = {"sync": get_engine, "async": get_async_engine, "replica": get_replica_engine}
+    return {
+        name: pool_snapshot(getter()) for name, getter in getters.items()
+        if getter.cache_info().currsize and getter() is not None
+    }
+
+# Prometheus 수집용 (요청 수/지연 시간, 요청당 SQL 수/DB 시간, SQL 종류별 지연 시간, 풀/큐 상태)
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    gauges = {
+        "email_queue": email_dispatcher.metrics(),
+        "email_filter": user_email_index.metrics(),
+        "reaper": reaper_stats.as_dict(),
+        "device_touch": device_touches.metrics(),
+        "db_replica": replica_monitor.metrics(),
+    }
+    gauges.update({f"db_pool_{name}": snapshot for name, snapshot in _pool_snapshots().items()})
+    if get_settings().EMAIL_DELIVERY_MODE == "outbox":
+        async with session_scope() as db:
+            gauges["email_outbox"] = await outbox_backlog(db)
+    return PlainTextResponse(render_prometheus(gauges), media_type="text/plain; version=0.0.4")
+
+# 커넥션 풀 상태 및 checkout/대기/overflow/timeout 통계
+@router.get("/metrics/db_pool")
+async def db_pool_metrics():
+    return _pool_snapshots()
+
+# 복제 서버 지연 및 복제 서버/주 서버 조회 수
+@router.get("/metrics/db_replica")
+async def db_replica_metrics():
+    return replica_monitor.metrics()
+
+# 메일 발송 큐 깊이, 발송 수, 재시도/실패 수, 발송 지연 시간
+@router.get("/metrics/email_queue")
+async def email_queue_metrics():
+    return email_dispatcher.metrics()
+
+# email_outbox 발송 대기/재시도 대기/실패 메일 수 (EMAIL_DELIVERY_MODE=outbox)
+@router.get("/metrics/email_outbox")
+async def email_outbox_metrics(db=Depends(get_db)):
+    return await outbox_backlog(db)
+
+# 가입 이메일 filter 크기, filter/캐시/DB 응답 수, 오탐 수
+@router.get("/metrics/email_filter")
+async def email_filter_metrics():
+    return user_email_index.metrics()
+
+# 기기 last_used 갱신 버퍼 크기, 생략/기록된 갱신 수
+@router.get("/metrics/device_touch")
+async def device_touch_metrics():
+    return device_touches.metrics()
+
+# 만료 데이터 정리 누적 삭제 수, 마지막 실행 시각/소요 시간
+@router.get("/metrics/reaper")
+async def reaper_metrics():
+    return reaper_stats.as_dict()
+
+# 최대 재시도 후에도 발송하지 못한 메일 목록 (최근 순)
+@router.get("/email_queue/dead_letters")
+async def email_dead_letters(limit: int = 100):
+    jobs = list(email_dispatcher.dead_letters)[-limit:]
+    return [
+        {"recipient_email": job.recipient_email, "attempts": job.attempts, "last_error": job.last_error}
+        for job in reversed(jobs)
+    ]
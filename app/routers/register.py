@@ -1,55 +1,57 @@
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
-from sqlalchemy.orm import Session
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import models, schemas, crud
 from app.crud import  create_verification_code
-from app.database import SessionLocal
-from app.dependencies import get_db
-from app.email_utils import send_email
+from app.dependencies import ReadDB, get_db
+from app.email_queue import email_dispatcher
 from app.models import (User,  Referral, EmailVerificationCode)
 from app.password_utils import get_password_hash, verify_password
 from app.schemas import UserCreate, VerificationRequest
+from app.token_rate_limit import RateLimit
+from config.config import get_settings
 import random
 
 router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# 이메일 중복검사
+# /check_user_email 허용 복제 지연(초), 가입 직후 재확인에도 정확해야 하므로 짧게
+CHECK_EMAIL_MAX_REPLICA_LAG = 1
+
+# 이메일 중복검사 (조회 전용, 복제 서버 우선)
 @router.get("/check_user_email/{user_email}")
-async def check_user_email(user_email: str, db: Session = Depends(get_db)):
-    user = crud.get_user_by_user_email(db, user_email)
-    if user:
-        return {"exists": True}
-    return {"exists": False}
+async def check_user_email(user_email: str, db=Depends(ReadDB(max_lag=CHECK_EMAIL_MAX_REPLICA_LAG))):
+    return {"exists": await crud.user_email_exists(db, user_email)}
 
 # 회원가입
 @router.post("/register")
 async def register_user(
     user: schemas.UserCreate,  # Pydantic 모델로 요청 데이터를 검증
-    db: Session = Depends(get_db)  # DB 세션 종속성 주입
+    db: AsyncSession = Depends(get_db)  # DB 세션 종속성 주입
 ):
     try:
         # 사용자 중복 확인
-        existing_user = db.query(models.User).filter(models.User.user_email == user.user_email).first()
-        if existing_user:
+        if await crud.user_email_registered(db, user.user_email):
             raise HTTPException(status_code=400, detail="Username already registered")
         if not user.password:
             raise HTTPException(status_code=400, detail="Password is required")
 
         # `crud.py`의 `create_user` 함수를 호출하여 새 사용자 생성
-        new_user = crud.create_user(db=db, user=user)
+        new_user = await crud.create_user(db=db, user=user)
 
         # 회원가입 후 성공 메시지 반환
         return {"message": "Registration successful. Please proceed with email verification."}
 
     except HTTPException as http_ex:
-        db.rollback()  # 오류 발생 시 트랜잭션 롤백
+        await db.rollback()  # 오류 발생 시 트랜잭션 롤백
         raise http_ex
 
     except Exception as e:
-        db.rollback()  # 일반적인 오류 처리
+        await db.rollback()  # 일반적인 오류 처리
         return {"message": f"Failed to register user: {str(e)}"}, 500
 
         # 추천인 정보가 제공된 경우 처리
@@ -66,65 +68,57 @@ async def register_user(
         # return {"message": "Registration successful. Please proceed with email verification."}
 
     except HTTPException as http_ex:
-        db.rollback()
+        await db.rollback()
         raise http_ex
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return {"message": f"Failed to register user: {str(e)}"}, 500
 
 # email 인증 code 발송
-@router.post("/send_verification_code")
+@router.post(
+    "/send_verification_code",
+    dependencies=[Depends(RateLimit("send_verification_code", setting="VERIFICATION_RATE_LIMIT"))],
+)
 async def send_verification_code(
         request: VerificationRequest,
-        background_tasks: BackgroundTasks,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     user_email = request.user_email
     try:
         # 6자리 인증 코드 생성
         verification_code = str(random.randint(100000, 999999))
 
-        # 인증 코드 저장 (사용자 존재 여부에 따라 처리)
-        await create_verification_code(db, user_email, verification_code)
+        if get_settings().EMAIL_DELIVERY_MODE == "outbox":
+            # 인증 코드 저장과 함께 email_outbox에 추가 (별도 메일 작업자 프로세스가 발송)
+            await create_verification_code(db, user_email, verification_code, queue_email=True)
+        else:
+            # 인증 코드 저장 (사용자 존재 여부에 따라 처리)
+            await create_verification_code(db, user_email, verification_code)
 
-        # 이메일 인증 메일 발송 (비동기 백그라운드 작업)
-        background_tasks.add_task(send_email, user_email, verification_code)
+            # 이메일 인증 메일 발송 (메일 발송 큐에 추가, 작업자 코루틴이 묶어서 발송)
+            email_dispatcher.enqueue(user_email, verification_code)
 
         return {"message": "Verification email sent. Please check your email for your verification code."}
 
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Email service is busy, try again later.", headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to send verification code: {str(e)}")
 
 
 # 이메일 인증 코드 완료
 @router.get("/verify_code")
-async def verify_code(email: str, code: str, db: Session = Depends(get_db)):
-    # 코드와 이메일을 DB에서 조회
-    verification_code_entry = db.query(EmailVerificationCode).filter(
-        EmailVerificationCode.user_email == email,
-        EmailVerificationCode.code == code
-    ).first()
-
-    if not verification_code_entry:
-        raise HTTPException(status_code=400, detail="Invalid verification code")
+async def verify_code(email: str, code: str, db: AsyncSession = Depends(get_db)):
+    # 코드 확인과 인증 상태 업데이트를 한 번의 UPDATE로 처리
+    expires_at = await crud.verify_verification_code(db, email, code)
 
-    current_time = datetime.now(timezone.utc)
-
-    # expires_at을 UTC 시간대로 변환하여 비교
-    expires_at_with_timezone = verification_code_entry.expires_at.replace(tzinfo=timezone.utc)
+    if expires_at is None:
+        raise HTTPException(status_code=400, detail="Invalid verification code")
 
-    if expires_at_with_timezone < current_time:
+    if expires_at <= datetime.now(timezone.utc):
         raise HTTPException(status_code=400, detail="Code expired")
 
-    # 이메일 인증 완료
-    user = db.query(EmailVerificationCode).filter(EmailVerificationCode.user_email == email).first()
-    if user:
-        user.email_verified = True  # 이메일 인증 상태 업데이트
-        db.commit()  # 변경 사항 커밋
-    else:
-        raise HTTPException(status_code=404, detail="User not found")
-
     return {"message": "Email verified successfully"}
 
 
@@ -1,10 +1,7 @@
-import os
 from datetime import datetime
 from typing import Optional
-from xmlrpc.client import boolean
 
-from pydantic import BaseModel, Field
-from pydantic_settings import BaseSettings
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 
 
 # 사용자 생성 시 필요한 스키마
@@ -20,6 +17,23 @@ class UserCreate(BaseModel):
     class Config:
         from_attributes = True
 
+# 사용자 일괄 가져오기(/admin/users/import) 한 행
+# 평문 password 또는 기존 시스템의 bcrypt 해시(password_hash) 중 하나만 지정
+class BulkUserRow(BaseModel):
+    user_email: str
+    password: Optional[str] = Field(None, min_length=8)
+    password_hash: Optional[str] = None
+    phone_number: str
+    created_at: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_password(self):
+        if (self.password is None) == (self.password_hash is None):
+            raise ValueError("exactly one of password or password_hash is required")
+        if self.password_hash is not None and not self.password_hash.startswith(("$2a$", "$2b$", "$2y$")):
+            raise ValueError("password_hash must be a bcrypt hash")
+        return self
+
 # 사용자 조회 시 사용하는 스키마
 class User(BaseModel):
     id: int  # user_id를 id로 변경하여 DB 필드와 일치시킴
@@ -32,6 +46,39 @@ class User(BaseModel):
 
     class Config:
         from_attributes = True
+
+# 인증된 사용자 본인 정보 응답 (/me)
+class UserResponse(BaseModel):
+    user_id: int
+    user_email: str
+    phone_number: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# 사용자 정보 수정 (/me), 전달된 필드만 변경 (null은 422, 두 컬럼 모두 NOT NULL)
+class UserUpdate(BaseModel):
+    user_email: Optional[EmailStr] = None
+    phone_number: Optional[str] = Field(None, min_length=1)
+
+    @field_validator("user_email", "phone_number")
+    @classmethod
+    def check_not_null(cls, value):
+        if value is None:
+            raise ValueError("must not be null")
+        return value
+
+# 비밀번호 변경 (/me/password)
+class PasswordUpdate(BaseModel):
+    current_password: str
+    new_password: str = Field(..., min_length=8)
+
+# 단순 결과 메시지
+class Message(BaseModel):
+    detail: str
+
 # 로그인
 class UserLogin(BaseModel):
     user_email: str
@@ -79,7 +126,7 @@ class EmailVerificationCode(BaseModel):
     user_email: str  # 사용자 이메일 추가
     created_at: datetime
     expires_at: datetime
-    email_verified: boolean
+    email_verified: bool
 
     class Config:
         from_attributes = True
@@ -0,0 +1,50 @@
+from typing import Any, Iterable, Iterator
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+# orjson 기반 JSON 직렬화
+# - AppJSONResponse: 앱 기본 응답 클래스 (main.py의 default_response_class)
+#   response_model이 있는 엔드포인트는 FastAPI가 모델 검증/직렬화 후 이 클래스로 렌더링한다.
+# - 이미 검증된 데이터(DB에서 읽은 행 등)는 엔드포인트에서 AppJSONResponse/stream_json_array를 직접 반환하면
+#   response_model 재검증과 jsonable_encoder 변환을 건너뛴다. (응답 형식은 response_model과 같게 유지할 것)
+# datetime은 ISO 8601 문자열로 직렬화된다. (datetime.isoformat()과 같은 형식)
+
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=JSON_OPTIONS)
+
+
+# NDJSON 한 줄 (끝에 줄바꿈 포함)
+def dumps_line(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=JSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+
+
+class AppJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# SQLAlchemy Row 목록을 JSON 객체 배열로 조금씩 직렬화 (응답 전체를 메모리에 만들지 않음)
+def stream_json_array(rows: Iterable, chunk_size: int = 100) -> Iterator[bytes]:
+    yield b"["
+    chunk = []
+    first = True
+    for row in rows:
+        chunk.append(row._asdict())
+        if len(chunk) >= chunk_size:
+            # 배열을 한 번에 직렬화한 뒤 바깥 괄호만 떼어 이어 붙임
+            yield (b"" if first else b",") + dumps(chunk)[1:-1]
+            chunk, first = [], False
+    if chunk:
+        yield (b"" if first else b",") + dumps(chunk)[1:-1]
+    yield b"]"
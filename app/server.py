@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import importlib
+import logging
+import sys
+
+from config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 서버 실행 (여러 워커 프로세스)
+# 사용법: python -m app.server [--workers 16] [--server uvicorn|gunicorn]
+#   uvicorn: uvicorn의 멀티 프로세스 실행 (uvloop/httptools가 설치되어 있으면 자동 사용)
+#   gunicorn: gunicorn 마스터 + UvicornWorker (워커 재시작 max_requests 등 gunicorn 기능 사용 시)
+# 값은 WEB_* 환경변수(config/config.py)가 기본이고 명령행 옵션이 우선한다.
+#
+# 워커 프로세스는 서로 상태를 공유하지 않는다. 다음은 워커마다 따로 존재:
+# - DB 커넥션 풀 (워커 수 x (DB_POOL_SIZE + DB_MAX_OVERFLOW)가 DB 최대 연결 수를 넘지 않게 설정)
+# - bcrypt 작업자 풀, 메일 발송 큐, SMTP 연결 풀
+#   (EMAIL_DELIVERY_MODE=outbox이면 API 워커는 email_outbox에 넣기만 하고, 발송은 `python -m app.mail_worker`가 맡음)
+# - 인증 캐시, 가입 이메일 Bloom filter, 요청 제한(RATE_LIMIT_BACKEND=memory일 때), /internal/metrics 값
+# 워커 간에 공유되어야 하는 값은 DB, Redis(RATE_LIMIT_BACKEND=redis), REVOCATION_STORE_PATH를 사용한다.
+# 엔진/풀은 lifespan에서 워커마다 생성되므로 fork 전에 만들어진 커넥션을 공유하지 않는다.
+#
+# 종료(SIGTERM/SIGINT) 시 새 연결을 받지 않고 처리 중인 요청을 WEB_GRACEFUL_TIMEOUT초까지 기다린 뒤
+# lifespan 종료 단계에서 메일 큐(EMAIL_DRAIN_TIMEOUT), 작업자 풀, DB 풀을 차례로 정리한다.
+
+APP_PATH = "main:app"
+
+
+# WORKER_INIT_HOOKS("모듈:함수" 쉼표 구분)에 지정한 함수를 워커마다 시작 시 호출 (lifespan에서 실행)
+# 함수는 app을 인자로 받으며 async 함수여도 된다. 예: WORKER_INIT_HOOKS=tracing.setup:init_tracing
+async def run_worker_init_hooks(app, spec: str):
+    for path in filter(None, (item.strip() for item in spec.split(","))):
+        module_name, _, attr = path.partition(":")
+        hook = getattr(importlib.import_module(module_name), attr)
+        result = hook(app)
+        if asyncio.iscoroutine(result):
+            await result
+        logger.info("Worker init hook %s done", path)
+
+
+def _log_capacity(args, workers: int):
+    settings = get_settings()
+    connections = workers * (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    logger.info(
+        "Starting %d workers on %s:%d (up to %d DB connections, %d %s password hash workers per worker)",
+        workers, args.host, args.port, connections,
+        settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_EXECUTOR,
+    )
+
+
+def run_uvicorn(args):
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("--server uvicorn requires the 'uvicorn' package (uvicorn[standard] for uvloop/httptools)")
+
+    settings = get_settings()
+    uvicorn.run(
+        APP_PATH,
+        host=args.host,
+        port=args.port,
+        workers=None if args.reload else args.workers,
+        reload=args.reload,
+        backlog=settings.WEB_BACKLOG,
+        timeout_keep_alive=int(settings.WEB_KEEPALIVE),
+        timeout_graceful_shutdown=int(settings.WEB_GRACEFUL_TIMEOUT),
+        limit_max_requests=settings.WEB_MAX_REQUESTS or None,
+        access_log=settings.WEB_ACCESS_LOG,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.WEB_FORWARDED_ALLOW_IPS,
+        lifespan="on",
+    )
+
+
+def run_gunicorn(args):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        sys.exit("--server gunicorn requires the 'gunicorn' and 'uvicorn' packages")
+
+    settings = get_settings()
+    options = {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "backlog": settings.WEB_BACKLOG,
+        "keepalive": settings.WEB_KEEPALIVE,
+        "graceful_timeout": settings.WEB_GRACEFUL_TIMEOUT,
+        # 응답 없는 워커 재시작 기준, lifespan 종료(메일 큐 정리) 시간보다 길게
+        "timeout": settings.WEB_GRACEFUL_TIMEOUT + settings.EMAIL_DRAIN_TIMEOUT + 30,
+        "max_requests": settings.WEB_MAX_REQUESTS,
+        "max_requests_jitter": settings.WEB_MAX_REQUESTS // 10,
+        "accesslog": "-" if settings.WEB_ACCESS_LOG else None,
+        "forwarded_allow_ips": settings.WEB_FORWARDED_ALLOW_IPS,
+        # 앱은 워커마다 import (마스터에서 미리 import하지 않음)
+        "preload_app": False,
+    }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            module_name, _, attr = APP_PATH.partition(":")
+            return getattr(importlib.import_module(module_name), attr)
+
+    Application().run()
+
+
+SERVERS = {"uvicorn": run_uvicorn, "gunicorn": run_gunicorn}
+
+
+def main(argv=None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="python -m app.server")
+    parser.add_argument("--server", choices=SERVERS, default=settings.WEB_SERVER)
+    parser.add_argument("--host", default=settings.WEB_HOST)
+    parser.add_argument("--port", type=int, default=settings.WEB_PORT)
+    parser.add_argument("-w", "--workers", type=int, default=settings.WEB_WORKERS)
+    parser.add_argument("--reload", action="store_true", help="코드 변경 시 재시작 (개발용, uvicorn 단일 워커)")
+    args = parser.parse_args(argv)
+    if args.reload and args.server != "uvicorn":
+        parser.error("--reload is only supported with --server uvicorn")
+
+    logging.basicConfig(level=logging.INFO)
+    _log_capacity(args, 1 if args.reload else args.workers)
+    SERVERS[args.server](args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
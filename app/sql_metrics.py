@@ -0,0 +1,241 @@
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from sqlalchemy import event
+
+from config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 요청별 SQL 계측
+# - SQLAlchemy 이벤트로 실행된 SQL 수/DB 시간을 현재 요청(contextvar)에 누적
+#   (run_in_threadpool은 context를 복사하므로 동기 Session 경로에서도 같은 요청에 집계됨)
+# - 같은 SQL이 한 요청에서 N_PLUS_ONE_THRESHOLD번 이상 실행되면 N+1 의심으로 경고 로그
+# - SLOW_QUERY_THRESHOLD_MS 이상 걸린 SQL은 경고 로그 (바인딩 값은 SLOW_QUERY_LOG_PARAMS=true일 때만 출력)
+# - SQLMetricsMiddleware가 응답에 Server-Timing 헤더를 붙이고, /internal/metrics에서 Prometheus 형식으로 노출
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestSQLStats:
+    __slots__ = ("statements", "db_seconds", "by_statement")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.by_statement = Counter()  # SQL 문자열 -> 실행 횟수
+
+
+_current = contextvars.ContextVar("request_sql_stats", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+# 프로세스 전체 누적 값 (워커 프로세스마다 별도)
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter()  # (method, route, status) -> 수
+        self.request_seconds = defaultdict(lambda: Histogram(DURATION_BUCKETS))  # (method, route)
+        self.request_statements = defaultdict(lambda: Histogram(STATEMENT_BUCKETS))  # (method, route)
+        self.request_db_seconds = Counter()  # (method, route) -> 합계
+        self.statement_seconds = defaultdict(lambda: Histogram(DURATION_BUCKETS))  # SQL 종류(SELECT 등)
+        self.slow_statements = 0
+        self.n_plus_one = Counter()  # (method, route) -> 의심 요청 수
+
+    def observe_statement(self, operation: str, seconds: float, slow: bool):
+        with self._lock:
+            self.statement_seconds[operation].observe(seconds)
+            if slow:
+                self.slow_statements += 1
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestSQLStats,
+                        n_plus_one: bool):
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            self.request_seconds[key].observe(seconds)
+            self.request_statements[key].observe(stats.statements)
+            self.request_db_seconds[key] += stats.db_seconds
+            if n_plus_one:
+                self.n_plus_one[key] += 1
+
+
+registry = Registry()
+
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+
+def _redacted(parameters):
+    if get_settings().SLOW_QUERY_LOG_PARAMS:
+        return parameters
+    if isinstance(parameters, dict):
+        return {key: "?" for key in parameters}
+    if isinstance(parameters, (list, tuple)):
+        return ["?"] * len(parameters)
+    return "?"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    slow = elapsed * 1000 >= get_settings().SLOW_QUERY_THRESHOLD_MS
+    registry.observe_statement(_operation(statement), elapsed, slow)
+
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+        stats.by_statement[statement] += 1
+
+    if slow:
+        logger.warning(
+            "Slow query (%.1f ms): %s params=%s", elapsed * 1000, " ".join(statement.split()), _redacted(parameters)
+        )
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine):
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+
+
+# 요청 단위 계측 ASGI 미들웨어 (응답 본문을 버퍼링하지 않으므로 스트리밍 응답에도 사용 가능)
+# Server-Timing 헤더는 응답 시작 시점까지의 값이다.
+class SQLMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSQLStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if get_settings().SERVER_TIMING_ENABLED:
+                    total_ms = (time.perf_counter() - start) * 1000
+                    value = (
+                        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} queries", '
+                        f"app;dur={total_ms:.1f}"
+                    )
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"server-timing", value.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            threshold = get_settings().N_PLUS_ONE_THRESHOLD
+            repeated = [(sql, n) for sql, n in stats.by_statement.items() if n >= threshold]
+            for sql, n in repeated:
+                logger.warning(
+                    "Possible N+1 in %s %s: statement ran %d times: %s",
+                    scope["method"], route_path, n, " ".join(sql.split())[:300],
+                )
+            registry.observe_request(
+                scope["method"], route_path, status, time.perf_counter() - start, stats, bool(repeated)
+            )
+
+
+def _labels(**labels) -> str:
+    parts = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _histogram_lines(name: str, histogram: Histogram, **labels):
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        yield f"{name}_bucket{_labels(**labels, le=bound)} {count}"
+    yield f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.total}"
+    yield f"{name}_sum{_labels(**labels)} {histogram.sum}"
+    yield f"{name}_count{_labels(**labels)} {histogram.total}"
+
+
+# Prometheus 텍스트 형식, extra_gauges: {지표 접두사: {이름: 숫자}} (커넥션 풀, 메일 큐 등)
+def render_prometheus(extra_gauges=None) -> str:
+    lines = []
+    with registry._lock:
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route, status), count in sorted(registry.requests.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route), histogram in sorted(registry.request_seconds.items()):
+            lines.extend(_histogram_lines("http_request_duration_seconds", histogram, method=method, route=route))
+
+        lines.append("# TYPE http_request_db_statements histogram")
+        for (method, route), histogram in sorted(registry.request_statements.items()):
+            lines.extend(_histogram_lines("http_request_db_statements", histogram, method=method, route=route))
+
+        lines.append("# TYPE http_request_db_seconds_total counter")
+        for (method, route), seconds in sorted(registry.request_db_seconds.items()):
+            lines.append(f"http_request_db_seconds_total{_labels(method=method, route=route)} {seconds}")
+
+        lines.append("# TYPE db_statement_duration_seconds histogram")
+        for operation, histogram in sorted(registry.statement_seconds.items()):
+            lines.extend(_histogram_lines("db_statement_duration_seconds", histogram, operation=operation))
+
+        lines.append("# TYPE db_slow_statements_total counter")
+        lines.append(f"db_slow_statements_total {registry.slow_statements}")
+
+        lines.append("# TYPE http_request_n_plus_one_total counter")
+        for (method, route), count in sorted(registry.n_plus_one.items()):
+            lines.append(f"http_request_n_plus_one_total{_labels(method=method, route=route)} {count}")
+
+    for prefix, values in (extra_gauges or {}).items():
+        for key, value in values.items():
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}_{key}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
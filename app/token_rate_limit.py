@@ -1,46 +1,127 @@
-from datetime import datetime, timedelta, timezone
-from zoneinfo import ZoneInfo
+import asyncio
+import math
+import time
+import uuid
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, Tuple
 
+from fastapi import Request
 from fastapi.exceptions import HTTPException
-from sqlalchemy.orm import Session
-from app.models import TokenRateLimit as TokenRateLimitModel
-
-# 로그인 시 토큰 생성 제한
-class TokenRateLimit:
-    def __init__(self, db: Session, max_tokens: int, period: int):
-        self.db = db
-        self.max_tokens = max_tokens
-        self.period = period  # 기간을 분 단위로 설정
-        # 현재 시간을 UTC로 변환하여 offset-aware로 설정
-        self.now = datetime.now(timezone.utc)
-        self.start_time = self.now - timedelta(minutes=self.period)
-
-    def check(self, user_id: int):
-        # 특정 기간 동안 사용자가 생성한 토큰 수를 계산
-        token_count = self.db.query(TokenRateLimitModel).filter(
-            TokenRateLimitModel.user_id == user_id,
-            TokenRateLimitModel.created_at >= self.start_time
-        ).count()
-
-        if token_count >= self.max_tokens:
-            raise HTTPException(status_code=429, detail="Too many requests, try again later.")
-
-        # Rate limit 기록 추가
-        rate_limit = self.db.query(TokenRateLimitModel).filter_by(user_id=user_id).first()
-
-        if rate_limit:
-            # last_attempt을 offset-aware로 변환
-            if rate_limit.last_attempt.tzinfo is None:
-                last_attempt_aware = rate_limit.last_attempt.replace(tzinfo=timezone.utc)
-            else:
-                last_attempt_aware = rate_limit.last_attempt  # 이미 offset-aware인 경우
-
-            if (self.now - last_attempt_aware).total_seconds() >= self.period * 60:
-                rate_limit.attempts = 0
-                rate_limit.last_attempt = self.now  # 새로운 시도로 업데이트
-        else:
-            rate_limit = TokenRateLimitModel(user_id=user_id, last_attempt=self.now, attempts=0)
-            self.db.add(rate_limit)
-
-        rate_limit.attempts += 1
-        self.db.commit()
\ No newline at end of file
+
+from config.config import get_settings
+
+
+# 프로세스 내부 슬라이딩 윈도우 (키별 최근 요청 시각 목록)
+# 키마다 기간(period)을 함께 보관하여, 정리 시 각 키를 자신의 기간 기준으로 판단한다.
+# 워커마다 별도로 집계되므로 실제 허용량은 워커 수만큼 늘어난다. 여러 워커에서 공유하려면 RedisBackend 사용.
+class InMemoryBackend:
+    SWEEP_EVERY = 1000  # 이 횟수마다 비어 있는 키 정리
+
+    def __init__(self):
+        self._hits: Dict[str, Deque[float]] = {}
+        self._periods: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self._calls = 0
+
+    async def hit(self, key: str, limit: int, period: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        async with self._lock:
+            window = self._hits.setdefault(key, deque())
+            self._periods[key] = period
+            while window and window[0] <= now - period:
+                window.popleft()
+            if len(window) >= limit:
+                return False, window[0] + period - now
+            window.append(now)
+
+            self._calls += 1
+            if self._calls % self.SWEEP_EVERY == 0:
+                self._sweep(now)
+        return True, 0.0
+
+    def _sweep(self, now: float):
+        for key in [k for k, w in self._hits.items() if not w or w[-1] <= now - self._periods[k]]:
+            del self._hits[key]
+            del self._periods[key]
+
+
+# Redis(또는 Redis 호환 서버) sorted set 기반 슬라이딩 윈도우, 워커/서버 간 공유
+# client를 주면 그 클라이언트(redis.asyncio 호환)를 사용
+class RedisBackend:
+    # 오래된 기록 삭제 -> 개수 확인 -> 허용 시 기록 추가를 원자적으로 처리
+    # 기록이 없는데 거절되는 경우(limit 0)는 기간 전체를 기다리도록 반환
+    SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local period = tonumber(ARGV[2])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - period)
+    if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+        redis.call('ZADD', KEYS[1], now, ARGV[4])
+        redis.call('PEXPIRE', KEYS[1], period)
+        return 0
+    end
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    if oldest[2] == nil then
+        return math.max(period, 1)
+    end
+    return tonumber(oldest[2]) + period - now
+    """
+
+    def __init__(self, url: str = None, client=None):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from e
+            client = redis.from_url(url)
+        self._client = client
+        self._script = self._client.register_script(self.SCRIPT)
+
+    async def hit(self, key: str, limit: int, period: float) -> Tuple[bool, float]:
+        now_ms = int(time.time() * 1000)
+        retry_after_ms = await self._script(
+            keys=[f"rate_limit:{key}"],
+            args=[now_ms, int(period * 1000), limit, f"{now_ms}-{uuid.uuid4().hex}"],
+        )
+        retry_after_ms = int(retry_after_ms)
+        return retry_after_ms == 0, retry_after_ms / 1000
+
+
+# RATE_LIMIT_BACKEND에 맞는 공용 저장소 (처음 사용할 때 생성)
+@lru_cache
+def get_rate_limit_backend():
+    settings = get_settings()
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend(settings.RATE_LIMIT_REDIS_URL)
+    return InMemoryBackend()
+
+
+# 라우트별 + 클라이언트 IP별 요청 제한 (FastAPI 의존성)
+# 예: @router.post("/login", dependencies=[Depends(RateLimit("login", 30, 600))])
+# setting을 지정하면 요청마다 설정의 setting(최대 요청 수)과 setting_PERIOD(기간) 값을 사용
+# 예: RateLimit("login", setting="LOGIN_RATE_LIMIT")
+class RateLimit:
+    def __init__(self, name: str, max_requests: int = None, period: float = None, backend=None, setting: str = None):
+        self.name = name
+        self.max_requests = max_requests
+        self.period = period  # 초 단위
+        self.backend = backend
+        self.setting = setting
+
+    def limits(self) -> Tuple[int, float]:
+        if self.setting is None:
+            return self.max_requests, self.period
+        settings = get_settings()
+        return getattr(settings, self.setting), getattr(settings, f"{self.setting}_PERIOD")
+
+    async def __call__(self, request: Request):
+        client_ip = request.client.host if request.client else "unknown"
+        max_requests, period = self.limits()
+        backend = self.backend or get_rate_limit_backend()
+        allowed, retry_after = await backend.hit(f"{self.name}:{client_ip}", max_requests, period)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, try again later.",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
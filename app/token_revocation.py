@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from config.config import get_settings
+from app.token_utils import ACCESS_TOKEN_EXPIRE_MINUTES, decode_jwt_token
+
+logger = logging.getLogger(__name__)
+
+TOKEN_LIFETIME_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+# 무상태 JWT 모드의 토큰 폐기(로그아웃) 목록
+# - jti 단위 폐기: 해당 토큰의 남은 수명 동안만 보관
+# - 사용자 단위 폐기: 로그아웃 시각 이전에 발급된 그 사용자의 모든 토큰을 무효화, 최대 토큰 수명 동안 보관
+# store_path가 주어지면 같은 호스트의 다른 워커와 SQLite 파일로 폐기 내역을 공유한다.
+class RevocationList:
+    def __init__(self, store_path: Optional[str] = None):
+        self._tokens: Dict[str, float] = {}  # jti -> 토큰 만료 시각(epoch)
+        self._users: Dict[int, float] = {}  # user_id -> 로그아웃 시각(epoch)
+        self._lock = threading.Lock()
+        self._store_path = store_path
+        self._synced_until = 0.0
+
+    def _remember(self, kind: str, key: str, revoked_at: float, expires_at: float):
+        with self._lock:
+            if kind == "jti":
+                self._tokens[key] = max(self._tokens.get(key, 0.0), expires_at)
+            else:
+                self._users[int(key)] = max(self._users.get(int(key), 0.0), revoked_at)
+
+    # 토큰 하나를 폐기
+    def revoke_token(self, jti: str, expires_at: float):
+        now = time.time()
+        if expires_at <= now:
+            return
+        self._remember("jti", jti, now, expires_at)
+        self._persist("jti", jti, now, expires_at)
+
+    # 사용자의 현재까지 발급된 모든 토큰을 폐기
+    def revoke_user(self, user_id: int):
+        now = time.time()
+        self._remember("sub", str(user_id), now, now + TOKEN_LIFETIME_SECONDS)
+        self._persist("sub", str(user_id), now, now + TOKEN_LIFETIME_SECONDS)
+
+    # 디코딩된 JWT claims가 폐기되었는지 확인 (DB 조회 없음)
+    def is_revoked(self, claims: dict) -> bool:
+        now = time.time()
+        token_expires_at = self._tokens.get(claims.get("jti"))
+        if token_expires_at is not None and token_expires_at > now:
+            return True
+        revoked_at = self._users.get(int(claims["sub"]))
+        if revoked_at is not None and revoked_at + TOKEN_LIFETIME_SECONDS > now:
+            return claims.get("iat", 0) <= revoked_at
+        return False
+
+    # 수명이 지난 항목 정리
+    def purge(self):
+        now = time.time()
+        with self._lock:
+            self._tokens = {jti: exp for jti, exp in self._tokens.items() if exp > now}
+            self._users = {
+                user_id: revoked_at for user_id, revoked_at in self._users.items()
+                if revoked_at + TOKEN_LIFETIME_SECONDS > now
+            }
+
+    def __len__(self):
+        return len(self._tokens) + len(self._users)
+
+    # 공유 저장소 (SQLite, 워커 간 공유)
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._store_path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS revocations ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, revoked_at REAL NOT NULL, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (kind, key))"
+        )
+        return conn
+
+    def _persist(self, kind: str, key: str, revoked_at: float, expires_at: float):
+        if not self._store_path:
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO revocations (kind, key, revoked_at, expires_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (kind, key) DO UPDATE SET revoked_at = excluded.revoked_at, "
+                    "expires_at = MAX(revocations.expires_at, excluded.expires_at)",
+                    (kind, key, revoked_at, expires_at),
+                )
+        finally:
+            conn.close()
+
+    # 다른 워커가 기록한 폐기 내역을 가져오고 만료된 행을 정리
+    def sync(self):
+        if self._store_path:
+            now = time.time()
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM revocations WHERE expires_at <= ?", (now,))
+                    rows = conn.execute(
+                        "SELECT kind, key, revoked_at, expires_at FROM revocations WHERE revoked_at >= ?",
+                        (self._synced_until,),
+                    ).fetchall()
+            finally:
+                conn.close()
+            for kind, key, revoked_at, expires_at in rows:
+                self._remember(kind, key, revoked_at, expires_at)
+            # 동기화 도중 기록된 항목을 놓치지 않도록 약간 겹치게 다음 구간을 잡는다
+            self._synced_until = now - 1.0
+        self.purge()
+
+    # 주기적으로 공유 저장소 동기화 및 만료 항목 정리
+    async def run_sync_loop(self, interval: float):
+        while True:
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception:
+                logger.exception("Failed to sync token revocation store")
+            await asyncio.sleep(interval)
+
+
+revocation_list = RevocationList(get_settings().REVOCATION_STORE_PATH)
+
+
+# 무상태 모드의 토큰 검증: 서명과 exp를 확인한 뒤 메모리의 폐기 목록만 확인한다
+def verify_stateless_token(token: str) -> dict:
+    claims = decode_jwt_token(token)
+    if revocation_list.is_revoked(claims):
+        raise ValueError("Token has been revoked")
+    return claims
@@ -12,11 +12,19 @@ from sqlalchemy.orm import session
 # token encoding, decoding
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # 로그인 토큰 발급
-def create_jwt_token(user_id: int) -> str:
-    expiration = datetime.now(timezone.utc) + timedelta(minutes=30)
-    to_encode = {"sub": user_id, "exp": expiration}
+# jti: 토큰 고유 ID (로그아웃 시 폐기 목록의 키), iat: 발급 시각 (사용자 단위 폐기 비교용, 초 단위 실수)
+def create_jwt_token(user_id: int, issued_at: datetime = None, expires_at: datetime = None) -> str:
+    issued_at = issued_at or datetime.now(timezone.utc)
+    expiration = expires_at or issued_at + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode = {
+        "sub": str(user_id),  # JWT 규격상 sub는 문자열
+        "jti": uuid.uuid4().hex,
+        "iat": issued_at.timestamp(),
+        "exp": expiration,
+    }
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -0,0 +1,288 @@
+# 인증/회원가입 API 벤치마크
+# 앱을 프로세스 안에서 띄우고(httpx ASGI 클라이언트, 네트워크/uvicorn 제외) 엔드포인트별로
+# 처리량(RPS), 지연 시간 p50/p95/p99, 요청당 SQL 실행 수를 측정한다.
+#
+# 준비: docker compose -f bench/docker-compose.yml up -d   (Postgres + SMTP 스텁)
+# 실행: python -m bench.run --requests 200 --concurrency 20
+#       python -m bench.run --json bench_output.json                       결과 저장
+#       python -m bench.run --baseline bench_output.json --max-regression 0.2   p95가 20% 넘게 느려지면 종료 코드 1
+# DB/SMTP 접속 정보는 아래 기본값 대신 환경변수(DB_HOST 등)로 바꿀 수 있다.
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import time
+import uuid
+
+# config는 import 시점에 환경변수를 읽으므로 앱 import 전에 기본값 설정
+BENCH_ENV = {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "bench",
+    "DB_USER": "bench",
+    "DB_PASSWORD": "bench",
+    "SECRET_KEY": "bench-secret",
+    "MAIL_SERVER": "127.0.0.1",
+    "MAIL_PORT": "1025",
+    "MAIL_FROM": "bench@example.com",
+    "MAIL_SSL_TLS": "false",
+    "MAIL_STARTTLS": "false",
+    "USE_CREDENTIALS": "false",
+    # 모든 요청이 같은 클라이언트 IP에서 오므로 요청 제한은 사실상 해제
+    "LOGIN_RATE_LIMIT": "1000000000",
+    "VERIFICATION_RATE_LIMIT": "1000000000",
+    "REAPER_ENABLED": "false",
+}
+for key, value in BENCH_ENV.items():
+    os.environ.setdefault(key, value)
+
+import httpx  # noqa: E402
+from sqlalchemy import event, select, text  # noqa: E402
+
+from app import database  # noqa: E402
+from app.models import EmailVerificationCode  # noqa: E402
+
+ENDPOINT_ORDER = [
+    "register", "check_user_email", "send_verification_code", "verify_code", "login", "current_sessions", "logout",
+]
+# 각 단계가 사용하는 데이터를 만드는 이전 단계 (--only로 빠져도 측정 없이 실행)
+REQUIRES = {
+    "check_user_email": ["register"],
+    "send_verification_code": ["register"],
+    "verify_code": ["register", "send_verification_code"],
+    "login": ["register"],
+    "current_sessions": ["register", "login"],
+    "logout": ["register", "login"],
+}
+
+# 현재 측정 중인 요청의 SQL 실행 수 ([count] 리스트, 측정 밖에서는 None)
+_query_counter = contextvars.ContextVar("bench_query_counter", default=None)
+
+
+def _count_query(*args):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def install_query_counter():
+    engines = [database.get_engine()]
+    if database.get_async_engine() is not None:
+        engines.append(database.get_async_engine().sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _count_query)
+
+
+def migrate(reset: bool):
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini"))
+    command.upgrade(config, "head")
+    if reset:
+        with database.get_engine().begin() as conn:
+            conn.execute(text("TRUNCATE users, email_verification_codes RESTART IDENTITY CASCADE"))
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class EndpointResult:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies = []
+        self.queries = 0
+        self.errors = 0
+        self.wall_seconds = 0.0
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "rps": round(count / self.wall_seconds, 1) if self.wall_seconds else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "queries_per_request": round(self.queries / count, 2) if count else 0.0,
+        }
+
+
+# make_request(i)를 0..count-1에 대해 concurrency개 작업자로 실행하며 측정
+async def measure(name: str, count: int, concurrency: int, make_request, expected=(200,)) -> EndpointResult:
+    result = EndpointResult(name)
+    indexes = iter(range(count))
+
+    async def worker():
+        for i in indexes:
+            counter = [0]
+            token = _query_counter.set(counter)
+            start = time.perf_counter()
+            try:
+                response = await make_request(i)
+            finally:
+                elapsed = time.perf_counter() - start
+                _query_counter.reset(token)
+            result.latencies.append(elapsed)
+            result.queries += counter[0]
+            if response.status_code not in expected:
+                result.errors += 1
+                if result.errors == 1:
+                    print(f"  {name}: unexpected {response.status_code} {response.text[:200]}", file=sys.stderr)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.wall_seconds = time.perf_counter() - start
+    return result
+
+
+async def run_benchmark(app, count: int, concurrency: int, only) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    password = "bench-password"
+    emails = [f"bench-{run_id}-{i}@example.com" for i in range(count)]
+    results = {}
+
+    selected = set(only or ENDPOINT_ORDER)
+    needed = selected | {dep for name in selected for dep in REQUIRES.get(name, ())}
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def step(name, make_request, expected=(200,)):
+            if name not in needed:
+                return
+            result = await measure(name, count, concurrency, make_request, expected)
+            if name in selected:
+                results[name] = result.summary()
+            print(f"  {name:24} done in {result.wall_seconds:.2f}s", file=sys.stderr)
+
+        async def register(i):
+            return await client.post(
+                "/register", json={"user_email": emails[i], "password": password, "phone_number": "010-0000-0000"}
+            )
+        await step("register", register)
+
+        # 절반은 가입된 이메일, 절반은 없는 이메일
+        async def check_user_email(i):
+            email = emails[i] if i % 2 == 0 else f"missing-{run_id}-{i}@example.com"
+            return await client.get(f"/check_user_email/{email}")
+        await step("check_user_email", check_user_email)
+
+        async def send_verification_code(i):
+            return await client.post("/send_verification_code", json={"user_email": emails[i]})
+        await step("send_verification_code", send_verification_code)
+
+        # 발송된 코드는 DB에서 직접 읽어 사용
+        with database.get_engine().connect() as conn:
+            codes = dict(conn.execute(
+                select(EmailVerificationCode.user_email, EmailVerificationCode.code)
+                .where(EmailVerificationCode.user_email.in_(emails))
+            ).all())
+
+        async def verify_code(i):
+            return await client.get("/verify_code", params={"email": emails[i], "code": codes.get(emails[i], "0")})
+        await step("verify_code", verify_code)
+
+        async def login(i):
+            return await client.post("/login", json={"user_email": emails[i], "password": password})
+        await step("login", login)
+
+        async def current_sessions(i):
+            return await client.get("/current_sessions", params={"limit": 100})
+        # 무상태 JWT 모드에서는 501
+        await step("current_sessions", current_sessions, expected=(200, 501))
+
+        async def logout(i):
+            return await client.post("/logout", json={"user_email": emails[i]})
+        await step("logout", logout)
+
+    return {name: results[name] for name in ENDPOINT_ORDER if name in results}
+
+
+def print_table(results: dict):
+    header = f"{'endpoint':24} {'reqs':>6} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'q/req':>6}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(
+            f"{name:24} {r['requests']:>6} {r['errors']:>5} {r['rps']:>8} {r['p50_ms']:>9} "
+            f"{r['p95_ms']:>9} {r['p99_ms']:>9} {r['queries_per_request']:>6}"
+        )
+
+
+# 기준 결과 대비 p95가 max_regression 비율 이상 늘었거나 요청당 쿼리 수가 늘어난 엔드포인트 목록
+def find_regressions(results: dict, baseline: dict, max_regression: float):
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["queries_per_request"] > base["queries_per_request"]:
+            regressions.append(
+                f"{name}: queries/request {base['queries_per_request']} -> {current['queries_per_request']}"
+            )
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {current['errors']}")
+    return regressions
+
+
+def start_smtp_stub(port: int):
+    try:
+        from aiosmtpd.controller import Controller
+        from aiosmtpd.handlers import Sink
+    except ImportError:
+        sys.exit("--smtp-stub requires the 'aiosmtpd' package")
+    controller = Controller(Sink(), hostname="127.0.0.1", port=port)
+    controller.start()
+    return controller
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.run")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="엔드포인트별 요청 수")
+    parser.add_argument("-c", "--concurrency", type=int, default=20)
+    parser.add_argument("--only", nargs="+", choices=ENDPOINT_ORDER, help="측정할 엔드포인트만 지정")
+    parser.add_argument("--reset", action="store_true", help="시작 전에 users/인증 코드 테이블 비우기")
+    parser.add_argument("--smtp-stub", action="store_true", help="docker 대신 프로세스 내 SMTP 스텁(aiosmtpd) 사용")
+    parser.add_argument("--json", metavar="PATH", help="결과를 JSON으로 저장")
+    parser.add_argument("--baseline", metavar="PATH", help="비교할 이전 결과(JSON)")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="허용할 p95 증가 비율 (기본 0.2)")
+    args = parser.parse_args(argv)
+
+    smtp = start_smtp_stub(int(os.environ["MAIL_PORT"])) if args.smtp_stub else None
+    try:
+        migrate(args.reset)
+        install_query_counter()
+
+        import main as app_main
+
+        results = asyncio.run(run_benchmark(app_main.app, args.requests, args.concurrency, args.only))
+    finally:
+        if smtp is not None:
+            smtp.stop()
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
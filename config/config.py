@@ -1,15 +1,171 @@
 import os
+from functools import lru_cache
+from typing import Optional
 
-# 환경변수 가져오기
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-
-# 환경변수 값 출력
-print(f"config, DB_HOST: {DB_HOST}")
-print(f"config, DB_PORT: {DB_PORT}")
-print(f"config, DB_NAME: {DB_NAME}")
-print(f"config, DB_USER: {DB_USER}")
-print(f"config, DB_PASSWORD: {DB_PASSWORD}")  # 민감한 정보이므로 실제로는 로그에 남기지 않는 것이 좋습니다.
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+# 환경변수 설정
+# 필드 이름이 곧 환경변수 이름이며, 값은 타입에 맞게 변환/검증된다. (잘못된 값이면 시작 시 오류)
+# bool 값은 true/false, 1/0, yes/no, on/off를 받는다.
+# 사용: 값을 쓰는 시점에 get_settings().DB_HOST
+# (`from config.config import DB_HOST`는 import 시점의 값으로 고정되어 get_settings.cache_clear() 후에도 바뀌지 않음,
+#  워커별 캐시/큐 등 모듈 수준 객체의 크기 설정은 객체를 만드는 import 시점에 한 번 읽는다)
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(case_sensitive=True, frozen=True)
+
+    # 데이터베이스
+    DB_HOST: Optional[str] = None
+    DB_PORT: Optional[str] = None
+    DB_NAME: Optional[str] = None
+    DB_USER: Optional[str] = None
+    DB_PASSWORD: Optional[str] = Field(None, repr=False)
+    # true면 asyncpg 기반 AsyncSession, false면 기존 동기 Session(스레드풀에서 실행) 사용
+    DB_ASYNC: bool = True
+
+    # 커넥션 풀 설정 (워커 프로세스마다 별도의 풀이 생성됨)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30  # 커넥션 대기 최대 시간(초)
+    DB_POOL_RECYCLE: int = 1800  # 커넥션 재사용 최대 시간(초), -1이면 비활성화
+    DB_POOL_PRE_PING: bool = True
+    # 서버 시작 시 미리 열어 둘 커넥션 수 (DB_POOL_SIZE 이하), 0이면 첫 요청 때 연결
+    DB_POOL_WARMUP: int = 2
+
+    # 읽기 전용 복제 서버 (설정하지 않으면 모든 조회를 주 서버에서 처리), 계정/DB 이름은 주 서버와 같음
+    DB_REPLICA_HOST: Optional[str] = None
+    DB_REPLICA_PORT: Optional[str] = None  # 없으면 DB_PORT
+    DB_REPLICA_MAX_LAG: float = 5  # 기본 허용 복제 지연(초), 엔드포인트별로 따로 지정 가능
+    DB_REPLICA_CHECK_INTERVAL: float = 1  # 복제 지연 확인 주기(초)
+
+    # 비밀번호 해시(bcrypt) 작업자 풀 설정
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # thread 또는 process
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # 초과 시 503 반환
+
+    # 무상태 JWT 모드: true면 토큰을 tokens 테이블에 저장하지 않고 서명/만료 시간만으로 검증
+    JWT_STATELESS: bool = False
+    # 로그아웃(토큰 폐기) 목록을 같은 호스트의 워커들과 공유할 SQLite 파일 경로 (없으면 프로세스 내부에서만 유지)
+    REVOCATION_STORE_PATH: Optional[str] = None
+    REVOCATION_SYNC_INTERVAL: float = 2  # 공유 저장소 동기화 주기(초)
+
+    # 인증 사용자 캐시 (토큰 -> 디코딩된 claims, User), 워커 프로세스마다 별도
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL: float = 60  # 최대 보관 시간(초), 토큰 만료 시각을 넘지 않음
+
+    # 요청 제한(슬라이딩 윈도우) 설정
+    RATE_LIMIT_BACKEND: str = "memory"  # memory(워커별) 또는 redis(공유)
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    LOGIN_RATE_LIMIT: int = 30  # IP당 기간 내 최대 로그인 요청 수
+    LOGIN_RATE_LIMIT_PERIOD: float = 600  # 초
+    VERIFICATION_RATE_LIMIT: int = 5  # IP당 기간 내 최대 인증 메일 요청 수
+    VERIFICATION_RATE_LIMIT_PERIOD: float = 60  # 초
+
+    # 메일(SMTP) 설정
+    MAIL_USERNAME: Optional[str] = None
+    MAIL_PASSWORD: Optional[str] = Field(None, repr=False)
+    MAIL_FROM: Optional[str] = None
+    MAIL_PORT: int = 465
+    MAIL_SERVER: Optional[str] = None
+    MAIL_SSL_TLS: bool = True
+    MAIL_STARTTLS: bool = False
+    USE_CREDENTIALS: bool = True
+    VALIDATE_CERTS: bool = True
+    MAIL_TIMEOUT: float = 30
+    MAIL_POOL_SIZE: int = 4  # 워커당 유지할 SMTP 연결 수
+    MAIL_POOL_MAX_IDLE: float = 30  # 이 시간(초) 이상 쉬었던 연결은 NOOP으로 상태 확인
+
+    # 메일 발송 큐 설정 (워커 프로세스마다 별도)
+    EMAIL_QUEUE_SIZE: int = 1000  # 초과 시 503 반환
+    EMAIL_WORKERS: int = 2
+    EMAIL_BATCH_SIZE: int = 20  # SMTP 세션 하나로 보낼 최대 메일 수
+    EMAIL_MAX_RETRIES: int = 5
+    EMAIL_RETRY_BASE_DELAY: float = 1  # 재시도 대기(초), 시도마다 2배
+    EMAIL_DEAD_LETTER_SIZE: int = 1000
+    EMAIL_DRAIN_TIMEOUT: float = 10  # 종료 시 큐에 남은 메일을 발송할 최대 시간(초)
+    # 메일 발송 방식: inprocess(API 워커의 메일 큐에서 발송) 또는
+    # outbox(email_outbox 테이블에 넣기만 하고 별도 프로세스 `python -m app.mail_worker`가 발송)
+    EMAIL_DELIVERY_MODE: str = "inprocess"
+    EMAIL_OUTBOX_POLL_INTERVAL: float = 1  # 발송할 메일이 없을 때 다시 확인할 주기(초)
+    EMAIL_OUTBOX_LEASE: float = 60  # 가져간 메일을 이 시간(초) 안에 처리하지 못하면(작업자 비정상 종료 등) 다시 발송
+
+    # 만료 데이터 정리(reaper) 설정, 워커마다 실행되지만 SKIP LOCKED로 같은 행을 중복 삭제하지 않음
+    REAPER_ENABLED: bool = True
+    REAPER_INTERVAL: float = 60  # 실행 주기(초)
+    REAPER_BATCH_SIZE: int = 5000  # DELETE 한 번에 지울 최대 행 수
+    REAPER_MAX_BATCHES: int = 20  # 한 주기에 실행할 최대 DELETE 횟수(테이블별)
+    VERIFICATION_CODE_RETENTION: float = 86400  # 만료 후 보관 시간(초)
+    TOKEN_PARTITION_PREMAKE_DAYS: int = 3  # tokens 파티션 미리 생성 일수
+    # false면 워커 reaper는 파티션 생성/삭제를 하지 않음 (`python -m app.cli maintain-partitions`를 cron 등으로 실행)
+    REAPER_MAINTAIN_PARTITIONS: bool = True
+    TOKEN_PARTITION_LOCK_TIMEOUT: float = 2  # 파티션 DDL이 tokens 잠금을 기다릴 최대 시간(초), 넘으면 다음 주기에 재시도
+
+    # 관리자 API(/admin) 인증 토큰, 설정하지 않으면 관리자 API 비활성화
+    ADMIN_TOKEN: Optional[str] = Field(None, repr=False)
+    # 사용자 일괄 가져오기/내보내기
+    BULK_IMPORT_BATCH_SIZE: int = 1000  # INSERT 한 번에 넣을 최대 행 수
+    BULK_EXPORT_BATCH_SIZE: int = 5000  # SELECT 한 번에 읽을 최대 행 수
+    BULK_HASH_WORKERS: int = Field(default_factory=lambda: os.cpu_count() or 1)  # 일괄 해시용 프로세스 수
+
+    # /check_user_email 가입 이메일 Bloom filter + 존재 확인 캐시 (워커마다 별도)
+    EMAIL_FILTER_ENABLED: bool = True
+    EMAIL_FILTER_CAPACITY: int = 1000000  # 최소 용량, 가입자 수의 2배 이상으로 생성
+    EMAIL_FILTER_ERROR_RATE: float = 0.001  # 오탐(DB 조회로 넘어가는) 비율
+    EMAIL_FILTER_REFRESH_INTERVAL: float = 5  # 다른 워커 가입분 반영 주기(초)
+    EMAIL_FILTER_REFRESH_OVERLAP: float = 60  # 반영 시 다시 읽을 updated_at 구간(초), 늦게 커밋된 트랜잭션 대비
+    EMAIL_FILTER_REBUILD_INTERVAL: float = 3600  # 전체 재생성 주기(초)
+    EMAIL_FILTER_MAX_STALENESS: float = 30  # 마지막 반영 후 이 시간(초)이 지나면 filter 대신 DB 조회
+    # true면 filter를 만든 뒤에 요청을 받기 시작 (false면 백그라운드에서 만들고 그동안은 DB 조회)
+    EMAIL_FILTER_WARM_ON_STARTUP: bool = False
+    EMAIL_EXISTS_CACHE_SIZE: int = 10000
+    EMAIL_EXISTS_CACHE_TTL: float = 300  # 초
+
+    # 로그인 시 기기 last_used 갱신을 모아서 한 번에 기록 (워커마다 별도, app/device_touch.py)
+    DEVICE_TOUCH_BUFFER_ENABLED: bool = True  # false면 로그인마다 바로 기록
+    DEVICE_TOUCH_FLUSH_INTERVAL: float = 10  # 기록 주기(초)
+    DEVICE_TOUCH_MAX_PENDING: int = 1000  # 이만큼 쌓이면 주기를 기다리지 않고 기록
+    DEVICE_TOUCH_RESOLUTION: float = 60  # last_used 정확도(초), 이 시간 안의 재로그인은 갱신하지 않음
+    DEVICE_TOUCH_KNOWN_SIZE: int = 100000  # 기기가 등록된 것으로 확인된 사용자 캐시 크기
+    DEVICE_TOUCH_KNOWN_TTL: float = 3600  # 초
+
+    # 요청별 SQL 계측 (Server-Timing 헤더, /internal/metrics, 느린 쿼리/N+1 경고 로그)
+    SQL_METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    SLOW_QUERY_LOG_PARAMS: bool = False  # false면 바인딩 값은 ?로 가려서 출력
+    N_PLUS_ONE_THRESHOLD: int = 5  # 한 요청에서 같은 SQL 반복 실행 경고 기준
+
+    # 서버 실행 (python -m app.server), 워커 프로세스끼리는 상태를 공유하지 않음 (app/server.py 참고)
+    WEB_SERVER: str = "uvicorn"  # uvicorn 또는 gunicorn
+    WEB_HOST: str = "0.0.0.0"
+    WEB_PORT: int = 8000
+    WEB_WORKERS: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    WEB_BACKLOG: int = 2048
+    WEB_KEEPALIVE: float = 5  # keep-alive 연결 유지 시간(초)
+    WEB_GRACEFUL_TIMEOUT: float = 30  # 종료 신호 후 처리 중인 요청을 기다릴 최대 시간(초)
+    WEB_MAX_REQUESTS: int = 0  # 워커가 이 수만큼 요청을 처리하면 재시작, 0이면 비활성화
+    WEB_ACCESS_LOG: bool = False
+    WEB_FORWARDED_ALLOW_IPS: str = "127.0.0.1"  # X-Forwarded-For를 신뢰할 프록시 IP
+    WORKER_INIT_HOOKS: str = ""  # 워커 시작 시 호출할 "모듈:함수" 목록 (쉼표 구분)
+
+
+# 환경변수는 처음 호출될 때 한 번만 읽는다. (테스트 등에서 다시 읽으려면 get_settings.cache_clear())
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+# `from config.config import DB_HOST` 형태의 기존 사용 방식 지원
+def __getattr__(name: str):
+    if name in Settings.model_fields:
+        return getattr(get_settings(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# 환경변수 값 출력 (비밀번호가 로그에 남으므로 비활성화)
+# print(f"config, DB_HOST: {DB_HOST}")
+# print(f"config, DB_PORT: {DB_PORT}")
+# print(f"config, DB_NAME: {DB_NAME}")
+# print(f"config, DB_USER: {DB_USER}")
+# print(f"config, DB_PASSWORD: {DB_PASSWORD}")  # 민감한 정보이므로 실제로는 로그에 남기지 않는 것이 좋습니다.
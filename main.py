@@ -1,7 +1,94 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends
-from app.routers import register, auth
+from app.routers import register, auth, user, internal, admin
+from app.database import dispose_engines, init_engines, replica_monitor
+from app.device_touch import device_touches
+from app.dependencies import session_scope
+from app.email_filter import user_email_index
+from app.email_queue import email_dispatcher
+from app.email_utils import get_verification_template, smtp_pool
+from app.password_utils import shutdown_password_executor
+from app.reaper import run_reaper_loop
+from app.serialization import AppJSONResponse
+from app.server import run_worker_init_hooks
+from app.sql_metrics import SQLMetricsMiddleware
+from app.token_revocation import revocation_list
+from config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# 서버 시작/종료 시 실행할 작업
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+
+    # DB 엔진 생성 및 커넥션 풀 미리 채우기 (요청별 SQL 계측은 엔진을 만들 때 연결됨, app/database.py)
+    await init_engines(warmup=settings.DB_POOL_WARMUP)
+
+    # 메일 템플릿을 미리 컴파일
+    get_verification_template()
+
+    # 메일 발송 작업자 시작 (outbox 모드에서는 별도 프로세스 `python -m app.mail_worker`가 발송)
+    if settings.EMAIL_DELIVERY_MODE != "outbox":
+        email_dispatcher.start()
+
+    background_tasks = []
+    # 복제 서버 지연 확인 (조회 전용 엔드포인트의 복제 서버/주 서버 선택에 사용)
+    if settings.DB_REPLICA_HOST:
+        background_tasks.append(asyncio.create_task(
+            replica_monitor.run_monitor_loop(settings.DB_REPLICA_CHECK_INTERVAL)
+        ))
+    # 무상태 JWT 모드: 토큰 폐기 목록 동기화/정리
+    if settings.JWT_STATELESS:
+        background_tasks.append(asyncio.create_task(revocation_list.run_sync_loop(settings.REVOCATION_SYNC_INTERVAL)))
+    # 가입 이메일 filter 생성(첫 실행) 후 다른 워커 가입분 주기적으로 반영, 준비 전에는 DB 조회
+    if settings.EMAIL_FILTER_ENABLED:
+        if settings.EMAIL_FILTER_WARM_ON_STARTUP:
+            await user_email_index.warm(session_scope)
+        background_tasks.append(asyncio.create_task(
+            user_email_index.run_refresh_loop(session_scope, settings.EMAIL_FILTER_REFRESH_INTERVAL)
+        ))
+    # 만료된 토큰/인증 코드 정리
+    if settings.REAPER_ENABLED:
+        background_tasks.append(asyncio.create_task(run_reaper_loop(settings.REAPER_INTERVAL)))
+
+    # 로그인 시 기기 last_used 갱신 모아서 기록
+    if settings.DEVICE_TOUCH_BUFFER_ENABLED:
+        background_tasks.append(asyncio.create_task(
+            device_touches.run_flush_loop(session_scope, settings.DEVICE_TOUCH_FLUSH_INTERVAL)
+        ))
+
+    # 워커별 추가 초기화 (WORKER_INIT_HOOKS)
+    await run_worker_init_hooks(app, settings.WORKER_INIT_HOOKS)
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    # 버퍼에 남은 기기 갱신 기록
+    try:
+        await device_touches.flush(session_scope)
+    except Exception:
+        logger.exception("Device touch flush failed on shutdown")
+    # 큐에 남은 메일 발송 후 작업자 종료, 유휴 SMTP 연결 종료
+    await email_dispatcher.stop(timeout=settings.EMAIL_DRAIN_TIMEOUT)
+    await smtp_pool.close()
+    # 비밀번호 해시 작업자 풀 정리
+    shutdown_password_executor()
+    # DB 커넥션 정리
+    await dispose_engines()
+
+# JSON 응답은 orjson으로 직렬화 (검증된 데이터를 바로 반환하는 경로는 app/serialization.py 참고)
+app = FastAPI(lifespan=lifespan, default_response_class=AppJSONResponse)
 
-app = FastAPI()
+# 요청별 SQL 수/DB 시간 계측 (엔진 이벤트 등록은 lifespan에서)
+if get_settings().SQL_METRICS_ENABLED:
+    app.add_middleware(SQLMetricsMiddleware)
 
 # 라우터 등록
 
@@ -10,9 +97,13 @@ app = FastAPI()
 #     return {"username": "test"}
 (app.include_router(register.router))
 (app.include_router(auth.router))
+(app.include_router(user.router))
+(app.include_router(internal.router))
+(app.include_router(admin.router))
 
 
+# 스키마 생성/변경은 `alembic upgrade head`로 실행
 # from app.database import init_db
 #
 # if __name__ == "__main__":
-#     init_db()
\ No newline at end of file
+#     init_db()
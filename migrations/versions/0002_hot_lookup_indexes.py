@@ -0,0 +1,57 @@
+"""hot lookup indexes
+
+로그인/인증/인증 코드 조회에서 사용하는 복합 인덱스와 lower(user_email) 함수 인덱스 추가.
+운영 중인 테이블을 잠그지 않도록 PostgreSQL에서는 CREATE INDEX CONCURRENTLY로 생성한다.
+CONCURRENTLY 생성이 중간에 실패하면 같은 이름의 INVALID 인덱스가 남으므로, 다시 실행할 때 INVALID 인덱스는
+지우고 새로 만든다.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 19:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (인덱스 이름, 테이블, 컬럼/표현식)
+INDEXES = [
+    ('ix_tokens_user_id_expires_at', 'tokens', ['user_id', 'expires_at']),
+    ('ix_user_devices_user_id', 'user_devices', ['user_id']),
+    ('ix_referrals_referrer_id_referred_id', 'referrals', ['referrer_id', 'referred_id']),
+    ('ix_email_verification_codes_lower_user_email', 'email_verification_codes', [sa.text('lower(user_email)')]),
+    ('ix_email_verification_codes_user_email_code', 'email_verification_codes', ['user_email', 'code']),
+]
+
+
+# None(없음), True(유효), False(INVALID: CONCURRENTLY 생성 실패)
+def _index_valid(name: str):
+    return op.get_bind().execute(
+        sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            valid = _index_valid(name)
+            if valid is False:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            if not valid:
+                op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
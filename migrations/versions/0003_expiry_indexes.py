@@ -0,0 +1,39 @@
+"""expiry indexes
+
+만료 데이터 정리(app/reaper.py)에서 expires_at < cutoff 조건으로 배치 삭제할 때 사용하는 인덱스.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 19:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_tokens_expires_at', 'tokens', ['expires_at']),
+    ('ix_email_verification_codes_expires_at', 'email_verification_codes', ['expires_at']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
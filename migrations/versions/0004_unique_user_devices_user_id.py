@@ -0,0 +1,62 @@
+"""unique user_devices.user_id
+
+로그인 시 기기 갱신(app/device_touch.py, crud.touch_device)을 INSERT ... ON CONFLICT (user_id)로 처리하기 위해
+사용자당 기기를 1개로 제한한다. 중복 행은 device_id가 가장 큰 행만 남기고 삭제하며,
+고유 인덱스가 기존 ix_user_devices_user_id를 대신한다.
+중복 삭제와 인덱스 생성 사이에 중복 행이 다시 들어와 CONCURRENTLY 생성이 실패하면 INVALID 인덱스가 남으므로,
+다시 실행할 때 INVALID 인덱스를 지우고 새로 만들며 생성 후에도 유효하지 않으면 오류로 중단한다.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 20:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+
+# None(없음), True(유효), False(INVALID: CONCURRENTLY 생성 실패)
+def _index_valid(name: str):
+    return op.get_bind().execute(
+        sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "DELETE FROM user_devices d USING user_devices newer "
+        "WHERE newer.user_id = d.user_id AND newer.device_id > d.device_id"
+    )
+    with op.get_context().autocommit_block():
+        valid = _index_valid('uq_user_devices_user_id')
+        if valid is False:
+            op.drop_index('uq_user_devices_user_id', table_name='user_devices', postgresql_concurrently=True)
+        if not valid:
+            op.create_index('uq_user_devices_user_id', 'user_devices', ['user_id'], unique=True,
+                            postgresql_concurrently=True)
+        if not _index_valid('uq_user_devices_user_id'):
+            raise RuntimeError(
+                "uq_user_devices_user_id is INVALID; remove duplicate user_devices rows and rerun the migration"
+            )
+        op.drop_index('ix_user_devices_user_id', table_name='user_devices',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_user_devices_user_id', 'user_devices', ['user_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('uq_user_devices_user_id', table_name='user_devices',
+                      postgresql_concurrently=True, if_exists=True)
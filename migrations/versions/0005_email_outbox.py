@@ -0,0 +1,44 @@
+"""email outbox
+
+EMAIL_DELIVERY_MODE=outbox일 때 API 워커가 인증 메일을 넣고 별도 메일 작업자 프로세스(app/mail_worker.py)가
+FOR UPDATE SKIP LOCKED로 가져가 발송하는 대기열 테이블.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 21:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('email_outbox',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('recipient_email', sa.String(), nullable=False),
+    sa.Column('verification_code', sa.String(length=10), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('dead', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_email_outbox_next_attempt_at', 'email_outbox', ['next_attempt_at'], unique=False,
+                    postgresql_where=sa.text('NOT dead'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_outbox_next_attempt_at', table_name='email_outbox', postgresql_where=sa.text('NOT dead'))
+    op.drop_table('email_outbox')
@@ -0,0 +1,42 @@
+"""users updated_at index
+
+가입 이메일 filter(app/email_filter.py)가 다른 워커의 가입/이메일 변경을 (updated_at, user_id) 순서로
+증분 반영할 때 사용하는 인덱스.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        valid = op.get_bind().execute(sa.text(
+            "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass('ix_users_updated_at')"
+        )).scalar()
+        if valid:
+            return
+        if valid is False:
+            # 이전 CONCURRENTLY 생성이 실패하여 INVALID로 남은 인덱스는 지우고 다시 생성
+            op.drop_index('ix_users_updated_at', table_name='users', postgresql_concurrently=True)
+        op.create_index('ix_users_updated_at', 'users', ['updated_at', 'user_id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_updated_at', table_name='users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,36 @@
+"""drop lower(user_email) verification code index
+
+인증 코드는 소문자로 정규화한 이메일로 저장/조회하므로(crud.create_verification_code, verify_verification_code)
+lower(user_email) 함수 인덱스를 사용하는 쿼리가 없다. 쓰기 비용만 늘리므로 삭제한다.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_email_verification_codes_lower_user_email', table_name='email_verification_codes',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_email_verification_codes_lower_user_email', 'email_verification_codes',
+                        [sa.text('lower(user_email)')], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
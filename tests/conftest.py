@@ -0,0 +1,146 @@
+import asyncio
+import os
+import socket
+import sys
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+# 프로젝트 루트(main.py, app/, config/)를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# 환경변수를 바꾸고 설정을 다시 읽음 (호출 시점에 get_settings()를 읽는 코드에 반영), 끝나면 원래대로
+@pytest.fixture
+def override_settings(monkeypatch):
+    from config.config import get_settings
+
+    def override(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        get_settings.cache_clear()
+    yield override
+    monkeypatch.undo()
+    get_settings.cache_clear()
+
+
+# 로컬 PostgreSQL(DB_* 환경변수, `alembic upgrade head` 적용)이 필요한 테스트용, 연결할 수 없으면 건너뜀
+@pytest.fixture(scope="session")
+def database():
+    from app.database import get_engine
+
+    if not os.getenv("DB_HOST"):
+        pytest.skip("DB_HOST is not set")
+    try:
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        pytest.skip(f"database is not available: {e}")
+    return get_engine()
+
+
+# 코루틴을 새 이벤트 루프에서 실행 (async 엔진은 루프에 묶이므로 끝나면 엔진 정리)
+@pytest.fixture
+def run_async():
+    from app.database import dispose_engines
+
+    def run(coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                await dispose_engines()
+        return asyncio.run(main())
+    return run
+
+
+# 백그라운드 작업(리퍼, 이메일 필터 갱신)을 끈 API 클라이언트
+@pytest.fixture
+def client(database, override_settings):
+    from fastapi.testclient import TestClient
+
+    # 요청 밖에서 SQL을 실행하는 백그라운드 작업은 끄고 실행
+    override_settings(REAPER_ENABLED="false", EMAIL_FILTER_ENABLED="false")
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+# 테스트용 사용자 생성 (비밀번호 password123), 끝나면 토큰/기기/추천 관계와 함께 삭제
+@pytest.fixture
+def make_user(database):
+    from app.password_utils import get_password_hash
+
+    password = "password123"
+    password_hash = get_password_hash(password)
+    user_ids = []
+
+    def make(prefix: str = "user"):
+        email = f"{prefix}-{uuid.uuid4().hex[:12]}@fixture.example.com"
+        with database.begin() as conn:
+            user_id = conn.execute(text(
+                "INSERT INTO users (user_email, password, phone_number, created_at, updated_at) "
+                "VALUES (:email, :password, '1', now(), now()) RETURNING user_id"
+            ), {"email": email, "password": password_hash}).scalar()
+        user_ids.append(user_id)
+        return {"user_id": user_id, "user_email": email, "password": password}
+
+    yield make
+    with database.begin() as conn:
+        for table in ("tokens", "user_devices"):
+            conn.execute(text(f"DELETE FROM {table} WHERE user_id = ANY(:ids)"), {"ids": user_ids})
+        conn.execute(
+            text("DELETE FROM referrals WHERE referrer_id = ANY(:ids) OR referred_id = ANY(:ids)"), {"ids": user_ids}
+        )
+        conn.execute(text("DELETE FROM users WHERE user_id = ANY(:ids)"), {"ids": user_ids})
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user("login")
+
+
+# 로그인해서 받은 토큰의 Authorization 헤더
+@pytest.fixture
+def auth_headers(client, user):
+    response = client.post("/login", json={"user_email": user["user_email"], "password": user["password"]})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+# 로컬 stub SMTP 서버: reject로 시작하는 수신자는 영구 거부(550), busy로 시작하는 수신자는 일시 거부(451),
+# 나머지는 기록
+class RecordingHandler:
+    def __init__(self):
+        self.recipients = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("reject"):
+            return "550 No such user"
+        if address.startswith("busy"):
+            return "451 Try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recipients.extend(envelope.rcpt_tos)
+        return "250 Message accepted"
+
+
+@pytest.fixture
+def smtp_stub(override_settings):
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    handler = RecordingHandler()
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    override_settings(
+        MAIL_SERVER="127.0.0.1", MAIL_PORT=port, MAIL_SSL_TLS="false", MAIL_STARTTLS="false",
+        USE_CREDENTIALS="false", MAIL_FROM="noreply@example.com",
+    )
+    yield handler
+    controller.stop()
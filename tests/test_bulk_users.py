@@ -0,0 +1,58 @@
+import asyncio
+import json
+import uuid
+
+from sqlalchemy import text
+
+from app import bulk_users
+from app.password_utils import get_password_hash
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def _records(data: bytes, fmt: str, size: int = 7):
+    return [record async for record in bulk_users.iter_records(bulk_users.iter_lines(_chunks(data, size)), fmt)]
+
+
+# UTF-8이 아닌 줄은 그 줄의 오류로 보고하고 다음 줄부터 계속 읽음 (청크 경계와 무관)
+def test_invalid_utf8_line_is_reported_per_row():
+    data = b'{"user_email": "a@example.com"}\n\xff\xfe{"user_email": "b"}\n{"user_email": "c\xc3\xa9@example.com"}\n'
+    records = asyncio.run(_records(data, "ndjson"))
+    assert records == [
+        (1, {"user_email": "a@example.com"}, None),
+        (2, None, "invalid UTF-8 at byte 0"),
+        (3, {"user_email": "cé@example.com"}, None),
+    ]
+
+    data = b"user_email,phone_number\r\na@example.com,1\r\n\xe4,2\r\nb@example.com,3\r\n"
+    records = asyncio.run(_records(data, "csv"))
+    assert [(line_no, error) for line_no, _, error in records] == [(2, None), (3, "invalid UTF-8 at byte 0"), (4, None)]
+
+
+def test_admin_import_mixed_valid_and_invalid_lines(client, database, override_settings):
+    override_settings(ADMIN_TOKEN="secret-admin")
+    suffix = uuid.uuid4().hex[:12]
+    password_hash = get_password_hash("password123")
+    valid = [
+        json.dumps({"user_email": f"bulk-{i}-{suffix}@fixture.example.com", "password_hash": password_hash,
+                    "phone_number": "1"}).encode()
+        for i in range(2)
+    ]
+    body = b"\n".join([valid[0], b'{"user_email": "\xff@fixture.example.com"}', b"{not json", valid[1]]) + b"\n"
+    try:
+        response = client.post("/admin/users/import", content=body, headers={"X-Admin-Token": "secret-admin"})
+        assert response.status_code == 200
+        items = [json.loads(line) for line in response.text.splitlines()]
+        assert [(item["line"], item["error"].split(":")[0]) for item in items[:-1]] == [
+            (2, "invalid UTF-8 at byte 16"), (3, "invalid JSON"),
+        ]
+        assert items[-1] == {"summary": {"received": 4, "inserted": 2, "failed": 2}}
+    finally:
+        with database.begin() as conn:
+            inserted = conn.execute(
+                text("DELETE FROM users WHERE user_email LIKE :pattern"), {"pattern": f"bulk-%-{suffix}@%"}
+            ).rowcount
+    assert inserted == 2
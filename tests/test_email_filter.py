@@ -0,0 +1,106 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.dependencies import session_scope
+from app.email_filter import BloomFilter, UserEmailIndex
+
+
+def _index(**overrides) -> UserEmailIndex:
+    options = dict(capacity=1000, error_rate=0.001, cache_size=100, cache_ttl=60,
+                   refresh_overlap=60, rebuild_interval=3600, max_staleness=30)
+    options.update(overrides)
+    return UserEmailIndex(**options)
+
+
+def _email(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:12]}@filter.test"
+
+
+def _insert_user(conn, email: str, updated_at: datetime, user_id: int = None) -> int:
+    return conn.execute(text(
+        "INSERT INTO users (user_id, user_email, password, phone_number, created_at, updated_at) "
+        "VALUES (COALESCE(:user_id, nextval(pg_get_serial_sequence('users', 'user_id'))), :email, 'x', '1', "
+        ":updated_at, :updated_at) RETURNING user_id"
+    ), {"user_id": user_id, "email": email, "updated_at": updated_at}).scalar()
+
+
+def _cleanup(database):
+    with database.begin() as conn:
+        conn.execute(text("DELETE FROM users WHERE user_email LIKE '%@filter.test'"))
+
+
+def test_concurrent_adds_keep_every_bit():
+    bloom = BloomFilter(200000, 0.001)
+    values = [f"user{i}@example.com" for i in range(40000)]
+    thread = threading.Thread(target=bloom.add_many, args=(values[::2],))
+    thread.start()
+    for value in values[1::2]:
+        bloom.add(value)
+    thread.join()
+    assert all(bloom.might_contain(value) for value in values)
+    # 이미 있던 값은 세지 않음
+    bloom.add(values[0])
+    assert bloom.count <= len(values)
+
+
+def test_refresh_picks_up_late_commits_and_email_changes(database, run_async):
+    index = _index()
+    now = datetime.utcnow()
+    try:
+        run_async(index.warm(session_scope))
+
+        # 먼저 번호를 받았지만 더 큰 user_id보다 늦게 커밋된 가입
+        with database.begin() as conn:
+            reserved_id = conn.execute(text("SELECT nextval(pg_get_serial_sequence('users', 'user_id'))")).scalar()
+        early = _email("early")
+        later = _email("later")
+        with database.begin() as conn:
+            _insert_user(conn, later, now)
+        run_async(index.refresh(session_scope))
+        with database.begin() as conn:
+            _insert_user(conn, early, now - timedelta(seconds=5), user_id=reserved_id)
+        run_async(index.refresh(session_scope))
+        assert not index.definitely_absent(later)
+        assert not index.definitely_absent(early)
+
+        # 다른 워커에서 바꾼 이메일
+        changed = _email("changed")
+        with database.begin() as conn:
+            conn.execute(text("UPDATE users SET user_email = :new, updated_at = :now WHERE user_email = :old"),
+                         {"new": changed, "now": datetime.utcnow(), "old": later})
+        assert index.definitely_absent(changed)
+        run_async(index.refresh(session_scope))
+        assert not index.definitely_absent(changed)
+    finally:
+        _cleanup(database)
+
+
+def test_stale_filter_falls_back_to_database(database, run_async):
+    index = _index(max_staleness=30)
+    run_async(index.warm(session_scope))
+    email = _email("absent")
+    assert index.definitely_absent(email)
+    # 반영이 오래 실패하면 filter를 믿지 않음
+    index._refreshed_at = time.monotonic() - 31
+    assert not index.definitely_absent(email)
+
+
+def test_periodic_rebuild(database, run_async):
+    index = _index(rebuild_interval=0)
+    try:
+        run_async(index.warm(session_scope))
+        built_at = index._built_at
+        # updated_at이 비어 있어 증분 반영에서 빠지는 행도 전체 재생성에서 반영
+        email = _email("nulls")
+        with database.begin() as conn:
+            user_id = _insert_user(conn, email, datetime.utcnow())
+            conn.execute(text("UPDATE users SET updated_at = NULL WHERE user_id = :id"), {"id": user_id})
+        run_async(index.refresh(session_scope))
+        assert index._built_at > built_at
+        assert not index.definitely_absent(email)
+    finally:
+        _cleanup(database)
@@ -0,0 +1,76 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.email_queue import EmailDispatcher
+from app.email_utils import SMTPConnectionPool
+
+
+def _dispatcher(**overrides) -> EmailDispatcher:
+    options = dict(workers=2, queue_size=100, batch_size=5, max_retries=1, retry_base_delay=0.01,
+                   dead_letter_size=10)
+    options.update(overrides)
+    return EmailDispatcher(SMTPConnectionPool(size=2, max_idle=30), **options)
+
+
+def test_dispatcher_sends_batches_through_stub(smtp_stub):
+    dispatcher = _dispatcher()
+
+    async def scenario():
+        dispatcher.start()
+        for i in range(12):
+            dispatcher.enqueue(f"user{i}@example.com", "123456")
+        await dispatcher.stop(timeout=10)
+        await dispatcher._pool.close()
+
+    asyncio.run(scenario())
+    assert sorted(smtp_stub.recipients) == sorted(f"user{i}@example.com" for i in range(12))
+    metrics = dispatcher.metrics()
+    assert metrics["sent"] == 12
+    assert metrics["batches"] < 12  # 여러 메일을 한 연결로 발송
+    assert metrics["dead_lettered"] == 0
+
+
+def _run_until_dead_lettered(dispatcher, *recipients):
+    async def scenario():
+        dispatcher.start()
+        for recipient in recipients:
+            dispatcher.enqueue(recipient, "123456")
+        for _ in range(200):
+            if dispatcher.dead_lettered:
+                break
+            await asyncio.sleep(0.01)
+        await dispatcher.stop(timeout=10)
+        await dispatcher._pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_temporary_failure_is_retried_then_dead_lettered(smtp_stub):
+    dispatcher = _dispatcher(max_retries=2)
+    _run_until_dead_lettered(dispatcher, "busy@example.com", "ok@example.com")
+    assert smtp_stub.recipients == ["ok@example.com"]
+    assert dispatcher.retried == 2
+    assert [job.recipient_email for job in dispatcher.dead_letters] == ["busy@example.com"]
+
+
+# 550 같은 영구 거부는 재시도하지 않고 바로 dead letter
+def test_permanent_rejection_is_dead_lettered_without_retry(smtp_stub):
+    dispatcher = _dispatcher(max_retries=5, retry_base_delay=10)
+    _run_until_dead_lettered(dispatcher, "reject@example.com", "ok@example.com")
+    assert smtp_stub.recipients == ["ok@example.com"]
+    assert dispatcher.retried == 0
+    [job] = dispatcher.dead_letters
+    assert (job.recipient_email, job.attempts) == ("reject@example.com", 1)
+    assert "550" in job.last_error
+
+
+def test_internal_api_requires_admin_token(override_settings):
+    from main import app
+
+    override_settings(ADMIN_TOKEN="secret-admin")
+    client = TestClient(app)
+    assert client.get("/internal/email_queue/dead_letters").status_code == 403
+    assert client.get("/internal/metrics/email_queue", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    response = client.get("/internal/email_queue/dead_letters", headers={"X-Admin-Token": "secret-admin"})
+    assert response.status_code == 200
@@ -0,0 +1,16 @@
+import pytest
+from sqlalchemy import text
+
+from app.cli import explain_plan, hot_queries, seq_scans
+
+
+# 주요 조회 쿼리가 인덱스를 쓸 수 있는지 확인 (python -m app.cli explain-hot-queries와 같은 검사)
+# 테스트 DB의 테이블은 작아서 플래너가 순차 스캔을 고르므로 enable_seqscan=off로 인덱스가 있는지만 본다.
+@pytest.mark.parametrize("name", [name for name, _ in hot_queries()])
+def test_hot_query_uses_index(database, name):
+    query = dict(hot_queries())[name]
+    with database.connect() as conn:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = explain_plan(conn, query)
+        conn.rollback()
+    assert list(seq_scans(plan)) == [], plan
@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+
+# /login은 사용자 조회 1회 + (처음 보는 기기 등록 1회) + 토큰 INSERT 1회로 끝나야 한다.
+class StatementCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(Engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, "before_cursor_execute", self)
+
+
+def _login(client, user):
+    with StatementCounter() as counter:
+        response = client.post("/login", json={"user_email": user["user_email"], "password": user["password"]})
+    assert response.status_code == 200, response.text
+    return counter.statements
+
+
+def test_login_statement_count(client, user, database):
+    first = _login(client, user)
+    assert len(first) == 3, first
+    assert first[0].lstrip().upper().startswith("SELECT")
+    assert sum("INSERT INTO user_devices" in statement for statement in first) == 1
+    assert sum("INSERT INTO tokens" in statement for statement in first) == 1
+
+    # 이미 등록된 기기의 재로그인은 last_used 갱신을 버퍼에 맡기고 쓰기 1회만
+    with database.begin() as conn:
+        conn.execute(text("DELETE FROM tokens WHERE user_id = :id"), {"id": user["user_id"]})
+    second = _login(client, user)
+    assert len(second) == 2, second
+    assert not any("user_devices" in statement for statement in second)
@@ -0,0 +1,84 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+from app import mail_worker
+from app.dependencies import session_scope
+from app.email_utils import SMTPConnectionPool
+from app.models import EmailOutbox
+
+
+@pytest.fixture
+def outbox(database):
+    suffix = uuid.uuid4().hex[:12]
+    ids = []
+
+    def add(*names):
+        now = datetime.now(timezone.utc)
+        rows = [
+            {"recipient_email": f"{name}-{suffix}@example.com", "verification_code": "123456",
+             "created_at": now, "next_attempt_at": now - timedelta(seconds=1)}
+            for name in names
+        ]
+        with database.begin() as conn:
+            added = conn.execute(insert(EmailOutbox).returning(EmailOutbox.id), rows).scalars().all()
+        ids.extend(added)
+        return dict(zip(added, (row["recipient_email"] for row in rows)))
+
+    yield add
+    with database.begin() as conn:
+        conn.execute(delete(EmailOutbox).where(EmailOutbox.id.in_(ids)))
+
+
+def _rows(database, ids):
+    with database.connect() as conn:
+        rows = conn.execute(select(EmailOutbox).where(EmailOutbox.id.in_(ids))).all()
+    return {row.recipient_email.split("-")[0]: row for row in rows}
+
+
+# python -m app.mail_worker --once: 발송할 메일을 모두 가져가 stub SMTP 서버로 보내고 결과를 기록한 뒤 종료
+def test_worker_once_sends_through_stub_and_records_failures(database, smtp_stub, outbox, override_settings):
+    override_settings(EMAIL_BATCH_SIZE=2, EMAIL_MAX_RETRIES=3, EMAIL_RETRY_BASE_DELAY=60)
+    added = outbox("ok1", "ok2", "ok3", "busy", "ok4", "reject", "ok5")
+
+    assert mail_worker.main(["--once"]) == 0
+
+    delivered = [email for email in added.values() if email.startswith("ok")]
+    assert sorted(email for email in smtp_stub.recipients if email in added.values()) == sorted(delivered)
+    rows = _rows(database, added)
+    # 보낸 행은 삭제
+    assert set(rows) == {"busy", "reject"}
+    # 451은 백오프 후 재시도하도록 남김
+    busy = rows["busy"]
+    assert (busy.attempts, busy.dead) == (1, False)
+    assert "451" in busy.last_error
+    assert busy.next_attempt_at > datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=30)
+    # 550은 재시도하지 않고 바로 dead
+    reject = rows["reject"]
+    assert (reject.attempts, reject.dead) == (1, True)
+    assert "550" in reject.last_error
+
+
+# 여러 작업자가 동시에 가져가도(FOR UPDATE SKIP LOCKED) 같은 행을 두 번 가져가지 않음
+def test_concurrent_claims_do_not_overlap(database, outbox, run_async):
+    added = outbox(*(f"ok{i}" for i in range(12)))
+    worker = mail_worker.OutboxMailWorker(
+        SMTPConnectionPool(size=1, max_idle=30), workers=4, batch_size=3, max_retries=3,
+        retry_base_delay=1, poll_interval=1, lease=60,
+    )
+
+    async def claim():
+        async with session_scope() as db:
+            return [row.id for row in await worker.claim(db)]
+
+    async def claim_all():
+        return await asyncio.gather(*(claim() for _ in range(4)))
+
+    claimed = [row_id for batch in run_async(claim_all()) for row_id in batch]
+    assert len(claimed) == len(set(claimed))
+    assert set(added) <= set(claimed)
+    # 가져간 행은 임대 시간 동안 다시 가져가지 않음
+    assert not set(added) & set(run_async(claim()))
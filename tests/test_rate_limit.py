@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app import token_rate_limit
+from app.token_rate_limit import InMemoryBackend, RateLimit, RedisBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sweep_keeps_keys_with_longer_period(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(token_rate_limit.time, "monotonic", clock)
+    backend = InMemoryBackend()
+    backend.SWEEP_EVERY = 1  # 요청마다 정리
+
+    async def scenario():
+        # 로그인 제한(600초 2회)에 걸린 IP
+        assert (await backend.hit("login:1.2.3.4", 2, 600))[0]
+        assert (await backend.hit("login:1.2.3.4", 2, 600))[0]
+        assert not (await backend.hit("login:1.2.3.4", 2, 600))[0]
+
+        # 61초 뒤 기간이 짧은 다른 제한(60초)의 요청이 정리를 실행해도 로그인 제한은 유지
+        clock.now += 61
+        assert (await backend.hit("send_verification_code:5.6.7.8", 5, 60))[0]
+        allowed, retry_after = await backend.hit("login:1.2.3.4", 2, 600)
+        assert not allowed
+        assert retry_after == 600 - 61
+
+        # 각자의 기간이 지난 키만 정리
+        clock.now += 60
+        await backend.hit("send_verification_code:9.9.9.9", 5, 60)
+        assert "send_verification_code:5.6.7.8" not in backend._hits
+        assert "login:1.2.3.4" in backend._hits
+
+        clock.now += 600
+        assert (await backend.hit("login:1.2.3.4", 2, 600))[0]
+
+    asyncio.run(scenario())
+
+
+# RedisBackend는 Redis 호환 서버(fakeredis, Lua 스크립트 실행에 lupa 필요)로 확인
+def _redis_backend():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return RedisBackend(client=fakeredis.FakeAsyncRedis())
+
+
+def test_redis_backend_allows_then_denies_with_retry_after(monkeypatch):
+    backend = _redis_backend()
+    now = [1000.0]
+    monkeypatch.setattr(token_rate_limit.time, "time", lambda: now[0])
+    app = FastAPI()
+
+    @app.post("/login", dependencies=[Depends(RateLimit("login", 2, 600, backend=backend))])
+    async def login():
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        assert client.post("/login").status_code == 200
+        now[0] += 100
+        assert client.post("/login").status_code == 200
+        now[0] += 50
+        response = client.post("/login")
+        assert response.status_code == 429
+        # 가장 오래된 요청(1000초)이 기간(600초)을 벗어나는 시각까지
+        assert response.headers["Retry-After"] == str(600 - 150)
+
+        # 거절된 요청은 기록되지 않으므로 가장 오래된 요청이 빠지면 다시 허용
+        now[0] = 1000.0 + 600.5
+        assert client.post("/login").status_code == 200
+        assert client.post("/login").status_code == 429
+
+
+def test_redis_backend_zero_limit():
+    backend = _redis_backend()
+
+    async def scenario():
+        allowed, retry_after = await backend.hit("blocked:1.2.3.4", 0, 60)
+        assert not allowed
+        assert retry_after == 60
+
+    asyncio.run(scenario())
@@ -0,0 +1,70 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app import crud
+from app.dependencies import session_scope
+
+
+def test_create_and_get_referral(database, run_async, make_user):
+    referrer, referred = make_user("referrer"), make_user("referred")
+
+    async def run():
+        async with session_scope() as db:
+            created = await crud.create_referral(db, referrer["user_email"], referred["user_email"])
+        async with session_scope() as db:
+            found = await crud.get_referral_by_emails(db, referrer["user_email"], referred["user_email"])
+            reverse = await crud.get_referral_by_emails(db, referred["user_email"], referrer["user_email"])
+        return created, found, reverse
+
+    created, found, reverse = run_async(run())
+    assert (created.referrer_id, created.referred_id) == (referrer["user_id"], referred["user_id"])
+    assert found.id == created.id
+    assert reverse is None
+
+
+def test_referral_unknown_user(database, run_async, make_user):
+    referrer = make_user("referrer")
+
+    async def run(func):
+        async with session_scope() as db:
+            await func(db, referrer["user_email"], "missing@fixture.example.com")
+
+    for func in (crud.create_referral, crud.get_referral_by_emails):
+        with pytest.raises(HTTPException) as excinfo:
+            run_async(run(func))
+        assert excinfo.value.status_code == 404
+
+
+# 조회 전용 관리자 API는 ReadDB 세션(복제 서버 우선, 없으면 주 서버)으로 처리
+def test_admin_referral_reads(client, make_user, database, override_settings):
+    override_settings(ADMIN_TOKEN="secret-admin")
+    headers = {"X-Admin-Token": "secret-admin"}
+    root, child, grandchild = make_user("root"), make_user("child"), make_user("grandchild")
+
+    # TestClient가 자기 이벤트 루프에서 async 엔진을 쓰고 있으므로 관계는 동기 엔진으로 추가
+    with database.begin() as conn:
+        conn.execute(
+            text("INSERT INTO referrals (referrer_id, referred_id, created_at) VALUES (:a, :b, now()), (:b, :c, now())"),
+            {"a": root["user_id"], "b": child["user_id"], "c": grandchild["user_id"]},
+        )
+
+    response = client.get(
+        "/admin/referrals/lookup",
+        params={"referrer_email": root["user_email"], "referred_email": child["user_email"]},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    assert (response.json()["referrer_id"], response.json()["referred_id"]) == (root["user_id"], child["user_id"])
+    response = client.get(
+        "/admin/referrals/lookup",
+        params={"referrer_email": root["user_email"], "referred_email": grandchild["user_email"]},
+        headers=headers,
+    )
+    assert response.status_code == 404
+
+    response = client.get(f"/admin/users/{root['user_id']}/referral_tree", params={"max_depth": 2}, headers=headers)
+    assert response.status_code == 200, response.text
+    [node] = response.json()["children"]
+    assert node["user_id"] == child["user_id"]
+    assert [grand["user_id"] for grand in node["children"]] == [grandchild["user_id"]]
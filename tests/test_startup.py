@@ -0,0 +1,43 @@
+import os
+
+from app.cli import _cumulative, _measure_import
+
+# main.py import 시간 예산 (python -m app.cli import-time --budget-ms와 같은 검사, 느린 CI에서는 환경변수로 조정)
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+
+
+# 새 인터프리터에서 import하므로 다른 테스트가 이미 import한 모듈의 영향을 받지 않는다.
+# import만으로 DB 엔진이 생성되거나 DB 드라이버가 로드되면 _measure_import가 RuntimeError를 낸다.
+def test_main_import_time_within_budget():
+    best_ms = min(_cumulative(_measure_import("main"), "main") for _ in range(3)) / 1000
+    assert best_ms <= IMPORT_BUDGET_MS, f"import main took {best_ms:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
+
+
+# DB_ASYNC=true이면 서버 시작 시 비동기 엔진만 만들고 동기 엔진은 만들지 않음
+def test_init_engines_skips_sync_engine_in_async_mode(database, run_async, override_settings):
+    from app import database as db_module
+
+    override_settings(DB_ASYNC="true", DB_REPLICA_HOST="")
+    run_async(db_module.dispose_engines())
+
+    async def start():
+        await db_module.init_engines(warmup=1)
+        return db_module.created_engines()
+
+    engines = run_async(start())
+    assert [type(engine).__name__ for engine in engines] == ["AsyncEngine"]
+
+
+# 서버 시작 뒤 처음 사용할 때 만들어지는 엔진(리퍼의 동기 엔진 등)도 SQL 계측이 연결됨
+def test_engines_are_instrumented_when_created(database, run_async, override_settings):
+    from sqlalchemy import event
+
+    from app import database as db_module
+    from app.sql_metrics import _before_cursor_execute
+
+    for enabled in ("true", "false"):
+        override_settings(SQL_METRICS_ENABLED=enabled)
+        run_async(db_module.dispose_engines())
+        sync_engine = db_module.get_engine()
+        assert event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute) == (enabled == "true")
+    run_async(db_module.dispose_engines())
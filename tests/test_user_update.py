@@ -0,0 +1,31 @@
+from sqlalchemy import text
+
+
+def _update(client, auth_headers, **fields):
+    return client.put("/me", json=fields, headers=auth_headers)
+
+
+def test_update_normalizes_email(client, auth_headers, user, database):
+    new_email = user["user_email"].replace("@fixture.example.com", "@FIXTURE.example.com")
+    response = _update(client, auth_headers, user_email=f" {new_email} ", phone_number="010-0000-0000")
+    assert response.status_code == 200, response.text
+    assert response.json()["user_email"] == user["user_email"]
+    assert response.json()["phone_number"] == "010-0000-0000"
+
+
+def test_update_rejects_null_and_invalid_fields(client, auth_headers, user, database):
+    for fields in ({"user_email": None}, {"phone_number": None}, {"user_email": "not-an-email"}, {"phone_number": ""}):
+        response = _update(client, auth_headers, **fields)
+        assert response.status_code == 422, (fields, response.text)
+    with database.connect() as conn:
+        row = conn.execute(
+            text("SELECT user_email, phone_number FROM users WHERE user_id = :id"), {"id": user["user_id"]}
+        ).one()
+    assert tuple(row) == (user["user_email"], "1")
+
+
+def test_update_duplicate_email(client, auth_headers, make_user):
+    other = make_user("other")
+    response = _update(client, auth_headers, user_email=other["user_email"])
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"